@@ -1,18 +1,20 @@
 from enum import Enum
+from pydantic import Field
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 from typing import Optional
 
 class Settings(BaseSettings):
+    # Provider credentials are checked when a provider is first used, not at import
     # Plivo
-    auth_id: str
-    auth_token: str
+    auth_id: Optional[str] = None
+    auth_token: Optional[str] = None
     # OpenAI
-    openai_api_key: str
+    openai_api_key: Optional[str] = None
     # Deepgram
-    deepgram_api_key: str
+    deepgram_api_key: Optional[str] = None
     # ElevenLabs
-    elevenlabs_api_key: str
+    elevenlabs_api_key: Optional[str] = None
     # Github
     github_token: Optional[str] = None
     # MySQL Database
@@ -21,6 +23,87 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_USER: str
     DB_PORT: int
+    # MySQL read replica (optional)
+    DB_REPLICA_HOST: Optional[str] = None
+    DB_REPLICA_PORT: Optional[int] = None
+    DB_REPLICA_MAX_LAG_SECONDS: int = 5
+    DB_REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # HTTP caching of interview reads
+    INTERVIEW_COMPLETED_MAX_AGE_SECONDS: int = 60
+    INTERVIEW_WAIT_MAX_SECONDS: int = 60
+    # Per-call latency timeline
+    CALL_TRACE_CAPACITY: int = 512
+    # Logging
+    LOG_FORMAT: str = "json"  # json or text
+    LOG_QUEUE_SIZE: int = 10000
+    # Bearer token for the /admin endpoints, which are refused while it is unset
+    ADMIN_TOKEN: Optional[str] = None
+    # Event loop lag monitor and profiling
+    LOOP_LAG_INTERVAL_MS: int = 50
+    LOOP_LAG_THRESHOLD_MS: int = 100
+    PROFILE_MAX_SECONDS: int = 60
+    # Provider mode: "live" talks to the real services, "fake" uses in-process stand-ins
+    PROVIDER_MODE: str = "live"
+    FAKE_LATENCY_MS: int = 300
+    FAKE_TURN_FRAMES: int = 150
+    FAKE_RESPONSE_MS: int = 2000
+    FAKE_MAX_TURNS: int = 5
+    FAKE_ANSWER_RATE: float = 0.7  # share of outbound calls the fake Plivo API reports as answered
+    # Archival of completed interviews
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+    # Local recording of both call directions from the media stream
+    LOCAL_RECORDING_ENABLED: bool = False
+    LOCAL_RECORDING_DIR: str = "recordings"
+    LOCAL_RECORDING_SEGMENT_SECONDS: int = 300
+    LOCAL_RECORDING_RING_SECONDS: int = 10
+    # Per-worker call admission control
+    MAX_CONCURRENT_CALLS: int = 50
+    CALL_RESERVATION_TTL_SECONDS: int = 30
+    OVERLOAD_PROMPT_TEXT: str = "Sorry, all of our interviewers are busy right now. Please call back in a few minutes."
+    # Call supervision: websocket pings, inbound silence and call duration limits
+    WS_PING_INTERVAL_SECONDS: float = 25.0
+    WS_PING_TIMEOUT_SECONDS: float = 20.0
+    MAX_INBOUND_SILENCE_SECONDS: float = 15.0
+    MAX_CALL_DURATION_SECONDS: float = 1800.0
+    SUPERVISOR_INTERVAL_SECONDS: float = 1.0
+    # Graceful drain before exit
+    DRAIN_ON_SIGTERM: bool = True
+    DRAIN_TIMEOUT_SECONDS: float = 900.0
+    # Stream placement across a pool of nodes sharing the database
+    NODE_REGISTRY_ENABLED: bool = False
+    NODE_ID: Optional[str] = None  # defaults to hostname-pid
+    NODE_PUBLIC_HOST: Optional[str] = None  # host[:port] reaching only this node, for Plivo streams; required with the registry
+    NODE_HEARTBEAT_SECONDS: float = 2.0
+    NODE_STALE_SECONDS: float = 10.0
+    NODE_MAX_LOOP_LAG_MS: float = 250.0
+    CALL_ROUTE_TTL_SECONDS: int = 3600
+    # Outbound dialer for pending interviews
+    DIALER_ENABLED: bool = False
+    DIALER_FROM_NUMBER: Optional[str] = None  # caller ID of outbound calls
+    DIALER_CALLBACK_BASE_URL: Optional[str] = None  # public base URL Plivo uses for answer and hangup callbacks
+    DIALER_CALLS_PER_SECOND: float = 5.0
+    DIALER_MAX_CONCURRENT: int = 100
+    DIALER_INBOUND_HEADROOM: int = 5  # call slots kept free for candidates calling in
+    DIALER_RING_TIMEOUT_SECONDS: int = 30
+    DIALER_MAX_ATTEMPTS: int = 3
+    DIALER_RETRY_BACKOFF_SECONDS: int = 1800  # doubled per attempt
+    DIALER_TIMEZONE: str = "UTC"  # for campaign windows that don't set their own
+    DIALER_TICK_MS: int = 100
+    DIALER_BATCH_SIZE: int = 100
+    DIALER_REFRESH_SECONDS: float = 10.0  # also how often the dialer lease is renewed
+    DIALER_LEASE_SECONDS: float = 30.0  # a dialer that stops renewing is replaced after this long
+    DIALER_SYNC_SECONDS: float = 1.0  # how often outcomes recorded by other workers are picked up
+    # Write-behind transcript journal: flush every N turns or T ms, whichever comes first
+    TRANSCRIPT_FLUSH_TURNS: int = 4
+    TRANSCRIPT_FLUSH_MS: int = 2000
+    # Live transcript streaming to watchers
+    LIVE_QUEUE_SIZE: int = Field(64, ge=3)  # room for the backlog plus a final frame and end-of-stream marker
+    LIVE_MAX_DROPPED_EVENTS: int = 16
+    LIVE_KEEPALIVE_SECONDS: float = 15.0
     
     class Config:
         env_file = ".env"
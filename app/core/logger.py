@@ -1,18 +1,123 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+from app.core.config import settings
+from app.core.metrics import log_records_dropped_total
+
+# Per-call fields (call_uuid, interview_id) attached to every record logged within a call
+log_context: contextvars.ContextVar[Dict] = contextvars.ContextVar("log_context", default={})
+
+def bind_log_context(**fields):
+    """Attach fields to every record logged from the current task or thread"""
+    log_context.set({**log_context.get(), **fields})
+
+class ContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in log_context.get().items():
+            setattr(record, key, value)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in ("call_uuid", "interview_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread, dropping them when the buffer is full.
+
+    Blocking the caller would stall the event loop or an ElevenLabs audio thread, so
+    a full queue costs log lines, never latency.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare folds the traceback into msg and drops exc_info; keep it for
+        # the writer's formatter, which also does the formatting off the calling thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped_total.inc()
+
+class RateLimitedLog:
+    """Logs at most one message per key per interval, for events that can fire per audio frame"""
+    def __init__(self, logger: logging.Logger, interval: float = 5.0):
+        self.logger = logger
+        self.interval = interval
+        self._last: Dict[str, float] = {}
+        self._suppressed: Dict[str, int] = {}
+
+    def log(self, level: int, key: str, message: str):
+        now = time.monotonic()
+        if now - self._last.get(key, 0.0) < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        self.logger.log(level, message)
+
+_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+_listener = None
+_listener_lock = threading.Lock()
+
+def _ensure_listener():
+    """Start the single background writer thread shared by every logger"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        handler = logging.StreamHandler()
+        if settings.LOG_FORMAT == "json":
+            handler.setFormatter(JsonFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            ))
+        _listener = logging.handlers.QueueListener(_queue, handler)
+        _listener.start()
+        atexit.register(_listener.stop)
 
 def setup_logger(name: str) -> logging.Logger:
-    """Configure and return a logger instance."""
+    """Configure and return a logger instance.
+
+    Records go through a bounded queue to a background writer thread, so logging
+    never performs blocking I/O on the calling thread.
+    """
     logger = logging.getLogger(name)
     
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
+        _ensure_listener()
+        handler = DroppingQueueHandler(_queue)
+        handler.addFilter(ContextFilter())
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
+        logger.propagate = False
     
     return logger
 
-logger = setup_logger("interview-phone-agent")
\ No newline at end of file
+logger = setup_logger("interview-phone-agent")
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import event_loop_lag_seconds, event_loop_stalls_total
+
+class LoopLagMonitor:
+    """Measures event loop lag and logs what is blocking the loop when it stalls.
+
+    A probe task on the loop sleeps for a fixed interval and records how late it woke
+    up. A watchdog thread checks the probe's heartbeat. When the heartbeat is older
+    than the threshold, the loop is blocked right now, so the watchdog logs the event
+    loop thread's current stack to show the offending code while it is still running.
+    """
+    def __init__(self):
+        self.interval = settings.LOOP_LAG_INTERVAL_MS / 1000
+        self.threshold = settings.LOOP_LAG_THRESHOLD_MS / 1000
+        self.max_lag = 0.0
+        # Worst lag since the last take_recent_lag(), for load reporting
+        self.recent_lag = 0.0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+            self.max_lag = max(self.max_lag, lag)
+            self.recent_lag = max(self.recent_lag, lag)
+            event_loop_lag_seconds.observe(lag)
+            if lag > self.threshold:
+                event_loop_stalls_total.inc()
+                logger.warning(f"Event loop lag {lag * 1000:.0f}ms exceeded {self.threshold * 1000:.0f}ms")
+
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self.interval
+            # Report each stall once, while it is still happening
+            if stalled_for > self.threshold and heartbeat != reported_heartbeat:
+                reported_heartbeat = heartbeat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    stack = "".join(traceback.format_stack(frame))
+                    logger.warning(f"Event loop blocked for {stalled_for * 1000:.0f}ms at:\n{stack}")
+
+    def take_recent_lag(self) -> float:
+        """Worst lag since the previous call, in seconds"""
+        lag, self.recent_lag = self.recent_lag, 0.0
+        return lag
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._probe())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+loop_monitor = LoopLagMonitor()
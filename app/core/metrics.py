@@ -0,0 +1,207 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from a single audio frame up to a slow LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: List["_Metric"] = []
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    """Base for metrics. Children per label set are created once and cached.
+
+    Updates are plain attribute arithmetic with no locks: metrics are updated from the
+    event loop and from ElevenLabs threads, and a rare lost increment is an acceptable
+    price for keeping the audio path free of lock contention.
+    """
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), register: bool = True):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        if register:
+            _registry.append(self)
+
+    def _new_child(self) -> "_Metric":
+        return type(self)(self.name, self.description, register=False)
+
+    def labels(self, *values) -> "_Metric":
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _samples(self) -> List[Tuple[Tuple[str, ...], "_Metric"]]:
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._samples():
+            lines.extend(child._render_child(self.name, self.labelnames, values))
+        return lines
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), register: bool = True):
+        super().__init__(name, description, labelnames, register)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def _render_child(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {self.value}"]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), register: bool = True):
+        super().__init__(name, description, labelnames, register)
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value at scrape time instead of tracking it on every change"""
+        self._function = function
+
+    def _render_child(self, name, labelnames, values):
+        value = self._function() if self._function else self.value
+        return [f"{name}{_format_labels(labelnames, values)} {value}"]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        register: bool = True
+    ):
+        super().__init__(name, description, labelnames, register)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket plus +Inf; cumulative counts are only computed at scrape time
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.description, buckets=self.buckets, register=False)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def _render_child(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            le_label = f'le="{le}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le_label)} {cumulative}")
+        label_str = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{label_str} {self.sum}")
+        lines.append(f"{name}_count{label_str} {cumulative}")
+        return lines
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+def timed(histogram: Histogram):
+    """Decorator recording the duration of a sync or async function into histogram"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time():
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Call path
+ring_to_first_audio_seconds = Histogram(
+    "ring_to_first_audio_seconds",
+    "Time from the inbound call webhook to the first agent audio sent to Plivo"
+)
+agent_turn_latency_seconds = Histogram(
+    "agent_turn_latency_seconds",
+    "Time from a user transcript to the first agent audio chunk of the reply"
+)
+active_calls = Gauge("active_calls", "Calls currently streaming on this worker")
+outbound_audio_queue_depth = Gauge(
+    "outbound_audio_queue_depth",
+    "Agent audio chunks scheduled on the event loop but not yet sent to Plivo"
+)
+calls_total = Counter("calls_total", "Calls accepted on the Plivo stream endpoint")
+calls_reclaimed_total = Counter("calls_reclaimed_total", "Calls terminated by the supervisor", ["reason"])
+calls_rejected_total = Counter("calls_rejected_total", "Calls turned away because the worker was at capacity", ["stage"])
+log_records_dropped_total = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop lag probe beyond its scheduled wake-up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+event_loop_stalls_total = Counter("event_loop_stalls_total", "Event loop ticks that exceeded the lag threshold")
+dialer_calls_total = Counter("dialer_calls_total", "Outbound calls placed by the dialer, by outcome", ["outcome"])
+dialer_inflight_calls = Gauge("dialer_inflight_calls", "Outbound calls placed by the dialer and not yet hung up")
+live_subscribers = Gauge("live_subscribers", "Clients currently streaming a live call transcript")
+live_events_dropped_total = Counter("live_events_dropped_total", "Live transcript events dropped for slow subscribers")
+
+# Dependencies
+llm_latency_seconds = Histogram("llm_latency_seconds", "OpenAI function call latency", ["function"])
+tts_latency_seconds = Histogram("tts_latency_seconds", "ElevenLabs text-to-speech latency")
+mysql_query_seconds = Histogram("mysql_query_seconds", "MySQLService method latency", ["method"])
+plivo_recording_seconds = Histogram("plivo_recording_seconds", "Plivo recording REST latency", ["operation"])
+plivo_call_seconds = Histogram("plivo_call_seconds", "Plivo outbound call REST latency")
+webhook_latency_seconds = Histogram("webhook_latency_seconds", "Evaluation webhook latency")
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running on this worker"""
+
+class Profiler:
+    """On-demand sampling CPU profiles and tracemalloc diffs for the current worker"""
+    def __init__(self):
+        self._busy = asyncio.Lock()
+
+    def _sample(self, seconds: float, interval: float) -> Counter:
+        stacks = Counter()
+        me = threading.get_ident()
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                names.append(thread_names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(names))] += 1
+            time.sleep(interval)
+        return stacks
+
+    async def cpu_profile(self, seconds: float, interval: float = 0.005, limit: int = 30) -> Dict:
+        """Sample every thread's stack for seconds.
+
+        Sampling runs in a separate thread, so the event loop keeps serving calls while it
+        runs. Stacks are returned in collapsed format (root;...;leaf count), which flame
+        graph tools accept directly.
+        """
+        if self._busy.locked():
+            raise ProfilerBusyError("A profile is already running on this worker")
+        async with self._busy:
+            stacks = await asyncio.to_thread(self._sample, seconds, interval)
+
+        leaf_counts = Counter()
+        for stack, count in stacks.items():
+            leaf_counts[stack.rsplit(";", 1)[-1]] += count
+        total = sum(stacks.values())
+        return {
+            "pid": os.getpid(),
+            "seconds": seconds,
+            "samples": total,
+            "top_functions": [
+                {"function": name, "samples": count, "percent": round(100 * count / total, 1)}
+                for name, count in leaf_counts.most_common(limit)
+            ] if total else [],
+            "collapsed": [f"{stack} {count}" for stack, count in stacks.most_common()]
+        }
+
+    def _top_growth(self, before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict]:
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "size_kb": round(stat.size / 1024, 1)
+            }
+            for stat in after.compare_to(before, "lineno")[:limit]
+        ]
+
+    async def memory_diff(self, seconds: float, limit: int = 30) -> Dict:
+        """Compare tracemalloc snapshots taken seconds apart, largest growth first.
+
+        Snapshots and the comparison walk every traced allocation, which takes long enough
+        on a busy worker to stall live calls' audio, so they run in a separate thread.
+        """
+        if self._busy.locked():
+            raise ProfilerBusyError("A profile is already running on this worker")
+        async with self._busy:
+            started_here = not tracemalloc.is_tracing()
+            if started_here:
+                tracemalloc.start(10)
+            try:
+                before = await asyncio.to_thread(tracemalloc.take_snapshot)
+                await asyncio.sleep(seconds)
+                after = await asyncio.to_thread(tracemalloc.take_snapshot)
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                if started_here:
+                    tracemalloc.stop()
+            top_growth = await asyncio.to_thread(self._top_growth, before, after, limit)
+
+        return {
+            "pid": os.getpid(),
+            "seconds": seconds,
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "top_growth": top_growth
+        }
+
+profiler = Profiler()
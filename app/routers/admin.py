@@ -0,0 +1,131 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
+from app.core.profiler import profiler, ProfilerBusyError
+from app.schemas.dialer import DialCampaign, DialCampaignConfig
+from app.services.admission import admission_controller
+from app.services.archive import archive_service
+from app.services.dialer import outbound_dialer
+from app.services.drain import drain_service
+from app.services.mysql import mysql_service
+from app.services.nodes import node_registry
+from app.services.providers import warm_up_seconds
+from app.services.supervisor import call_supervisor
+
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """Admin endpoints can stop the worker and start dialing, so they need the ADMIN_TOKEN bearer token"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them"
+        )
+    expected = f"Bearer {settings.ADMIN_TOKEN}".encode()
+    if not authorization or not secrets.compare_digest(authorization.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)]
+)
+
+@router.get("/archive")
+async def get_archive_status():
+    """Get rows moved and lag of the interview archive job"""
+    return archive_service.get_status()
+
+@router.get("/calls")
+async def get_call_admission():
+    """Get active, reserved, rejected and reclaimed call counts of this worker"""
+    return {**admission_controller.get_status(), **call_supervisor.get_status()}
+
+@router.get("/nodes")
+async def get_nodes():
+    """Get this node's load and the pool snapshot used for stream placement"""
+    return node_registry.get_status()
+
+@router.get("/drain")
+async def get_drain_status():
+    """Get the drain state of this worker"""
+    return drain_service.get_status()
+
+@router.post("/drain")
+async def start_drain(exit: bool = Query(False, description="Shut the worker down once drained")):
+    """Stop admitting calls on this worker and wait for active calls to finish"""
+    if not drain_service.start(exit_when_done=exit):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Worker is already draining"
+        )
+    return drain_service.get_status()
+
+@router.get("/dialer")
+async def get_dialer_status():
+    """Get throughput and in-flight calls of the outbound dialer, overall and per campaign"""
+    return outbound_dialer.get_status()
+
+@router.put("/dialer/campaigns/{job_id}", response_model=DialCampaign)
+async def put_dial_campaign(job_id: str, config: DialCampaignConfig):
+    """Create or update the outbound dialing campaign of a job"""
+    campaign = DialCampaign(job_id=job_id, **config.model_dump())
+    await mysql_service.upsert_dial_campaign(campaign.model_dump())
+    if outbound_dialer.task:
+        await outbound_dialer.refresh_campaigns()
+    return campaign
+
+@router.get("/dialer/campaigns/{job_id}")
+async def get_dial_campaign_progress(job_id: str):
+    """Count a job's interviews by dialing status"""
+    return await mysql_service.get_dial_progress(job_id)
+
+@router.delete("/dialer/campaigns/{job_id}")
+async def delete_dial_campaign(job_id: str):
+    """Stop dialing a job; calls already placed run to completion"""
+    if not await mysql_service.delete_dial_campaign(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No dialing campaign for job {job_id}"
+        )
+    if outbound_dialer.task:
+        await outbound_dialer.refresh_campaigns()
+    return {"success": True}
+
+@router.get("/providers")
+async def get_provider_warm_up():
+    """Get how long each provider took to load at startup; null for providers that failed"""
+    return warm_up_seconds
+
+@router.get("/loop")
+async def get_loop_status():
+    """Get the worst event loop lag seen by this worker"""
+    return {"max_lag_ms": round(loop_monitor.max_lag * 1000, 1), "threshold_ms": loop_monitor.threshold * 1000}
+
+@router.post("/profile/cpu")
+async def profile_cpu(seconds: float = Query(10, gt=0), limit: int = Query(30, gt=0)):
+    """Capture a time-boxed sampling CPU profile of the worker serving this request"""
+    try:
+        return await profiler.cpu_profile(min(seconds, settings.PROFILE_MAX_SECONDS), limit=limit)
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+@router.post("/profile/memory")
+async def profile_memory(seconds: float = Query(10, gt=0), limit: int = Query(30, gt=0)):
+    """Capture a tracemalloc snapshot diff of the worker serving this request"""
+    try:
+        return await profiler.memory_diff(min(seconds, settings.PROFILE_MAX_SECONDS), limit=limit)
+    except ProfilerBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
@@ -1,8 +1,17 @@
-from fastapi import APIRouter, Request, WebSocket
+import asyncio
+import base64
+import json
+import time
+from typing import Dict, Optional
+from fastapi import APIRouter, HTTPException, Request, WebSocket, status
 from fastapi.responses import Response
-from plivo import plivoxml
+from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import calls_total
 from app.services.Plivo import PlivoService
+from app.services.admission import admission_controller
+from app.services.dialer import outbound_dialer
+from app.services.nodes import node_registry
 import starlette.websockets
 
 router = APIRouter(
@@ -10,6 +19,62 @@ router = APIRouter(
     tags=["call"]
 )
 
+# Monotonic time each call was answered, consumed when its stream connects to this worker
+_ring_times: Dict[str, float] = {}
+_RING_TIME_TTL = 120  # seconds
+
+def _remember_ring(call_uuid: str):
+    now = time.monotonic()
+    # Entries are in insertion order, so expired ones are at the front
+    while _ring_times:
+        oldest_uuid = next(iter(_ring_times))
+        if now - _ring_times[oldest_uuid] < _RING_TIME_TTL:
+            break
+        del _ring_times[oldest_uuid]
+    _ring_times[call_uuid] = now
+
+def _busy_response(request: Request) -> Response:
+    """Play the cached overload prompt and hang up"""
+    from plivo import plivoxml
+
+    response = plivoxml.ResponseElement()
+    if admission_controller.prompt_wav:
+        response.add(plivoxml.PlayElement(f"https://{request.url.hostname}/plivo/overload_prompt.wav"))
+    else:
+        response.add(plivoxml.SpeakElement(settings.OVERLOAD_PROMPT_TEXT))
+    response.add(plivoxml.HangupElement(reason="busy"))
+    return Response(
+        content=response.to_string(),
+        media_type="application/xml"
+    )
+
+async def _reject_stream(websocket: WebSocket):
+    """Play the cached overload prompt on a stream and close it, which ends the call"""
+    try:
+        await websocket.accept()
+        if admission_controller.prompt:
+            await websocket.send_text(json.dumps({
+                "event": "playAudio",
+                "media": {
+                    "contentType": "audio/x-mulaw",
+                    "sampleRate": 8000,
+                    "payload": base64.b64encode(admission_controller.prompt).decode("utf-8")
+                }
+            }))
+            await asyncio.sleep(admission_controller.prompt_seconds + 0.5)  # Let the prompt finish playing
+        await websocket.close(code=1000)
+    except Exception as e:
+        logger.info(f"Rejected stream closed early: {e}")
+
+@router.get("/overload_prompt.wav")
+async def overload_prompt():
+    if not admission_controller.prompt_wav:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Overload prompt not rendered"
+        )
+    return Response(content=admission_controller.prompt_wav, media_type="audio/wav")
+
 # @router.post("/inbound_call")
 @router.get("/inbound_call")
 async def inbound_call(request: Request):
@@ -17,15 +82,46 @@ async def inbound_call(request: Request):
         form_data = await request.form()
         call_uuid = form_data.get("CallUUID", "Unknown")
         from_number = form_data.get("From", "Unknown")
+        direction = form_data.get("Direction")
+        to_number = form_data.get("To", "Unknown")
+        request_uuid = form_data.get("RequestUUID")
     else:  # GET request
         query_params = request.query_params
         call_uuid = query_params.get("CallUUID", "Unknown")
         from_number = query_params.get("From", "Unknown")
-    logger.info(f"Incoming call: CallUUID={call_uuid}, From={from_number}")
+        direction = query_params.get("Direction")
+        to_number = query_params.get("To", "Unknown")
+        request_uuid = query_params.get("RequestUUID")
+    stream_params = ""
+    if direction == "outbound":
+        # Placed by the dialer: the candidate is the called party, and may have more than one pending interview
+        from_number = to_number
+        interview_id = await outbound_dialer.on_answer(request_uuid)
+        if interview_id is not None:
+            stream_params = f"&interview_id={interview_id}"
+    logger.info(f"Incoming call: CallUUID={call_uuid}, From={from_number}, Direction={direction}")
+    stream_host = request.url.hostname
+    if node_registry.enabled:
+        node = await node_registry.place(call_uuid)
+        if node is None:
+            admission_controller.reject("placement")
+            return _busy_response(request)
+        stream_host = node["host"]
+        local = node_registry.is_local(node)
+    else:
+        local = True
+    # Calls placed on another node are admitted there when their stream connects
+    if local:
+        if not admission_controller.reserve(call_uuid):
+            return _busy_response(request)
+        _remember_ring(call_uuid)
+
+    # The plivo package pulls in its REST client, so it is imported on first use (or by the startup warm-up)
+    from plivo import plivoxml
 
     response = plivoxml.ResponseElement().add(
         plivoxml.StreamElement(
-            f"wss://{request.url.hostname}/plivo/stream?from_number={from_number}&call_uuid={call_uuid}",
+            f"wss://{stream_host}/plivo/stream?from_number={from_number}&call_uuid={call_uuid}{stream_params}",
             bidirectional=True,
             audioTrack="inbound",
             keepCallAlive=True,
@@ -38,15 +134,30 @@ async def inbound_call(request: Request):
         media_type="application/xml"
     )
 
+@router.post("/outbound_hangup")
+async def outbound_hangup(request: Request):
+    """Hangup callback of calls placed by the dialer"""
+    form_data = await request.form()
+    await outbound_dialer.on_hangup(form_data.get("RequestUUID"), form_data.get("CallStatus"), form_data.get("Duration"))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 # WebSocket endpoint for Plivo
 @router.websocket("/stream")
-async def websocket_endpoint(websocket: WebSocket, from_number: str = "Unknown", call_uuid: str = None):
+async def websocket_endpoint(
+    websocket: WebSocket, from_number: str = "Unknown", call_uuid: str = None, interview_id: Optional[int] = None
+):
+    if not admission_controller.admit(call_uuid):
+        await _reject_stream(websocket)
+        return
+    calls_total.inc()
     try:
         await websocket.accept()
-        print('Plivo connection incoming')
+        logger.info('Plivo connection incoming')
         plivo_service = PlivoService()
-        await plivo_service.plivo_receiver(websocket, from_number, call_uuid)
+        await plivo_service.plivo_receiver(websocket, from_number, call_uuid, _ring_times.pop(call_uuid, None), interview_id)
     except Exception as e:
         logger.error(f"Error in websocket endpoint: {e}")
         if websocket.client_state != starlette.websockets.WebSocketState.DISCONNECTED:
-            await websocket.close()
\ No newline at end of file
+            await websocket.close()
+    finally:
+        admission_controller.release()
\ No newline at end of file
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+import hashlib
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from typing import Dict, List, Optional
 
+from app.core.config import settings
+from app.services.evaluation import evaluation_service
 from app.services.interview import interview_service
+from app.services.journal import journal_service
+from app.services.mysql import VersionConflictError
 from app.schemas.interview import (
     InterviewCreate,
     InterviewUpdate,
     Interview,
-    InterviewResponse
+    InterviewResponse,
+    RankedCandidate,
+    TranscriptTurn
 )
 
 router = APIRouter(
@@ -14,6 +21,53 @@ router = APIRouter(
     tags=["interviews"]
 )
 
+def _interview_etag(interview_id: int, version: int) -> str:
+    return f'"i{interview_id}-v{version}"'
+
+def _parse_etag_version(header: Optional[str], interview_id: int) -> Optional[int]:
+    """Extract the version from an If-None-Match or If-Match header produced by _interview_etag"""
+    if not header:
+        return None
+    prefix = f'"i{interview_id}-v'
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith(prefix) and tag.endswith('"'):
+            try:
+                return int(tag[len(prefix):-1])
+            except ValueError:
+                return None
+    return None
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def _cache_headers(etag: str, is_completed: bool) -> Dict[str, str]:
+    # Pending interviews must be revalidated on every poll; completed ones rarely change
+    if is_completed:
+        cache_control = f"private, max-age={settings.INTERVIEW_COMPLETED_MAX_AGE_SECONDS}"
+    else:
+        cache_control = "private, no-cache"
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+def _expected_version(request: Request, interview_id: int, update_data: InterviewUpdate) -> InterviewUpdate:
+    """Make the update conditional when the body carries a version or If-Match an ETag.
+
+    Without either the update applies to whatever version is current, as it always has.
+    """
+    if_match = request.headers.get("if-match")
+    if update_data.version is None and if_match and if_match.strip() != "*":
+        version = _parse_etag_version(if_match, interview_id)
+        if version is None:
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="If-Match does not name a version of this interview"
+            )
+        update_data = update_data.model_copy(update={"version": version})
+    return update_data
+
 @router.post("/interviews", response_model=InterviewResponse)
 async def create_interview(request: InterviewCreate):
     """Create a new interview"""
@@ -26,20 +80,110 @@ async def create_interview(request: InterviewCreate):
     return response
 
 @router.get("/interviews/{interview_id}", response_model=Interview)
-async def get_interview(interview_id: int):
+async def get_interview(interview_id: int, request: Request, response: Response):
     """Get an interview by ID"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Answer revalidation from the version alone, without loading the full row
+        state = await interview_service.get_interview_state(interview_id)
+        if state:
+            etag = _interview_etag(interview_id, state['version'])
+            if _etag_matches(if_none_match, etag):
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED,
+                    headers=_cache_headers(etag, bool(state['is_completed']))
+                )
+
+    interview = await interview_service.get_interview(interview_id)
+    if not interview:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Interview not found"
+        )
+    response.headers.update(_cache_headers(_interview_etag(interview_id, interview.version), interview.is_completed))
+    return interview
+
+@router.get("/interviews/{interview_id}/wait", response_model=Interview)
+async def wait_for_interview(
+    interview_id: int,
+    request: Request,
+    response: Response,
+    timeout: float = Query(30, gt=0)
+):
+    """Long-poll an interview until it is completed or differs from the If-None-Match version"""
+    if_none_match = request.headers.get("if-none-match")
+    known_version = _parse_etag_version(if_none_match, interview_id)
+    timeout = min(timeout, settings.INTERVIEW_WAIT_MAX_SECONDS)
+
+    state = await interview_service.wait_for_change(interview_id, known_version, timeout)
+    if not state:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Interview not found"
+        )
+    etag = _interview_etag(interview_id, state['version'])
+    if _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=_cache_headers(etag, bool(state['is_completed']))
+        )
+
     interview = await interview_service.get_interview(interview_id)
     if not interview:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Interview not found"
         )
+    response.headers.update(_cache_headers(_interview_etag(interview_id, interview.version), interview.is_completed))
     return interview
 
+@router.get("/interviews/{interview_id}/transcript", response_model=List[TranscriptTurn])
+async def get_interview_transcript(interview_id: int):
+    """Get the stored transcript turns of every call for an interview"""
+    if not await interview_service.get_interview_state(interview_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Interview not found"
+        )
+    return await journal_service.get_turns(interview_id)
+
+@router.post("/interviews/{interview_id}/evaluation")
+async def reevaluate_interview(interview_id: int):
+    """Evaluate an interview again from its stored transcript and resend the webhook"""
+    interview = await interview_service.get_interview(interview_id)
+    if not interview:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Interview not found"
+        )
+    evaluation = await evaluation_service.reevaluate_interview(interview)
+    if evaluation is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No transcript stored for this interview"
+        )
+    return evaluation
+
+@router.get("/jobs/{job_id}/ranking", response_model=List[RankedCandidate])
+async def get_job_ranking(
+    job_id: str,
+    limit: int = Query(10, gt=0, le=1000),
+    criterion: Optional[str] = Query(None, description="Rank by this criterion's score instead of the final score")
+):
+    """Get the top evaluated candidates of a job, best first"""
+    return await evaluation_service.get_ranking(job_id, limit, criterion)
+
 @router.put("/interviews/{interview_id}", response_model=Interview)
-async def update_interview(interview_id: int, update_data: InterviewUpdate):
-    """Update an interview"""
-    updated = await interview_service.update_interview(interview_id, update_data)
+async def update_interview(interview_id: int, update_data: InterviewUpdate, request: Request):
+    """Update an interview, only at the version given in the body or in If-Match if either is sent"""
+    update_data = _expected_version(request, interview_id, update_data)
+    try:
+        updated = await interview_service.update_interview(interview_id, update_data)
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,9 +192,16 @@ async def update_interview(interview_id: int, update_data: InterviewUpdate):
     return updated
 
 @router.put("/jobs/{job_id}/interviews/{interview_id}", response_model=Interview)
-async def update_interview_by_job_id(job_id: str, interview_id: int, request: InterviewUpdate):
-    """Update an interview by job ID"""
-    interview = await interview_service.update_interview_by_job_id(job_id, interview_id, request)
+async def update_interview_by_job_id(job_id: str, interview_id: int, update_data: InterviewUpdate, request: Request):
+    """Update an interview by job ID, only at the version given in the body or in If-Match if either is sent"""
+    update_data = _expected_version(request, interview_id, update_data)
+    try:
+        interview = await interview_service.update_interview_by_job_id(job_id, interview_id, update_data)
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     if not interview:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,6 +220,17 @@ async def delete_interview(interview_id: int):
         )
 
 @router.get("/interviews/phone/{phone_number}", response_model=List[Interview])
-async def get_interviews_by_phone(phone_number: str):
+async def get_interviews_by_phone(phone_number: str, request: Request, response: Response):
     """Get all interviews for a phone number"""
+    # The list ETag covers the id and version of every interview for the number
+    versions = await interview_service.get_interview_versions_by_phone(phone_number)
+    digest = hashlib.sha1(
+        ",".join(f"{row['interview_id']}:{row['version']}" for row in versions).encode()
+    ).hexdigest()
+    etag = f'"p{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
     return await interview_service.get_interviews_by_phone(phone_number)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.services.live import live_hub
+from app.services.trace import trace_service
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["monitoring"]
+)
+
+@router.get("/calls/{call_uuid}/trace")
+async def get_call_trace(call_uuid: str):
+    """Get the latency timeline recorded for a call"""
+    trace = await trace_service.get_trace(call_uuid)
+    if not trace:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call trace not found"
+        )
+    return trace
+
+@router.get("/calls/{call_uuid}/live")
+async def stream_call_live(call_uuid: str):
+    """Stream the transcript of an active call as server-sent events"""
+    subscriber = live_hub.subscribe(call_uuid)
+    if subscriber is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Call is not active on this worker"
+        )
+    return StreamingResponse(
+        live_hub.stream(call_uuid, subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
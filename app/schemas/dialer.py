@@ -0,0 +1,24 @@
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel, Field, field_validator
+
+class DialCampaignConfig(BaseModel):
+    calls_per_second: float = Field(1.0, gt=0)
+    max_concurrent: int = Field(10, gt=0)
+    window_start: Optional[str] = Field(None, pattern=r"^([01]\d|2[0-3]):[0-5]\d$") # HH:MM, local to timezone
+    window_end: Optional[str] = Field(None, pattern=r"^([01]\d|2[0-3]):[0-5]\d$") # may be before window_start to span midnight
+    timezone: Optional[str] = None # IANA name, defaults to DIALER_TIMEZONE
+    active: bool = True
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"Unknown timezone {value}")
+        return value
+
+class DialCampaign(DialCampaignConfig):
+    job_id: str
@@ -23,15 +23,33 @@ class InterviewUpdate(BaseModel):
     evaluation_language: Optional[str] = None
     is_completed: Optional[bool] = None
     call_recording_url: Optional[str] = None
+    version: Optional[int] = None # expected current version; the update is rejected if it has changed
 
 class Interview(InterviewBase):
     interview_id: int
     is_completed: bool = False
+    version: int = 1
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
     class Config:
         from_attributes = True
 
+class TranscriptTurn(BaseModel):
+    call_uuid: str
+    seq: int
+    role: str # human or ai
+    text: str
+    t_ms: Optional[int] = None # offset from the start of the call
+    tokens: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class RankedCandidate(BaseModel):
+    interview_id: int
+    phone_number: Optional[str] = None
+    final_score: int
+    score: Optional[int] = None # score of the requested criterion, when ranking by one
+    evaluated_at: Optional[datetime] = None
+
 class InterviewResponseData(BaseModel):
     interview_id: int
     job_id: str
@@ -1,33 +1,61 @@
 import asyncio
 import base64
 import json
+import time
 import websockets
-import traceback
-from elevenlabs.client import ElevenLabs
-from elevenlabs.conversational_ai.conversation import Conversation
-from elevenlabs import ConversationConfig
-from elevenlabs import VoiceSettings
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain_community.chat_message_histories import ChatMessageHistory
 import starlette.websockets
+from typing import Optional
 
 from app.core.config import settings
-from app.core.logger import logger
+from app.core.logger import logger, bind_log_context
+from app.core.metrics import tts_latency_seconds
 from app.services.chat import chat_service
 from app.services.interview import interview_service
+from app.services.mysql import VersionConflictError
 from app.services.evaluation import evaluation_service
 from app.services.callRecord import call_record_service
-from app.services.audio.plivo_audio import PlivoAudioInterface
+from app.services.trace import CallTrace, trace_service
+from app.services.transcript import Transcript
+from app.services.live import live_hub
+from app.services.journal import TranscriptJournal
+from app.services.supervisor import call_supervisor
+from app.services.providers import get_conversation_class, get_elevenlabs_client
+from app.services.audio.recorder import LocalCallRecorder
 from app.core.prompt_templates.call_ended import call_ended_prompt
 from app.utils.utils import format_conversation_history
 from app.schemas.interview import InterviewUpdate
 
-elevenlabs_client = ElevenLabs(api_key=settings.elevenlabs_api_key)
+def synthesize_ulaw(text: str) -> bytes:
+    """Render text to 8 kHz mu-law with ElevenLabs; blocks until the whole clip is received"""
+    from elevenlabs import VoiceSettings
+
+    tts_started = time.perf_counter()
+    response = get_elevenlabs_client().text_to_speech.convert(
+        voice_id="XrExE9yKIg1WjnnlVkGX",  # Using a pre-made voice (Adam)
+        output_format="ulaw_8000",  # 8kHz audio format
+        text=text,
+        model_id="eleven_multilingual_v2",
+        voice_settings=VoiceSettings(
+            stability=0.0,
+            similarity_boost=1.0,
+            style=0.0,
+            use_speaker_boost=True,
+        ),
+    )
+
+    # Collect the audio data from the response
+    output = bytearray(b'')
+    for chunk in response:
+        if chunk:
+            output.extend(chunk)
+    tts_latency_seconds.observe(time.perf_counter() - tts_started)
+    return bytes(output)
 
 class PlivoService:
     def __init__(self):
-        self.messages = ChatMessageHistory()
-        self.ping_interval = 25  # seconds
+        self.messages = Transcript()
+        self.conversation = None
+        self.terminated = None
         # Initialize event loop in the main thread
         try:
             self.loop = asyncio.get_running_loop()
@@ -38,24 +66,7 @@ class PlivoService:
     # Converts text to speech using ElevenLabs API and sends it via Plivo WebSocket
     async def text_to_speech_file(self, text: str, end_call: bool = False):
         try:
-            response = elevenlabs_client.text_to_speech.convert(
-                voice_id="XrExE9yKIg1WjnnlVkGX",  # Using a pre-made voice (Adam)
-                output_format="ulaw_8000",  # 8kHz audio format
-                text=text,
-                model_id="eleven_multilingual_v2",
-                voice_settings=VoiceSettings(
-                    stability=0.0,
-                    similarity_boost=1.0,
-                    style=0.0,
-                    use_speaker_boost=True,
-                ),
-            )
-
-            # Collect the audio data from the response
-            output = bytearray(b'')
-            for chunk in response:
-                if chunk:
-                    output.extend(chunk)
+            output = synthesize_ulaw(text)
 
             # Encode the audio data in Base64 format
             encode = base64.b64encode(output).decode('utf-8')
@@ -75,8 +86,6 @@ class PlivoService:
                 try:
                     if self.plivo_ws.client_state == starlette.websockets.WebSocketState.CONNECTED:
                         await self.plivo_ws.close(code=1000)  # Normal closure
-                    logger.info("Clearing messages...")
-                    self.messages.clear()
                 except Exception as e:
                     logger.error(f"Error during graceful shutdown: {e}")
         except Exception as e:
@@ -84,63 +93,133 @@ class PlivoService:
 
     def handle_transcript(self, transcription):
         """Handle incoming transcription from Deepgram"""
-        print(f"Transcription: {transcription}")
-        self.messages.add_user_message(HumanMessage(transcription))
+        # Runs on the ElevenLabs thread, which doesn't share the call task's log context
+        bind_log_context(**self.log_fields)
+        logger.info(f"Transcription: {transcription}")
+        self.trace.record("user_transcript", len(transcription))
+        self.audio_interface.mark_turn_start()
+        index = self.messages.add_user_message(transcription)
+        self._publish_turn(index)
     
     async def handle_agent_response(self, text):
-        print(f"Agent response: {text}")
-        self.messages.add_ai_message(AIMessage(text))
+        logger.info(f"Agent response: {text}")
+        self.trace.record("agent_response", len(text))
+        index = self.messages.add_ai_message(text)
+        self._publish_turn(index)
 
         # check if call ended by calling the openai function tool with the transcription
-        if len(self.messages.messages) < 5:
+        if len(self.messages) < 5:
             return
+        self.trace.record("call_end_check_start")
         call_ended = chat_service.function_call(call_ended_prompt.format(
             transcript=format_conversation_history(self.messages)
         ), "call_ended")
+        self.trace.record("call_end_check_end", call_ended["call_ended"])
 
         if call_ended["call_ended"]:
             logger.info("Call ended")
-            if self.call_record:
-                call_record_service.stop_recording(self.call_record['call_uuid'])
+            if self.call_uuid:
+                # This runs on the callback thread's loop; recording work belongs to the main loop
+                self.loop.call_soon_threadsafe(call_record_service.stop_recording, self.call_uuid)
+                self.call_record = await self._on_main_loop(call_record_service.get_recording(self.call_uuid))
+            local_recording = await self._finalize_recording()
             
+            self.trace.record("evaluation_start")
             await evaluation_service.evaluate_interview(
                 self.messages, 
                 self.criteria, 
                 self.evaluation_language, 
                 self.interview.job_id, 
                 self.from_number, 
-                self.call_record['url'] if self.call_record else None
+                self.call_record['url'] if self.call_record else None,
+                local_recording,
+                interview_id=self.interview.interview_id
             )
+            self.trace.record("evaluation_end")
             
-            await interview_service.update_interview(
-                self.interview.interview_id, 
-                InterviewUpdate(
-                    is_completed=True, 
-                    call_recording_url=self.call_record['url'] if self.call_record else None
-                )
-            )
-            
-            logger.info("Clearing messages...")
-            self.messages.clear()
+            await self._complete_interview(self.call_record['url'] if self.call_record else None)
+
+            # The transcript is kept: turn indexes are the journal's seq, and late turns must not reuse them
             self.conversation.end_session()
             try:
                 if self.plivo_ws.client_state == starlette.websockets.WebSocketState.CONNECTED:
-                    await self.plivo_ws.close(code=1000)  # Normal closure
+                    await self._on_main_loop(self.plivo_ws.close(code=1000))  # Normal closure
             except Exception as e:
                 logger.error(f"Error during graceful shutdown: {e}")
 
+    async def _find_interview(self, from_number: str, interview_id: Optional[int]):
+        """The interview a dialer call was placed for, or else the caller's pending interview"""
+        phone_number = f"+{from_number}"
+        if interview_id is None:
+            return await interview_service.get_interview_by_phone(phone_number)
+        # Stays on the primary, like the phone lookup: the dialer picked it moments ago
+        interview = await interview_service.get_interview(interview_id, read_only=False)
+        if interview and interview.phone_number == phone_number and not interview.is_completed:
+            return interview
+        logger.error(f"Dialed interview {interview_id} is not pending for {phone_number}")
+        return None
+
+    async def _finalize_recording(self):
+        """Close the local recording; returns its segment paths, or None if there is none or it failed"""
+        if not self.recorder:
+            return None
+        try:
+            return await self.recorder.finalize()
+        except Exception as e:
+            logger.error(f"Error finalizing local recording: {e}")
+            return None
+
+    async def _complete_interview(self, recording_url):
+        """Mark the interview completed, conditional on the version the call was set up with"""
+        update = InterviewUpdate(is_completed=True, call_recording_url=recording_url, version=self.interview.version)
+        try:
+            await interview_service.update_interview(self.interview.interview_id, update)
+        except VersionConflictError as e:
+            # Edited during the call. Completion only touches its own fields, so it is re-applied
+            # on top of the edit, unless another call already completed the interview.
+            current = await interview_service.get_interview(self.interview.interview_id, read_only=False)
+            if not current or current.is_completed:
+                logger.warning(f"Interview completed by another writer, keeping its result: {e}")
+                return
+            logger.warning(f"{e}; completing at version {current.version}")
+            update.version = current.version
+            await interview_service.update_interview(self.interview.interview_id, update)
+
+    def terminate(self, reason: str):
+        """Force the call through cleanup; used by the supervisor for dead or overlong calls"""
+        logger.warning(f"Terminating call: {reason}")
+        self.trace.record("terminated", reason)
+        self.terminated = reason
+        self._receiver.cancel()
+
+    def _publish_turn(self, index: int):
+        turn = self.messages.turns[index]
+        if self.journal:
+            self.journal.append(index, turn)
+        live_hub.publish(self.call_uuid, index, turn)
+
+    async def _on_main_loop(self, coro):
+        """Await a coroutine on the call's main event loop from any thread"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
     def transcript_callback(self, text):
         """Wrapper to handle async transcript callback"""
         if not hasattr(self, 'loop') or not self.loop:
             logger.error("Event loop not initialized")
             return
+        bind_log_context(**self.log_fields)
             
         async def _handle_transcript_wrapper():
             try:
                 await self.handle_agent_response(text)
             except Exception as e:
-                logger.error(f"Error handling transcript: {e}")
-                traceback.print_exc()
+                logger.exception(f"Error handling transcript: {e}")
 
         # Create a new event loop for this thread if needed
         try:
@@ -156,7 +235,9 @@ class PlivoService:
     #     """Wrapper to handle async agent response callback"""
     #     asyncio.create_task(self.handle_agent_response(text))
 
-    async def plivo_receiver(self, plivo_ws, from_number: str, call_uuid: str = None):
+    async def plivo_receiver(
+        self, plivo_ws, from_number: str, call_uuid: str = None, ring_at: float = None, interview_id: Optional[int] = None
+    ):
         logger.info('Plivo receiver started')
         
         # Store instance variables for use in handle_transcript
@@ -164,35 +245,68 @@ class PlivoService:
         self.plivo_ws.streamId = None
         self.from_number = from_number
         self.evaluated = False
+        self.call_uuid = call_uuid
         self.call_record = None
+        self.recorder = None
+        self.journal = None
+        self.log_fields = {"call_uuid": call_uuid}
+        bind_log_context(**self.log_fields)
+        self.trace = CallTrace(call_uuid)
+        self.trace.record("websocket_accept")
+        # Imports the ElevenLabs SDK, so it is loaded on first use (or by the startup warm-up)
+        from app.services.audio.plivo_audio import PlivoAudioInterface
         self.audio_interface = PlivoAudioInterface(self.plivo_ws)
+        self.audio_interface.ring_at = ring_at
+        self.audio_interface.trace = self.trace
+        self.started_at = self.last_inbound_at = time.monotonic()
+        self._receiver = asyncio.current_task()
+        call_supervisor.register(self)
         
         try:
-            self.interview = await interview_service.get_interview_by_phone(f"+{from_number}")
+            self.interview = await self._find_interview(from_number, interview_id)
+            self.trace.record("interview_lookup_done", self.interview.interview_id if self.interview else None)
             if not self.interview:
                 logger.error(f"No interview found for phone number: +{from_number}")
                 await self.text_to_speech_file(f"No interview found for your phone number", True)
                 return
             
             # Initialize interview context
+            self.trace.interview_id = self.interview.interview_id
+            self.log_fields["interview_id"] = self.interview.interview_id
+            bind_log_context(**self.log_fields)
+            if call_uuid:
+                live_hub.open(call_uuid, self.messages)
+                self.journal = TranscriptJournal(self.interview.interview_id, call_uuid)
+                self.journal.start()
             self.questions = self.interview.questions
             questions_str = "\n".join(question for question in self.questions)
             self.interview_language = self.interview.interview_language
             self.evaluation_language = self.interview.evaluation_language
             self.criteria = self.interview.evaluation_criteria
 
+            # Start recording in the background so the REST round trip overlaps session setup
+            if call_uuid:
+                call_record_service.start_recording(call_uuid)
+                if settings.LOCAL_RECORDING_ENABLED:
+                    try:
+                        self.recorder = LocalCallRecorder(call_uuid)
+                        self.audio_interface.recorder = self.recorder
+                    except ValueError as e:
+                        logger.error(f"Local recording disabled for this call: {str(e)}")
+
             dynamic_vars = {
                 "list_of_questions": questions_str,
                 "language": self.interview_language
             }
+            from elevenlabs import ConversationConfig
             config = ConversationConfig(
                 dynamic_variables=dynamic_vars,
                 extra_body={},
                 conversation_config_override={}
             )
 
-            self.conversation = Conversation(
-                client=elevenlabs_client,
+            self.conversation = get_conversation_class()(
+                client=get_elevenlabs_client(),
                 agent_id="9ZwQQQTZOdL9cBSHURn0",
                 config=config,
                 requires_auth=True,
@@ -201,22 +315,13 @@ class PlivoService:
                 callback_user_transcript=lambda text: self.handle_transcript(text),
             )
             self.conversation.start_session()
+            self.trace.record("start_session")
             logger.info("Conversation started")
 
-            if call_uuid:
-                try:
-                    self.call_record = call_record_service.record_call(call_uuid)
-                    if not self.call_record:
-                        logger.error(f"Failed to start call recording for UUID: {call_uuid}")
-                    else:
-                        logger.info(f"Call recording started for UUID: {call_uuid}")
-                except Exception as e:
-                    logger.error(f"Error starting call recording: {e}")
-                    self.call_record = None
-
             while True:
                 try:
                     data = await self.plivo_ws.receive_json()
+                    self.last_inbound_at = time.monotonic()
                     if data['event'] == 'start':
                         self.plivo_ws.streamId = data["start"]["streamId"]
                     elif data['event'] == 'stop':
@@ -233,22 +338,41 @@ class PlivoService:
                     logger.info(f"WebSocket connection ended: {str(e)}")
                     break
                 except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    traceback.print_exc()
+                    if self.plivo_ws.application_state == starlette.websockets.WebSocketState.DISCONNECTED:
+                        # We closed the socket ourselves at the end of the interview
+                        logger.info("WebSocket closed by server")
+                    else:
+                        logger.exception(f"Error processing message: {e}")
                     break
 
+        except asyncio.CancelledError:
+            if not self.terminated:
+                raise
+            # Cancelled by terminate(); carry on with cleanup instead of aborting it
+            asyncio.current_task().uncancel()
         except Exception as e:
-            logger.error(f"Error in plivo receiver: {e}")
-            traceback.print_exc()
+            logger.exception(f"Error in plivo receiver: {e}")
         finally:
             # Cleanup
-            if self.call_record:
-                call_record_service.stop_recording(self.call_record['call_uuid'])
+            call_supervisor.unregister(self)
+            if call_uuid:
+                live_hub.close(call_uuid)
+                call_record_service.stop_recording(call_uuid)
+            await self._finalize_recording()
+            if self.journal:
+                await self.journal.close()
             
-            self.conversation.end_session()
+            if self.conversation:
+                self.conversation.end_session()
             
-            if plivo_ws.client_state != starlette.websockets.WebSocketState.DISCONNECTED:
+            if (
+                plivo_ws.client_state != starlette.websockets.WebSocketState.DISCONNECTED
+                and plivo_ws.application_state != starlette.websockets.WebSocketState.DISCONNECTED
+            ):
                 try:
                     await plivo_ws.close()
                 except Exception as e:
                     logger.error(f"Error closing WebSocket: {e}")
+
+            self.trace.record("close")
+            await trace_service.save(self.trace)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import active_calls, calls_rejected_total
+from app.services.Plivo import synthesize_ulaw
+from app.services.audio.recorder import SAMPLE_RATE, wav_header
+
+class AdmissionController:
+    """Caps the number of concurrent calls handled by this worker.
+
+    A call takes a slot when its inbound webhook is answered, so the stream that
+    follows is never turned away, and keeps it until the stream ends. Reservations
+    whose stream never connects expire after CALL_RESERVATION_TTL_SECONDS. While the
+    worker drains, only streams of calls that already hold a reservation are admitted.
+    Everything runs on the event loop, so no locking is needed.
+    """
+    def __init__(self):
+        self.capacity = settings.MAX_CONCURRENT_CALLS
+        self.active = 0
+        self.rejected = 0
+        self.draining = False
+        self._reservations: Dict[str, float] = {}
+        self._prompt: Optional[bytes] = None
+        self._prompt_wav: Optional[bytes] = None
+
+    def _expire_reservations(self):
+        now = time.monotonic()
+        # Entries are in insertion order, so expired ones are at the front
+        while self._reservations:
+            oldest_uuid = next(iter(self._reservations))
+            if now - self._reservations[oldest_uuid] < settings.CALL_RESERVATION_TTL_SECONDS:
+                break
+            del self._reservations[oldest_uuid]
+
+    def reserved_count(self) -> int:
+        """Ringing calls still holding a slot for their stream"""
+        self._expire_reservations()
+        return len(self._reservations)
+
+    def _in_use(self) -> int:
+        return self.active + self.reserved_count()
+
+    def reserve(self, call_uuid: str) -> bool:
+        """Hold a slot for a ringing call; False when the worker is full"""
+        if call_uuid in self._reservations:
+            return True
+        if self.draining:
+            self.reject("draining")
+            return False
+        if self._in_use() >= self.capacity:
+            self.reject("inbound")
+            return False
+        self._reservations[call_uuid] = time.monotonic()
+        return True
+
+    def admit(self, call_uuid: Optional[str]) -> bool:
+        """Start a call's stream, using its reservation if it has one; False when the worker is full"""
+        if call_uuid is None or self._reservations.pop(call_uuid, None) is None:
+            if self.draining:
+                self.reject("draining")
+                return False
+            if self._in_use() >= self.capacity:
+                self.reject("stream")
+                return False
+        self.active += 1
+        active_calls.inc()
+        return True
+
+    def release(self):
+        self.active -= 1
+        active_calls.dec()
+
+    def free_slots(self) -> int:
+        """Calls this worker can still take; none while it drains"""
+        if self.draining:
+            return 0
+        return max(0, self.capacity - self._in_use())
+
+    def reject(self, stage: str):
+        self.rejected += 1
+        calls_rejected_total.labels(stage).inc()
+        logger.warning(f"Rejecting call at {stage}: {self.active} active, capacity {self.capacity}")
+
+    async def warm_up(self):
+        """Render the overload prompt once, so rejecting a call costs no TTS request"""
+        try:
+            prompt = await asyncio.to_thread(synthesize_ulaw, settings.OVERLOAD_PROMPT_TEXT)
+            self._prompt_wav = wav_header(len(prompt)) + prompt
+            self._prompt = prompt
+        except Exception as e:
+            logger.error(f"Error rendering overload prompt: {e}")
+
+    @property
+    def prompt(self) -> Optional[bytes]:
+        """The cached overload prompt as raw 8 kHz mu-law, or None if it could not be rendered"""
+        return self._prompt
+
+    @property
+    def prompt_seconds(self) -> float:
+        return len(self._prompt) / SAMPLE_RATE if self._prompt else 0.0
+
+    @property
+    def prompt_wav(self) -> Optional[bytes]:
+        """The cached overload prompt as a mu-law WAV file, for Plivo <Play>"""
+        return self._prompt_wav
+
+    def get_status(self) -> Dict:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "reserved": self.reserved_count(),
+            "rejected": self.rejected,
+            "draining": self.draining,
+            "prompt_ready": self._prompt is not None
+        }
+
+admission_controller = AdmissionController()
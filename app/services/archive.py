@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.mysql import mysql_service
+
+class ArchiveService:
+    def __init__(self):
+        self.after_days = settings.ARCHIVE_AFTER_DAYS
+        self.batch_size = settings.ARCHIVE_BATCH_SIZE
+        self.batch_pause = settings.ARCHIVE_BATCH_PAUSE_SECONDS
+        self.interval = settings.ARCHIVE_INTERVAL_SECONDS
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {
+            "rows_moved_total": 0,
+            "rows_moved_last_run": 0,
+            "last_run_at": None,
+            "lag_seconds": None,
+            "last_error": None,
+        }
+
+    def _cutoff(self) -> datetime:
+        # created_at is stored as naive UTC
+        return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=self.after_days)
+
+    async def run_once(self) -> int:
+        """Archive every eligible interview in batches, pausing between batches"""
+        cutoff = self._cutoff()
+        moved = 0
+        while True:
+            batch = await mysql_service.archive_completed_interviews(cutoff, self.batch_size)
+            moved += batch
+            if batch < self.batch_size:
+                break
+            # Throttle so the archive job never monopolises the primary
+            await asyncio.sleep(self.batch_pause)
+
+        # Lag: how far past the cutoff the oldest unarchived completed row is
+        oldest = await mysql_service.get_oldest_archivable(cutoff)
+        self.stats["lag_seconds"] = (cutoff - oldest).total_seconds() if oldest else 0.0
+        self.stats["rows_moved_last_run"] = moved
+        self.stats["rows_moved_total"] += moved
+        self.stats["last_run_at"] = datetime.now(timezone.utc).isoformat()
+        self.stats["last_error"] = None
+        logger.info(f"Archived {moved} completed interviews (lag={self.stats['lag_seconds']}s)")
+        return moved
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                logger.error(f"Error archiving interviews: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": settings.ARCHIVE_ENABLED,
+            "running": self.task is not None and not self.task.done(),
+            "after_days": self.after_days,
+            "batch_size": self.batch_size,
+            **self.stats
+        }
+
+archive_service = ArchiveService()
@@ -1,19 +1,43 @@
 import asyncio
 import base64
 import json
+import time
+import weakref
 from fastapi import WebSocket
 from elevenlabs.conversational_ai.conversation import AudioInterface
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 import logging
 
-logger = logging.getLogger(__name__)
+from app.core.logger import logger, RateLimitedLog
+from app.core.metrics import (
+    agent_turn_latency_seconds,
+    outbound_audio_queue_depth,
+    ring_to_first_audio_seconds
+)
+
+# Message handling runs per audio frame, so a persistent failure must not flood the log
+frame_log = RateLimitedLog(logger)
 
 class PlivoAudioInterface(AudioInterface):
+    # Live interfaces, used to compute outbound queue depth at scrape time
+    _live = weakref.WeakSet()
+
     def __init__(self, websocket: WebSocket):
         self.websocket = websocket
         self.input_callback = None
         self.streamId = None
         self.loop = asyncio.get_event_loop()
+        # Monotonic timestamps of the pending latency measurements, cleared once observed
+        self.ring_at = None
+        self.turn_started_at = None
+        self.first_audio_pending = True
+        self.first_media_received = False
+        self.trace = None
+        self.recorder = None
+        # Written only by the ElevenLabs thread and the event loop respectively, so no lock is needed
+        self.audio_enqueued = 0
+        self.audio_sent = 0
+        PlivoAudioInterface._live.add(self)
 
     def start(self, input_callback):
         self.input_callback = input_callback
@@ -26,27 +50,54 @@ class PlivoAudioInterface(AudioInterface):
         """
         This method should return quickly and not block the calling thread.
         """
+        self.audio_enqueued += 1
         asyncio.run_coroutine_threadsafe(self.send_audio_to_plivo(audio), self.loop)
 
+    def mark_turn_start(self):
+        """Start timing the agent's reply to a user transcript"""
+        self.turn_started_at = time.monotonic()
+        self.first_audio_pending = True
+
     def interrupt(self):
+        if self.trace:
+            self.trace.record("interrupt")
         asyncio.run_coroutine_threadsafe(self.send_clear_message_to_plivo(), self.loop)
 
     async def send_audio_to_plivo(self, audio: bytes):
-        if self.streamId:
-            try:
-                if self.websocket.application_state == WebSocketState.CONNECTED:
-                    audio_payload = base64.b64encode(audio).decode("utf-8")
-                    audio_message = {
-                        "event": "playAudio",
-                        "media": {
-                            "contentType": "audio/x-mulaw",
-                            "sampleRate": 8000,
-                            "payload": audio_payload
+        try:
+            if self.streamId:
+                try:
+                    if self.websocket.application_state == WebSocketState.CONNECTED:
+                        audio_payload = base64.b64encode(audio).decode("utf-8")
+                        audio_message = {
+                            "event": "playAudio",
+                            "media": {
+                                "contentType": "audio/x-mulaw",
+                                "sampleRate": 8000,
+                                "payload": audio_payload
+                            }
                         }
-                    }
-                    await self.websocket.send_text(json.dumps(audio_message))
-            except (WebSocketDisconnect, RuntimeError):
-                pass
+                        await self.websocket.send_text(json.dumps(audio_message))
+                        if self.recorder:
+                            self.recorder.outbound.write(audio)
+                        if self.first_audio_pending:
+                            self._observe_first_audio()
+                except (WebSocketDisconnect, RuntimeError):
+                    pass
+        finally:
+            self.audio_sent += 1
+
+    def _observe_first_audio(self):
+        self.first_audio_pending = False
+        if self.trace:
+            self.trace.record("first_outbound_audio")
+        now = time.monotonic()
+        if self.ring_at is not None:
+            ring_to_first_audio_seconds.observe(now - self.ring_at)
+            self.ring_at = None
+        if self.turn_started_at is not None:
+            agent_turn_latency_seconds.observe(now - self.turn_started_at)
+            self.turn_started_at = None
 
     async def send_clear_message_to_plivo(self):
         if self.streamId:
@@ -67,9 +118,19 @@ class PlivoAudioInterface(AudioInterface):
                 self.streamId = data["start"]["streamId"]
             elif event_type == "media":
                 audio_data = base64.b64decode(data["media"]["payload"])
+                if not self.first_media_received:
+                    self.first_media_received = True
+                    if self.trace:
+                        self.trace.record("first_inbound_media")
+                if self.recorder:
+                    self.recorder.inbound.write(audio_data)
 
                 if self.input_callback:
                     self.input_callback(audio_data)
         except Exception as e:
-            logger.error(f"Error handling Plivo message: {e}")
+            frame_log.log(logging.ERROR, "handle_plivo_message", f"Error handling Plivo message: {e}")
             raise
+
+outbound_audio_queue_depth.set_function(
+    lambda: sum(interface.audio_enqueued - interface.audio_sent for interface in list(PlivoAudioInterface._live))
+)
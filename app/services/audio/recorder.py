@@ -0,0 +1,229 @@
+import asyncio
+import concurrent.futures
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+
+SAMPLE_RATE = 8000  # 8 kHz mu-law, one byte per sample
+WAVE_FORMAT_MULAW = 7
+HEADER_BYTES = 58
+# call_uuid arrives in the stream URL's query string, so it must not be able to name another directory
+CALL_UUID_PATTERN = re.compile(r"[A-Za-z0-9-]+")
+
+def recording_directory(call_uuid: str) -> str:
+    """Directory for a call's segments; raises ValueError unless it is a plain child of LOCAL_RECORDING_DIR"""
+    if not call_uuid or not CALL_UUID_PATTERN.fullmatch(call_uuid):
+        raise ValueError(f"Refusing to record call with invalid call_uuid: {call_uuid!r}")
+    root = os.path.realpath(settings.LOCAL_RECORDING_DIR)
+    directory = os.path.realpath(os.path.join(root, call_uuid))
+    if os.path.dirname(directory) != root:
+        raise ValueError(f"Recording directory for {call_uuid!r} escapes {root}")
+    return directory
+
+def wav_header(data_bytes: int) -> bytes:
+    """Header for a mono 8 kHz mu-law WAV file (fmt chunk with cbSize, plus fact chunk)"""
+    return b"".join([
+        b"RIFF", struct.pack("<I", HEADER_BYTES - 8 + data_bytes), b"WAVE",
+        b"fmt ", struct.pack("<IHHIIHHH", 18, WAVE_FORMAT_MULAW, 1, SAMPLE_RATE, SAMPLE_RATE, 1, 8, 0),
+        b"fact", struct.pack("<II", 4, data_bytes),
+        b"data", struct.pack("<I", data_bytes),
+    ])
+
+class AudioRing:
+    """Preallocated single-producer/single-consumer byte ring.
+
+    The event loop writes frames in and the writer thread drains them. Only the
+    producer advances `written` and only the consumer advances `read`, so no lock is
+    needed. If the writer falls a full ring behind, the oldest audio is overwritten
+    and counted in `overruns`.
+    """
+    __slots__ = ("size", "buffer", "view", "written", "read", "overruns")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.written = 0
+        self.read = 0
+        self.overruns = 0
+
+    def write(self, data: bytes):
+        n = len(data)
+        start = self.written % self.size
+        if n <= self.size - start:
+            # The common case: the frame fits before the end of the ring
+            self.view[start:start + n] = data
+        else:
+            # Slicing a memoryview doesn't copy, so each byte is still copied once, into the ring
+            data = memoryview(data)
+            if n > self.size:
+                data = data[-self.size:]
+                n = self.size
+            first = self.size - start
+            self.view[start:] = data[:first]
+            self.view[0:n - first] = data[first:]
+        self.written += n
+
+    def drain_into(self, sink) -> int:
+        """Copy everything not yet drained into sink(memoryview); returns bytes drained"""
+        written = self.written
+        pending = written - self.read
+        if pending <= 0:
+            return 0
+        if pending > self.size:
+            self.overruns += pending - self.size
+            self.read = written - self.size
+            pending = self.size
+        start = self.read % self.size
+        first = min(pending, self.size - start)
+        sink(self.view[start:start + first])
+        if first < pending:
+            sink(self.view[0:pending - first])
+        self.read = written
+        return pending
+
+class SegmentWriter:
+    """Writes one direction of a call into memory-mapped WAV segment files"""
+    def __init__(self, directory: str, name: str, segment_bytes: int):
+        self.directory = directory
+        self.name = name
+        self.segment_bytes = segment_bytes
+        self.paths: List[str] = []
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._offset = 0
+
+    def _open_segment(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self.name}-{len(self.paths):03d}.wav")
+        self._file = open(path, "w+b")
+        # Preallocate the whole segment so the mapping never has to grow
+        self._file.truncate(HEADER_BYTES + self.segment_bytes)
+        self._map = mmap.mmap(self._file.fileno(), HEADER_BYTES + self.segment_bytes)
+        self._offset = 0
+        self.paths.append(path)
+
+    def _close_segment(self):
+        if not self._map:
+            return
+        self._map[0:HEADER_BYTES] = wav_header(self._offset)
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(HEADER_BYTES + self._offset)
+        self._file.close()
+        self._map = None
+        self._file = None
+
+    def write(self, chunk: memoryview):
+        while len(chunk):
+            if self._map is None or self._offset == self.segment_bytes:
+                self._close_segment()
+                self._open_segment()
+            n = min(len(chunk), self.segment_bytes - self._offset)
+            start = HEADER_BYTES + self._offset
+            self._map[start:start + n] = chunk[:n]
+            self._offset += n
+            chunk = chunk[n:]
+
+    def close(self):
+        self._close_segment()
+
+class LocalCallRecorder:
+    """Records both directions of a call into per-direction WAV segments.
+
+    The audio path only copies frames into preallocated rings; all file I/O happens
+    on the shared writer thread.
+    """
+    def __init__(self, call_uuid: str):
+        self.call_uuid = call_uuid
+        self.directory = recording_directory(call_uuid)
+        ring_bytes = settings.LOCAL_RECORDING_RING_SECONDS * SAMPLE_RATE
+        segment_bytes = settings.LOCAL_RECORDING_SEGMENT_SECONDS * SAMPLE_RATE
+        self.inbound = AudioRing(ring_bytes)
+        self.outbound = AudioRing(ring_bytes)
+        self._writers = {
+            "caller": SegmentWriter(self.directory, "caller", segment_bytes),
+            "agent": SegmentWriter(self.directory, "agent", segment_bytes),
+        }
+        self._finalized: Optional[concurrent.futures.Future] = None
+        self._error: Optional[Exception] = None
+        recording_writer.register(self)
+
+    def _drain(self):
+        self.inbound.drain_into(self._writers["caller"].write)
+        self.outbound.drain_into(self._writers["agent"].write)
+
+    def _finalize(self) -> Dict:
+        self._drain()
+        for writer in self._writers.values():
+            writer.close()
+        overruns = self.inbound.overruns + self.outbound.overruns
+        if overruns:
+            logger.warning(f"Local recording for {self.call_uuid} dropped {overruns} bytes")
+        return {direction: writer.paths for direction, writer in self._writers.items()}
+
+    async def finalize(self) -> Dict:
+        """Flush and close the segment files; returns their paths by direction. Idempotent"""
+        return await asyncio.wrap_future(recording_writer.finalize(self))
+
+class RecordingWriter:
+    """Background thread that drains every active recorder's rings to disk"""
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self._recorders: Dict[int, LocalCallRecorder] = {}
+        self._finalizing: Dict[int, LocalCallRecorder] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, recorder: LocalCallRecorder):
+        with self._lock:
+            self._recorders[id(recorder)] = recorder
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+                self._thread.start()
+
+    def finalize(self, recorder: LocalCallRecorder) -> concurrent.futures.Future:
+        # Call end and websocket teardown may both finalize, from different threads
+        with self._lock:
+            if recorder._finalized is None:
+                recorder._finalized = concurrent.futures.Future()
+                self._finalizing[id(recorder)] = recorder
+            return recorder._finalized
+
+    def _run(self):
+        event = threading.Event()
+        while True:
+            event.wait(self.interval)
+            with self._lock:
+                recorders = list(self._recorders.items())
+                finalizing = dict(self._finalizing)
+                self._finalizing.clear()
+            for key, recorder in recorders:
+                try:
+                    if key in finalizing:
+                        with self._lock:
+                            self._recorders.pop(key, None)
+                        recorder._finalized.set_result(recorder._finalize())
+                    else:
+                        recorder._drain()
+                except Exception as e:
+                    logger.error(f"Error writing local recording for {recorder.call_uuid}: {e}")
+                    recorder._error = e
+                    with self._lock:
+                        self._recorders.pop(key, None)
+            # A recorder dropped after a write error is never drained again, so answer its finalize here
+            for recorder in finalizing.values():
+                if recorder._finalized.done():
+                    continue
+                if recorder._error:
+                    recorder._finalized.set_exception(recorder._error)
+                else:
+                    recorder._finalized.set_result(None)
+
+recording_writer = RecordingWriter()
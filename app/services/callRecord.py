@@ -1,25 +1,156 @@
-import plivo
+import asyncio
+import time
+from typing import Dict, Optional
+
+import aiohttp
 
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import plivo_recording_seconds
+from app.services.providers import require_setting
+
+PLIVO_API_URL = "https://api.plivo.com/v1/Account"
+
+class TransientRecordingError(Exception):
+    """A recording request failed in a way that is worth retrying"""
+
+class PlivoRecordingApi:
+    """Plivo call recording REST endpoints over a pooled aiohttp session"""
+    def __init__(self, auth_id: str, auth_token: str):
+        self.auth_id = auth_id
+        self.auth = aiohttp.BasicAuth(auth_id, auth_token)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop; reused to keep connections warm
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=self.auth,
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=60)
+            )
+        return self._session
+
+    async def _request(self, method: str, call_uuid: str, payload: Optional[Dict] = None) -> Dict:
+        url = f"{PLIVO_API_URL}/{self.auth_id}/Call/{call_uuid}/Record/"
+        try:
+            async with self._get_session().request(method, url, json=payload) as response:
+                if response.status >= 500 or response.status == 429:
+                    raise TransientRecordingError(f"Plivo returned {response.status}")
+                if response.status >= 400:
+                    raise Exception(f"Plivo recording request failed with status {response.status}: {await response.text()}")
+                if response.status == 204:
+                    return {}
+                return await response.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            raise TransientRecordingError(str(e)) from e
+
+    async def record(self, call_uuid: str, time_limit: int) -> Dict:
+        return await self._request("POST", call_uuid, {"time_limit": time_limit})
+
+    async def record_stop(self, call_uuid: str) -> Dict:
+        return await self._request("DELETE", call_uuid)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
 
 class CallRecordService:
+    """Starts and stops Plivo call recordings without blocking the event loop.
+
+    Recording starts in a background task so it overlaps conversation setup. Stop
+    is idempotent per call, and failed requests are retried with backoff off the
+    call's critical path.
+    """
     def __init__(self):
-        self.client = plivo.RestClient(
-            settings.auth_id,
-            settings.auth_token
-        )
-
-    def record_call(self, call_uuid: str):
-        data = self.client.calls.record(
-            call_uuid=call_uuid,
-            time_limit=600
-        )
+        self._api = None
+        self.max_attempts = 3
+        self.retry_backoff = 0.5  # seconds, doubled per attempt
+        self._starts: Dict[str, asyncio.Task] = {}
+        self._stops: Dict[str, asyncio.Task] = {}
+
+    @property
+    def api(self):
+        if self._api is None:
+            if settings.PROVIDER_MODE == "fake":
+                from app.services.fakes import FakeRecordingApi
+                self._api = FakeRecordingApi()
+            else:
+                self._api = PlivoRecordingApi(require_setting("auth_id"), require_setting("auth_token"))
+        return self._api
+
+    async def _with_retries(self, operation: str, request):
+        delay = self.retry_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                return await request()
+            except TransientRecordingError as e:
+                if attempt == self.max_attempts:
+                    raise
+                logger.warning(f"Recording {operation} failed (attempt {attempt}), retrying: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+            finally:
+                plivo_recording_seconds.labels(operation).observe(time.perf_counter() - started)
+
+    async def record_call(self, call_uuid: str):
+        data = await self._with_retries("record", lambda: self.api.record(call_uuid, time_limit=600))
         return {'call_uuid': call_uuid, 'url': data['url']}
-    
-    def stop_recording(self, call_uuid: str):
-        self.client.calls.record_stop(
-            call_uuid=call_uuid
-        )
-        return True
-
-call_record_service = CallRecordService()
\ No newline at end of file
+
+    async def _start(self, call_uuid: str):
+        try:
+            record = await self.record_call(call_uuid)
+            logger.info(f"Call recording started for UUID: {call_uuid}")
+            return record
+        except Exception as e:
+            logger.error(f"Error starting call recording: {e}")
+            return None
+
+    def start_recording(self, call_uuid: str) -> asyncio.Task:
+        """Start recording in the background; await the returned task for the recording info"""
+        task = self._starts.get(call_uuid)
+        if task is None:
+            task = asyncio.create_task(self._start(call_uuid))
+            self._starts[call_uuid] = task
+        return task
+
+    async def get_recording(self, call_uuid: str) -> Optional[Dict]:
+        """Recording info for a call once its start request has finished, or None"""
+        task = self._starts.get(call_uuid)
+        return await asyncio.shield(task) if task else None
+
+    async def _stop(self, call_uuid: str):
+        try:
+            # A stop must never overtake the start it is stopping
+            if not await self.get_recording(call_uuid):
+                return False
+            await self._with_retries("record_stop", lambda: self.api.record_stop(call_uuid))
+            return True
+        except Exception as e:
+            logger.error(f"Error stopping call recording: {e}")
+            return False
+        finally:
+            self._starts.pop(call_uuid, None)
+
+    def stop_recording(self, call_uuid: str) -> asyncio.Task:
+        """Stop recording in the background. Repeated calls return the same task"""
+        task = self._stops.get(call_uuid)
+        if task is None:
+            task = asyncio.create_task(self._stop(call_uuid))
+            self._stops[call_uuid] = task
+            task.add_done_callback(lambda _: self._stops.pop(call_uuid, None))
+        return task
+
+    async def wait_pending(self):
+        """Wait for recording stops still in flight"""
+        pending = list(self._stops.values())
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def close(self):
+        await self.wait_pending()
+        if self._api is not None:
+            await self._api.close()
+
+call_record_service = CallRecordService()
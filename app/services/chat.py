@@ -1,33 +1,43 @@
-from langchain_core.messages import BaseMessage, SystemMessage
-from langchain_community.chat_message_histories import ChatMessageHistory
-from langchain_openai import ChatOpenAI
-from typing import List
+from typing import TYPE_CHECKING, List
+import time
 
-from app.core.config import settings, ModelType
 from app.core.function_templates.functions import functions
+from app.core.logger import logger
+from app.core.metrics import llm_latency_seconds
+from app.services.providers import get_chat_model
+from app.services.transcript import Transcript
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+    from langchain_community.chat_message_histories import ChatMessageHistory
 
 class ChatService:
-    def __init__(self):
-        self.model = ChatOpenAI(
-            model=ModelType.GPT4O,
-            openai_api_key=settings.openai_api_key
-        )
+    @property
+    def model(self):
+        # Built on first use; importing langchain_openai is slow
+        return get_chat_model()
 
-    async def chat(self, messages: ChatMessageHistory | List[BaseMessage]) -> str:
+    async def chat(self, messages: "Transcript | ChatMessageHistory | List[BaseMessage]") -> str:
         # If messages is ChatMessageHistory, get the messages list
-        if isinstance(messages, ChatMessageHistory):
+        if isinstance(messages, Transcript):
+            messages = messages.to_messages()
+        elif not isinstance(messages, list):
             messages = messages.messages
         
         response = self.model.invoke(messages)
-        print(f"LLM Response: {response.content}")
+        logger.info(f"LLM Response: {response.content}")
         return response.content
     
     def function_call(self, prompt, function_name):
+        from langchain_core.messages import SystemMessage
+
         model_ = self.model.bind_tools(functions, tool_choice=function_name)
         messages = [SystemMessage(prompt)]
+        started = time.perf_counter()
         function_call = model_.invoke(messages).tool_calls
+        llm_latency_seconds.labels(function_name).observe(time.perf_counter() - started)
         result = function_call[0]['args']
 
         return result
 
-chat_service = ChatService()
\ No newline at end of file
+chat_service = ChatService()
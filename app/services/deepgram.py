@@ -1,18 +1,14 @@
-from deepgram import DeepgramClient, DeepgramClientOptions, LiveTranscriptionEvents, LiveOptions
-import traceback
 
-from app.core.config import settings
 from app.core.logger import logger
+from app.services.providers import get_deepgram_client
 
-
-deepgram = DeepgramClient(settings.deepgram_api_key, DeepgramClientOptions(
-    options={"keepalive": "true"}
-))
-
-dg_connection = deepgram.listen.asyncwebsocket.v("1")
+# Opened by start_live_transcription; the client is built on first use
+dg_connection = None
 
 async def start_live_transcription(callback, options=None):
     """Start a live transcription connection"""
+    from deepgram import LiveTranscriptionEvents, LiveOptions
+
     try:
         global dg_connection
         if not options:
@@ -26,6 +22,7 @@ async def start_live_transcription(callback, options=None):
                 await dg_connection.finish()
         except Exception:
             pass
+        dg_connection = get_deepgram_client().listen.asyncwebsocket.v("1")
 
         
         async def on_message(self, result, **kwargs):
@@ -56,8 +53,7 @@ async def start_live_transcription(callback, options=None):
         return dg_connection
 
     except Exception as e:
-        logger.error(f"Error starting live transcription: {e}")
-        traceback.print_exc()
+        logger.exception(f"Error starting live transcription: {e}")
         raise
 
 async def send_audio(audio_data):
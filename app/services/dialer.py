@@ -0,0 +1,469 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Optional, Set
+from zoneinfo import ZoneInfo
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import dialer_calls_total, dialer_inflight_calls, plivo_call_seconds
+from app.services.admission import admission_controller
+from app.services.callRecord import PLIVO_API_URL
+from app.services.mysql import mysql_service
+from app.services.nodes import node_registry
+from app.services.providers import require_setting
+
+class PlivoCallApi:
+    """Plivo outbound call REST endpoint over a pooled aiohttp session"""
+    def __init__(self, auth_id: str, auth_token: str):
+        self.auth_id = auth_id
+        self.auth = aiohttp.BasicAuth(auth_id, auth_token)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                auth=self.auth,
+                timeout=aiohttp.ClientTimeout(total=10),
+                connector=aiohttp.TCPConnector(limit=50, keepalive_timeout=60)
+            )
+        return self._session
+
+    async def create_call(self, from_number: str, to_number: str, answer_url: str, hangup_url: str, ring_timeout: int) -> Dict:
+        payload = {
+            "from": from_number,
+            "to": to_number,
+            "answer_url": answer_url,
+            "answer_method": "GET",
+            "hangup_url": hangup_url,
+            "hangup_method": "POST",
+            "ring_timeout": ring_timeout
+        }
+        with plivo_call_seconds.time():
+            async with self._get_session().post(f"{PLIVO_API_URL}/{self.auth_id}/Call/", json=payload) as response:
+                if response.status >= 400:
+                    raise Exception(f"Plivo call request failed with status {response.status}: {await response.text()}")
+                return await response.json(content_type=None)
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+class TokenBucket:
+    """Allows rate events per second on average, in bursts of at most one second's worth"""
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = 1.0
+        self._updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class _Throughput:
+    """Outcome counters and a one-minute window of placed calls"""
+    def __init__(self):
+        self.placed = 0
+        self.answered = 0
+        self.incomplete = 0
+        self.unanswered = 0
+        self.failed = 0
+        self._recent: Deque[float] = deque()
+
+    def record_placed(self):
+        self.placed += 1
+        self._recent.append(time.monotonic())
+
+    def calls_last_minute(self) -> int:
+        cutoff = time.monotonic() - 60
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        return len(self._recent)
+
+    def to_dict(self) -> Dict:
+        picked_up = self.answered + self.incomplete
+        answered_or_not = picked_up + self.unanswered
+        return {
+            "placed": self.placed,
+            "answered": self.answered,
+            "incomplete": self.incomplete,
+            "unanswered": self.unanswered,
+            "failed": self.failed,
+            "answer_rate": round(picked_up / answered_or_not, 3) if answered_or_not else None,
+            "calls_last_minute": self.calls_last_minute()
+        }
+
+class _Campaign:
+    def __init__(self, config: Dict):
+        self.job_id = config["job_id"]
+        self.queue: Deque[Dict] = deque()
+        self.next_refill_at = 0.0
+        self.inflight = 0
+        self.stats = _Throughput()
+        self.bucket = TokenBucket(config["calls_per_second"])
+        self.update(config)
+
+    def update(self, config: Dict):
+        self.calls_per_second = config["calls_per_second"]
+        self.max_concurrent = config["max_concurrent"]
+        self.window_start = config["window_start"]
+        self.window_end = config["window_end"]
+        self.timezone = ZoneInfo(config["timezone"] or settings.DIALER_TIMEZONE)
+        self.active = bool(config["active"])
+        self.bucket.rate = self.calls_per_second
+
+    def in_window(self, now: datetime) -> bool:
+        if not self.window_start or not self.window_end:
+            return True
+        local = now.astimezone(self.timezone).strftime("%H:%M")
+        if self.window_start <= self.window_end:
+            return self.window_start <= local < self.window_end
+        # A window like 22:00-06:00 spans midnight
+        return local >= self.window_start or local < self.window_end
+
+class _Dial:
+    __slots__ = ("interview_id", "campaign", "attempt", "request_uuid", "answered", "placed_at")
+
+    def __init__(self, interview_id: int, campaign: _Campaign):
+        self.interview_id = interview_id
+        self.campaign = campaign
+        self.attempt = 0
+        self.request_uuid: Optional[str] = None
+        self.answered = False
+        self.placed_at = time.monotonic()
+
+class OutboundDialer:
+    """Calls candidates with pending interviews, one campaign per job.
+
+    Each tick places as many calls as the global and per-campaign calls-per-second
+    buckets, the global and per-campaign concurrency limits and the free call
+    capacity allow, taking campaigns in turn so a large job cannot starve the others.
+    Free capacity is that of this worker, or of the whole pool when the node registry
+    is enabled, minus DIALER_INBOUND_HEADROOM slots kept for candidates calling in and
+    minus calls still ringing. Answered calls run through the normal answer and stream
+    flow. Calls that end without the interview completed, answered or not, are retried
+    with exponential backoff up to DIALER_MAX_ATTEMPTS. Dialing state lives in DialAttempt, so only one dialer
+    ever calls an interview, and a restart picks up where it left off.
+
+    Every worker with DIALER_ENABLED competes for a lease in the database, and only
+    the holder dials, so the global budgets hold however many workers there are.
+    Plivo's answer and hangup callbacks can land on any worker. They are resolved
+    through DialAttempt.request_uuid, and the dialer picks up outcomes recorded by
+    other workers every DIALER_SYNC_SECONDS.
+    """
+    def __init__(self):
+        self.enabled = settings.DIALER_ENABLED
+        self._api = None
+        self.campaigns: Dict[str, _Campaign] = {}
+        self.inflight: Dict[int, _Dial] = {}
+        self.stats = _Throughput()
+        self.task: Optional[asyncio.Task] = None
+        self.leader = False
+        self._bucket = TokenBucket(settings.DIALER_CALLS_PER_SECOND)
+        self._requests: Dict[str, _Dial] = {}
+        # The loop only keeps weak references to tasks, so calls being placed are held here
+        self._dial_tasks: Set[asyncio.Task] = set()
+        self._next_refresh = 0.0
+        self._next_sync = 0.0
+
+    @property
+    def api(self):
+        if self._api is None:
+            if settings.PROVIDER_MODE == "fake":
+                from app.services.fakes import FakeCallApi
+                self._api = FakeCallApi()
+            else:
+                self._api = PlivoCallApi(require_setting("auth_id"), require_setting("auth_token"))
+        return self._api
+
+    def _callback_url(self, path: str) -> str:
+        return f"{settings.DIALER_CALLBACK_BASE_URL.rstrip('/')}{path}"
+
+    async def refresh_campaigns(self):
+        configs = {config["job_id"]: config for config in await mysql_service.get_dial_campaigns()}
+        for job_id in list(self.campaigns):
+            if job_id in configs:
+                continue
+            # A deleted campaign stops dialing at once but stays until its calls in flight hang up
+            if self.campaigns[job_id].inflight:
+                self.campaigns[job_id].active = False
+            else:
+                del self.campaigns[job_id]
+        for job_id, config in configs.items():
+            if job_id in self.campaigns:
+                self.campaigns[job_id].update(config)
+            else:
+                self.campaigns[job_id] = _Campaign(config)
+
+    def _free_slots(self) -> int:
+        if admission_controller.draining:
+            return 0
+        free = node_registry.free_capacity() if node_registry.enabled else admission_controller.free_slots()
+        ringing = sum(1 for dial in self.inflight.values() if not dial.answered)
+        return free - settings.DIALER_INBOUND_HEADROOM - ringing
+
+    async def _next_interview(self, campaign: _Campaign) -> Optional[Dict]:
+        if not campaign.queue and time.monotonic() >= campaign.next_refill_at:
+            rows = await mysql_service.get_dialable_interviews(campaign.job_id, settings.DIALER_BATCH_SIZE)
+            campaign.queue.extend(row for row in rows if row["interview_id"] not in self.inflight)
+            # A job with nothing due is not queried again on every tick
+            if not campaign.queue:
+                campaign.next_refill_at = time.monotonic() + settings.DIALER_REFRESH_SECONDS
+        while campaign.queue:
+            interview = campaign.queue.popleft()
+            if interview["interview_id"] not in self.inflight:
+                return interview
+        return None
+
+    async def tick(self):
+        """Place the calls the current budgets allow"""
+        self._bucket.refill()
+        room = min(settings.DIALER_MAX_CONCURRENT - len(self.inflight), self._free_slots())
+        now = datetime.now(timezone.utc)
+        turn = deque(campaign for campaign in self.campaigns.values() if campaign.active and campaign.in_window(now))
+        for campaign in turn:
+            campaign.bucket.refill()
+        while turn and room > 0 and self._bucket.tokens >= 1:
+            campaign = turn.popleft()
+            if campaign.inflight >= campaign.max_concurrent or campaign.bucket.tokens < 1:
+                continue
+            interview = await self._next_interview(campaign)
+            if interview is None:
+                continue
+            campaign.bucket.take()
+            self._bucket.take()
+            room -= 1
+            self._start_dial(campaign, interview)
+            turn.append(campaign)
+
+    def _start_dial(self, campaign: _Campaign, interview: Dict):
+        dial = _Dial(interview["interview_id"], campaign)
+        self.inflight[dial.interview_id] = dial
+        campaign.inflight += 1
+        dialer_inflight_calls.inc()
+        task = asyncio.create_task(self._dial(dial, interview["phone_number"]))
+        self._dial_tasks.add(task)
+        task.add_done_callback(self._dial_done)
+
+    def _dial_done(self, task: asyncio.Task):
+        self._dial_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Dial task failed: {task.exception()}")
+
+    def _forget(self, dial: _Dial):
+        if self.inflight.pop(dial.interview_id, None) is None:
+            return False
+        if dial.request_uuid:
+            self._requests.pop(dial.request_uuid, None)
+        dial.campaign.inflight -= 1
+        dialer_inflight_calls.dec()
+        return True
+
+    def _count(self, dial: _Dial, outcome: str):
+        for stats in (self.stats, dial.campaign.stats):
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+
+    async def _dial(self, dial: _Dial, phone_number: str):
+        try:
+            attempt = await mysql_service.claim_dial_attempt(dial.interview_id, dial.campaign.job_id)
+            if attempt is None:
+                # Completed, or already picked up by another dialer, since it was queued
+                self._forget(dial)
+                return
+            dial.attempt = attempt
+            response = await self.api.create_call(
+                settings.DIALER_FROM_NUMBER,
+                phone_number,
+                self._callback_url("/plivo/inbound_call"),
+                self._callback_url("/plivo/outbound_hangup"),
+                settings.DIALER_RING_TIMEOUT_SECONDS
+            )
+            dial.request_uuid = response["request_uuid"]
+            self._requests[dial.request_uuid] = dial
+            for stats in (self.stats, dial.campaign.stats):
+                stats.record_placed()
+            dialer_calls_total.labels("placed").inc()
+            await mysql_service.set_dial_request(dial.interview_id, dial.request_uuid)
+        except Exception as e:
+            logger.error(f"Error dialing interview {dial.interview_id}: {e}")
+            if dial.attempt:
+                await self._finish(dial, "failed")
+            else:
+                self._forget(dial)
+
+    async def on_answer(self, request_uuid: Optional[str]) -> Optional[int]:
+        """An outbound call was answered; from here on the call holds a regular call slot.
+
+        Returns the id of the interview the call was placed for, so the stream runs that one.
+        """
+        if not request_uuid:
+            return None
+        dial = self._requests.get(request_uuid)
+        if dial is not None:
+            dial.answered = True
+        interview_id = dial.interview_id if dial is not None else None
+        try:
+            attempt = await mysql_service.get_dial_by_request(request_uuid)
+            if attempt is not None:
+                interview_id = attempt["interview_id"]
+            await mysql_service.mark_dial_connected(request_uuid)
+        except Exception as e:
+            logger.error(f"Error recording answered dial {request_uuid}: {e}")
+        return interview_id
+
+    async def on_hangup(self, request_uuid: Optional[str], call_status: Optional[str], duration: Optional[str]):
+        """Record the outcome of an outbound call, whichever worker placed it"""
+        if not request_uuid:
+            return
+        try:
+            attempt = await mysql_service.get_dial_by_request(request_uuid)
+            if attempt is None:
+                return
+            outcome = "unanswered"
+            if call_status == "completed" and int(duration or 0) > 0:
+                # A candidate who hung up part way through is called again like one who didn't pick up
+                state = await mysql_service.get_interview_state(attempt["interview_id"])
+                outcome = "answered" if state and state["is_completed"] else "incomplete"
+            status, retry_after = self._next_status(outcome, attempt["attempts"])
+            # Conditional on the attempt still being in progress, so a repeated callback changes nothing
+            if not await mysql_service.finish_dial_attempt(attempt["interview_id"], status, retry_after, request_uuid):
+                return
+        except Exception as e:
+            logger.error(f"Error recording dial outcome for {request_uuid}: {e}")
+            return
+        dialer_calls_total.labels(outcome).inc()
+        dial = self._requests.get(request_uuid)
+        if dial is not None and self._forget(dial):
+            self._count(dial, outcome)
+
+    def _next_status(self, outcome: str, attempt: int):
+        """DialAttempt status for an outcome, and seconds until the retry if there is one"""
+        if outcome == "answered":
+            return "answered", None
+        if attempt >= settings.DIALER_MAX_ATTEMPTS:
+            return "exhausted", None
+        return "retry", settings.DIALER_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+
+    async def _finish(self, dial: _Dial, outcome: str):
+        if not self._forget(dial):
+            return
+        self._count(dial, outcome)
+        dialer_calls_total.labels(outcome).inc()
+        status, retry_after = self._next_status(outcome, dial.attempt)
+        try:
+            await mysql_service.finish_dial_attempt(dial.interview_id, status, retry_after)
+        except Exception as e:
+            logger.error(f"Error recording dial outcome for interview {dial.interview_id}: {e}")
+
+    async def _sync_inflight(self):
+        """Apply answers and outcomes that callbacks on other workers recorded"""
+        placed = {dial.interview_id: dial for dial in self.inflight.values() if dial.request_uuid}
+        if not placed:
+            return
+        states = await mysql_service.get_dial_states(list(placed))
+        for interview_id, dial in placed.items():
+            state = states.get(interview_id)
+            if state is not None and state["request_uuid"] == dial.request_uuid:
+                if state["status"] == "dialing":
+                    continue
+                if state["status"] == "connected":
+                    dial.answered = True
+                    continue
+            # Finished elsewhere, or the interview was deleted
+            if self._forget(dial) and state is not None:
+                self._count(dial, "answered" if state["status"] == "answered" else "unanswered")
+
+    async def _release_stale(self):
+        # A call can't outlive ringing plus the longest allowed call; past that its hangup was lost
+        max_age = settings.DIALER_RING_TIMEOUT_SECONDS + settings.MAX_CALL_DURATION_SECONDS + 60
+        now = time.monotonic()
+        for dial in list(self.inflight.values()):
+            if now - dial.placed_at > max_age:
+                await self._finish(dial, "unanswered")
+        await mysql_service.release_stale_dial_attempts(max_age, settings.DIALER_MAX_ATTEMPTS)
+
+    async def _run_forever(self):
+        while True:
+            try:
+                now = time.monotonic()
+                if now >= self._next_refresh:
+                    self._next_refresh = now + settings.DIALER_REFRESH_SECONDS
+                    self.leader = await mysql_service.acquire_dialer_lease(node_registry.node_id, settings.DIALER_LEASE_SECONDS)
+                    if self.leader:
+                        await self.refresh_campaigns()
+                        await self._release_stale()
+                if self.inflight and now >= self._next_sync:
+                    self._next_sync = now + settings.DIALER_SYNC_SECONDS
+                    await self._sync_inflight()
+                if self.leader:
+                    await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in outbound dialer: {str(e)}")
+                # Stop dialing until the lease is confirmed again
+                self.leader = False
+                self._next_refresh = time.monotonic() + settings.DIALER_REFRESH_SECONDS
+            await asyncio.sleep(settings.DIALER_TICK_MS / 1000)
+
+    def start(self):
+        if not settings.DIALER_FROM_NUMBER or not settings.DIALER_CALLBACK_BASE_URL:
+            logger.error("Outbound dialer needs DIALER_FROM_NUMBER and DIALER_CALLBACK_BASE_URL, not starting")
+            return
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self._dial_tasks:
+            # Let calls being placed record their request before the session closes under them
+            await asyncio.gather(*self._dial_tasks, return_exceptions=True)
+        if self.leader:
+            # Hand the lease over now instead of when it expires
+            self.leader = False
+            try:
+                await mysql_service.release_dialer_lease(node_registry.node_id)
+            except Exception as e:
+                logger.error(f"Error releasing dialer lease: {str(e)}")
+        if self._api is not None:
+            await self._api.close()
+
+    def get_status(self) -> Dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "enabled": self.enabled,
+            "running": self.task is not None and not self.task.done(),
+            "leader": self.leader,
+            "inflight": len(self.inflight),
+            "ringing": sum(1 for dial in self.inflight.values() if not dial.answered),
+            **self.stats.to_dict(),
+            "campaigns": {
+                job_id: {
+                    "active": campaign.active,
+                    "in_window": campaign.in_window(now),
+                    "calls_per_second": campaign.calls_per_second,
+                    "max_concurrent": campaign.max_concurrent,
+                    "inflight": campaign.inflight,
+                    **campaign.stats.to_dict()
+                }
+                for job_id, campaign in self.campaigns.items()
+            }
+        }
+
+outbound_dialer = OutboundDialer()
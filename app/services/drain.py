@@ -0,0 +1,107 @@
+import asyncio
+import signal
+import threading
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.admission import admission_controller
+from app.services.callRecord import call_record_service
+from app.services.supervisor import call_supervisor
+
+class DrainService:
+    """Takes a worker out of rotation without dropping the calls it carries.
+
+    Draining stops new admissions, reports "draining" on /ready so the load balancer
+    moves traffic away, and waits up to DRAIN_TIMEOUT_SECONDS for active calls to
+    finish. Calls still running at the deadline are terminated through the normal
+    cleanup path. Post-call work is flushed before the worker is allowed to exit.
+
+    Uvicorn closes every open websocket as soon as it starts shutting down, so with
+    DRAIN_ON_SIGTERM the first SIGTERM drains first and only then hands the signal to
+    uvicorn. A second SIGTERM exits immediately.
+    """
+    def __init__(self):
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_handler = None
+
+    def install_signal_handler(self):
+        # Uvicorn has installed its own handlers by the time the lifespan starts, so this wraps them
+        if not settings.DRAIN_ON_SIGTERM or threading.current_thread() is not threading.main_thread():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._previous_handler = signal.signal(signal.SIGTERM, self._handle_sigterm)
+
+    def _handle_sigterm(self, sig, frame):
+        if self.draining:
+            logger.warning("Second SIGTERM received, exiting without waiting for calls")
+            self._exit()
+            return
+        self._loop.call_soon_threadsafe(self.start, True)
+
+    def _exit(self):
+        if callable(self._previous_handler):
+            self._previous_handler(signal.SIGTERM, None)
+        else:
+            signal.raise_signal(signal.SIGTERM)
+
+    def start(self, exit_when_done: bool = False) -> bool:
+        """Begin draining; returns False if a drain is already in progress"""
+        if self.draining:
+            return False
+        self.draining = True
+        admission_controller.draining = True
+        self.started_at = time.monotonic()
+        logger.warning(f"Draining: {admission_controller.active} active calls, deadline {settings.DRAIN_TIMEOUT_SECONDS}s")
+        self.task = asyncio.create_task(self._drain(exit_when_done))
+        return True
+
+    async def _drain(self, exit_when_done: bool):
+        try:
+            await self._wait_for_calls()
+            await call_record_service.wait_pending()
+            self.finished_at = time.monotonic()
+            logger.info(f"Drained in {self.finished_at - self.started_at:.1f}s")
+        except Exception as e:
+            logger.error(f"Error draining: {str(e)}")
+        if exit_when_done:
+            self._exit()
+
+    def _calls_in_progress(self) -> int:
+        # Expires reservations on the way: nothing else does while admissions are closed
+        return admission_controller.active + admission_controller.reserved_count()
+
+    async def _wait_for_calls(self):
+        deadline = self.started_at + settings.DRAIN_TIMEOUT_SECONDS
+        while self._calls_in_progress() and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        if admission_controller.active:
+            logger.warning(f"Drain deadline reached, terminating {admission_controller.active} calls")
+            call_supervisor.terminate_all("drain_deadline")
+            # Give the terminated calls a moment to run their cleanup
+            cleanup_deadline = time.monotonic() + 10
+            while admission_controller.active and time.monotonic() < cleanup_deadline:
+                await asyncio.sleep(0.1)
+
+    async def shutdown(self):
+        """Finish draining during lifespan shutdown, whether or not a drain was requested earlier"""
+        if not self.draining:
+            self.start()
+        await self.task
+
+    def get_status(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "draining": self.draining,
+            "finished": self.finished_at is not None,
+            "elapsed_seconds": round((self.finished_at or now) - self.started_at, 1) if self.started_at else None,
+            "timeout_seconds": settings.DRAIN_TIMEOUT_SECONDS,
+            "calls_in_progress": self._calls_in_progress()
+        }
+
+drain_service = DrainService()
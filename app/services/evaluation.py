@@ -1,9 +1,15 @@
-from typing import List, Dict
-from langchain_community.chat_message_histories import ChatMessageHistory
+import asyncio
+from typing import List, Dict, Optional
 
+from app.core.config import settings
 from app.core.logger import logger
+from app.core.metrics import webhook_latency_seconds
 from app.core.prompt_templates.evaluation import evaluation_prompt
+from app.schemas.interview import Interview
 from app.services.chat import chat_service
+from app.services.journal import journal_service
+from app.services.mysql import mysql_service
+from app.services.transcript import Transcript
 from app.utils.utils import format_conversation_history
 
 class EvaluationService:
@@ -12,30 +18,127 @@ class EvaluationService:
 
     async def evaluate_interview(
         self,
-        messages: ChatMessageHistory,
+        messages: Transcript,
         criteria: List[str],
         evaluation_language: str,
         job_id: str,
         phone_number: str,
-        call_recording_url: str
+        call_recording_url: str,
+        local_recording: Optional[Dict[str, List[str]]] = None,
+        interview_id: Optional[int] = None
     ) -> Dict:
         try:
-            evaluation = chat_service.function_call(evaluation_prompt.format(
-                messages=messages,
-                criteria=criteria,
-                evaluation_language=evaluation_language
-            ), "evaluate_interview")
+            # The call path runs this on the ElevenLabs callback thread's loop, so blocking here stalls no call
+            evaluation = self._evaluate(messages, criteria, evaluation_language)
+            return await self._deliver(
+                evaluation, criteria, job_id, phone_number, call_recording_url, messages, local_recording, interview_id
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating interview: {str(e)}")
+            raise
 
-            logger.info(f"Evaluation: {evaluation}")
+    def _evaluate(self, messages: Transcript, criteria: List[str], evaluation_language: str) -> Dict:
+        """Score the conversation with the LLM; blocks for the whole request"""
+        evaluation = chat_service.function_call(evaluation_prompt.format(
+            messages=format_conversation_history(messages),
+            criteria=criteria,
+            evaluation_language=evaluation_language
+        ), "evaluate_interview")
+        logger.info(f"Evaluation: {evaluation}")
+        return evaluation
 
-            # TODO: Uncomment this when webhook is ready
-            await self.send_webhook(job_id, phone_number, call_recording_url, messages, evaluation)
-            
+    async def _deliver(
+        self,
+        evaluation: Dict,
+        criteria: List[str],
+        job_id: str,
+        phone_number: str,
+        call_recording_url: str,
+        messages: Transcript,
+        local_recording: Optional[Dict[str, List[str]]],
+        interview_id: Optional[int]
+    ) -> Dict:
+        """Store an evaluation for ranking and send it to the webhook"""
+        if interview_id is not None:
+            try:
+                await self.store_evaluation(interview_id, job_id, phone_number, evaluation, criteria)
+            except Exception as e:
+                # The webhook still carries the evaluation, so a storage failure doesn't lose it
+                logger.error(f"Error storing evaluation: {str(e)}")
+
+        # TODO: Uncomment this when webhook is ready
+        await self.send_webhook(job_id, phone_number, call_recording_url, messages, evaluation, local_recording)
+        return evaluation
+
+    async def store_evaluation(
+        self, interview_id: int, job_id: str, phone_number: str, evaluation: Dict, criteria: List[str]
+    ):
+        """Persist an evaluation for ranking, replacing any earlier one of the interview.
+
+        Scores are keyed by the interview's configured criterion names rather than the
+        LLM's spelling of them, so ranking by ?criterion= finds them.
+        """
+        configured = {name.strip().casefold(): name.strip() for name in criteria}
+        scores = {}
+        for item in evaluation.get("criteria", []):
+            try:
+                name = str(item["name"]).strip()
+                score = round(float(item["score"]))
+            except (KeyError, TypeError, ValueError):
+                logger.warning(f"Skipping malformed criterion score: {item}")
+                continue
+            if name.casefold() not in configured:
+                logger.warning(f"Interview {interview_id} scored unconfigured criterion: {name}")
+            scores[configured.get(name.casefold(), name)[:255]] = score
+        await mysql_service.upsert_evaluation({
+            "interview_id": interview_id,
+            "job_id": job_id,
+            # The call path passes the caller number without the leading +
+            "phone_number": phone_number if phone_number.startswith("+") else f"+{phone_number}",
+            "final_score": round(float(evaluation["final_score"])),
+            "criteria": evaluation.get("criteria", []),
+            "scores": scores
+        })
+
+    async def get_ranking(self, job_id: str, limit: int, criterion: Optional[str] = None) -> List[Dict]:
+        return await mysql_service.get_job_ranking(job_id, limit, criterion)
+
+    async def reevaluate_interview(self, interview: Interview) -> Optional[Dict]:
+        """Evaluate an interview again from its stored transcript; None if nothing was recorded"""
+        transcript = await journal_service.get_transcript(interview.interview_id)
+        if not len(transcript):
+            return None
+        try:
+            # Called from an API request on the main loop, where the LLM request would stall every live call
+            evaluation = await asyncio.to_thread(
+                self._evaluate, transcript, interview.evaluation_criteria, interview.evaluation_language
+            )
+            return await self._deliver(
+                evaluation,
+                interview.evaluation_criteria,
+                interview.job_id,
+                interview.phone_number,
+                interview.call_recording_url,
+                transcript,
+                None,
+                interview.interview_id
+            )
         except Exception as e:
-            logger.error(f"Error evaluating interview: {str(e)}")
+            logger.error(f"Error re-evaluating interview: {str(e)}")
             raise
 
-    async def send_webhook(self, job_id: str, phone_number: str, call_recording_url: str, messages: ChatMessageHistory, evaluation_data: Dict):
+    async def send_webhook(
+        self,
+        job_id: str,
+        phone_number: str,
+        call_recording_url: str,
+        messages: Transcript,
+        evaluation_data: Dict,
+        local_recording: Optional[Dict[str, List[str]]] = None
+    ):
+        if settings.PROVIDER_MODE == "fake":
+            logger.info(f"Skipping webhook in fake provider mode for job {job_id}")
+            return
         try:
             # TODO: Customize webhook sending function here
             import aiohttp
@@ -48,18 +151,20 @@ class EvaluationService:
                 "job_id": job_id,
                 "phone_number": phone_number,
                 "call_recording_url": call_recording_url,
+                "local_recording": local_recording,
                 "evaluation": evaluation_data,
                 "call_transcript": format_conversation_history(messages)
             }
 
             # Send POST request to webhook URL
-            async with aiohttp.ClientSession() as session:
-                async with session.post(webhook_url, json=payload) as response:
-                    if response.status not in (200, 201, 202):
-                        logger.error(f"Webhook request failed with status {response.status}")
-                        raise Exception(f"Webhook request failed with status {response.status}")
-                    
-                    logger.info(f"Webhook sent successfully to {webhook_url}")
+            with webhook_latency_seconds.time():
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(webhook_url, json=payload) as response:
+                        if response.status not in (200, 201, 202):
+                            logger.error(f"Webhook request failed with status {response.status}")
+                            raise Exception(f"Webhook request failed with status {response.status}")
+                        
+                        logger.info(f"Webhook sent successfully to {webhook_url}")
                     
         except Exception as e:
             logger.error(f"Error sending webhook: {str(e)}")
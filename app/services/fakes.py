@@ -0,0 +1,479 @@
+"""In-process stand-ins for external providers, enabled with PROVIDER_MODE=fake.
+
+They keep the shape of the real clients closely enough for the call path to run
+unchanged, and simulate provider latency with blocking sleeps wherever the real
+SDK call blocks. Used by the load-testing harness in loadtest/ so no network is needed.
+"""
+import asyncio
+import copy
+import queue
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+
+FRAME_BYTES = 160  # 20 ms of 8 kHz mu-law
+FRAME_SECONDS = 0.02
+SILENCE = b"\xff" * FRAME_BYTES
+
+def _simulate_latency():
+    time.sleep(settings.FAKE_LATENCY_MS / 1000)
+
+class _FakeTextToSpeech:
+    def convert(self, text: str, **kwargs):
+        _simulate_latency()
+        frames = max(1, len(text) // 10)
+        return iter([SILENCE] * frames)
+
+class FakeElevenLabs:
+    def __init__(self, api_key: Optional[str] = None):
+        self.text_to_speech = _FakeTextToSpeech()
+
+class FakeConversation:
+    """Scripted stand-in for elevenlabs Conversation.
+
+    Every FAKE_TURN_FRAMES inbound frames count as one candidate answer. The agent
+    replies after FAKE_LATENCY_MS with FAKE_RESPONSE_MS of audio paced at 20 ms per
+    frame, and says goodbye after FAKE_MAX_TURNS answers.
+    """
+    def __init__(
+        self,
+        client,
+        agent_id: str,
+        config=None,
+        requires_auth: bool = True,
+        audio_interface=None,
+        callback_agent_response=None,
+        callback_user_transcript=None,
+        **kwargs
+    ):
+        self.audio_interface = audio_interface
+        self.callback_agent_response = callback_agent_response
+        self.callback_user_transcript = callback_user_transcript
+        self._turns = queue.Queue()
+        self._frames = 0
+        self._thread = None
+
+    def start_session(self):
+        self.audio_interface.start(self._input_callback)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def end_session(self):
+        self.audio_interface.stop()
+        self._turns.put(None)
+
+    def wait_for_session_end(self):
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _input_callback(self, audio: bytes):
+        self._frames += 1
+        if self._frames % settings.FAKE_TURN_FRAMES == 0:
+            self._turns.put(self._frames // settings.FAKE_TURN_FRAMES)
+
+    def _speak(self, text: str):
+        frames = settings.FAKE_RESPONSE_MS // 20
+        next_frame = time.monotonic()
+        for _ in range(frames):
+            self.audio_interface.output(SILENCE)
+            next_frame += FRAME_SECONDS
+            time.sleep(max(0.0, next_frame - time.monotonic()))
+        if self.callback_agent_response:
+            self.callback_agent_response(text)
+
+    def _run(self):
+        self._speak("Hello, thanks for calling. Let's start the interview, okay?")
+        while True:
+            turn = self._turns.get()
+            if turn is None:
+                return
+            if self.callback_user_transcript:
+                self.callback_user_transcript(f"This is my answer number {turn}.")
+            _simulate_latency()
+            if turn >= settings.FAKE_MAX_TURNS:
+                self._speak("Thank you for your time. Goodbye, have a good day.")
+            else:
+                self._speak(f"Thank you. Here is question number {turn + 1}.")
+
+class _FakeBoundModel:
+    def __init__(self, function_name: str):
+        self.function_name = function_name
+
+    def invoke(self, messages):
+        _simulate_latency()
+        if self.function_name == "call_ended":
+            prompt = messages[0].content.lower()
+            transcript = prompt.rsplit("here is the transcript:", 1)[-1]
+            args = {"call_ended": "goodbye" in transcript}
+        else:
+            args = {
+                "criteria": [{"name": "communication", "score": 80, "explanation": "Fake evaluation"}],
+                "final_score": 80
+            }
+        return SimpleNamespace(tool_calls=[{"name": self.function_name, "args": args}])
+
+class FakeChatModel:
+    def bind_tools(self, functions, tool_choice: str = None):
+        return _FakeBoundModel(tool_choice)
+
+    def invoke(self, messages):
+        _simulate_latency()
+        return SimpleNamespace(content="This is a fake response.")
+
+class FakeRecordingApi:
+    async def record(self, call_uuid: str, time_limit: int):
+        await asyncio.sleep(settings.FAKE_LATENCY_MS / 1000)
+        return {"url": f"https://recordings.fake.local/{call_uuid}.mp3"}
+
+    async def record_stop(self, call_uuid: str):
+        await asyncio.sleep(settings.FAKE_LATENCY_MS / 1000)
+        return {}
+
+    async def close(self):
+        pass
+
+class FakeCallApi:
+    """Stand-in for the Plivo outbound call API.
+
+    Each call rings for a while and is answered with probability FAKE_ANSWER_RATE;
+    answered calls last as long as a scripted fake interview. Their outcome is posted
+    to hangup_url the way Plivo does, so the dialer's callback endpoint is exercised.
+    """
+    def __init__(self):
+        self._tasks = set()
+
+    async def create_call(self, from_number: str, to_number: str, answer_url: str, hangup_url: str, ring_timeout: int):
+        await asyncio.sleep(settings.FAKE_LATENCY_MS / 1000)
+        request_uuid = str(uuid.uuid4())
+        task = asyncio.create_task(self._hang_up(hangup_url, request_uuid, ring_timeout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return {"request_uuid": request_uuid, "message": "call fired"}
+
+    async def _hang_up(self, hangup_url: str, request_uuid: str, ring_timeout: int):
+        if random.random() < settings.FAKE_ANSWER_RATE:
+            await asyncio.sleep(random.uniform(1, 5))
+            turn_seconds = settings.FAKE_TURN_FRAMES * FRAME_SECONDS + settings.FAKE_RESPONSE_MS / 1000
+            duration = int(turn_seconds * (settings.FAKE_MAX_TURNS + 1))
+            await asyncio.sleep(duration)
+            form = {"RequestUUID": request_uuid, "CallStatus": "completed", "Duration": str(duration)}
+        else:
+            await asyncio.sleep(ring_timeout)
+            form = {"RequestUUID": request_uuid, "CallStatus": "no-answer", "Duration": "0"}
+        try:
+            async with aiohttp.ClientSession() as session:
+                await session.post(hangup_url, data=form)
+        except Exception:
+            pass
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+class InMemoryMySQLService:
+    """Dict-backed stand-in for MySQLService.
+
+    Any phone number without a pending interview gets one created on lookup, so load
+    tests can dial from arbitrary numbers.
+    """
+    def __init__(self):
+        self._interviews: Dict[int, dict] = {}
+        self._traces: Dict[str, dict] = {}
+        self._turns: Dict[int, list] = {}
+        self._nodes: Dict[str, dict] = {}
+        self._routes: Dict[str, tuple] = {}
+        self._campaigns: Dict[str, dict] = {}
+        self._dials: Dict[int, dict] = {}
+        self._evaluations: Dict[int, dict] = {}
+        self._lease: Optional[tuple] = None
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def initialize(self):
+        pass
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def _new_row(self, **fields) -> dict:
+        row = {
+            "interview_id": self._next_id,
+            "job_id": "load-test",
+            "phone_number": "",
+            "questions": ["Tell me about yourself.", "Why do you want this job?"],
+            "evaluation_criteria": ["communication"],
+            "interview_language": "en",
+            "evaluation_language": "en",
+            "call_recording_url": None,
+            "is_completed": False,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            "version": 1,
+        }
+        row.update(fields)
+        self._interviews[row["interview_id"]] = row
+        self._next_id += 1
+        return row
+
+    async def get_interview(self, interview_id: int, read_only: bool = True):
+        row = self._interviews.get(interview_id)
+        return copy.deepcopy(row) if row else None
+
+    async def get_interview_state(self, interview_id: int):
+        row = self._interviews.get(interview_id)
+        return {"version": row["version"], "is_completed": row["is_completed"]} if row else None
+
+    async def get_interview_versions_by_phone(self, phone_number: str):
+        return [
+            {"interview_id": row["interview_id"], "version": row["version"]}
+            for row in self._interviews.values() if row["phone_number"] == phone_number
+        ]
+
+    async def insert_interview(self, interview):
+        with self._lock:
+            for row in self._interviews.values():
+                if row["phone_number"] == interview.phone_number and row["job_id"] == interview.job_id:
+                    raise ValueError(f"Interview already exists for phone number {interview.phone_number} and job ID {interview.job_id}")
+            fields = interview.model_dump(exclude={"interview_id"})
+            fields["created_at"] = fields["created_at"].replace(tzinfo=None)
+            return self._new_row(**fields)["interview_id"]
+
+    async def get_interview_by_phone(self, phone_number: str):
+        with self._lock:
+            for row in self._interviews.values():
+                if row["phone_number"] == phone_number and not row["is_completed"]:
+                    return copy.deepcopy(row)
+            return copy.deepcopy(self._new_row(phone_number=phone_number))
+
+    async def get_interviews_by_phone(self, phone_number: str):
+        return [copy.deepcopy(row) for row in self._interviews.values() if row["phone_number"] == phone_number]
+
+    def _update(self, interview_id: int, update_data: dict, job_id: Optional[str] = None):
+        with self._lock:
+            row = self._interviews.get(interview_id)
+            if not row or (job_id is not None and row["job_id"] != job_id):
+                return None
+            update_data = dict(update_data)
+            expected_version = update_data.pop("version", None)
+            if expected_version is not None and expected_version != row["version"]:
+                # Imported here: app.services.mysql imports this module while it loads
+                from app.services.mysql import VersionConflictError
+                raise VersionConflictError(interview_id, expected_version, row["version"])
+            row.update(update_data)
+            row["version"] += 1
+            return copy.deepcopy(row)
+
+    async def update_interview(self, interview_id: int, update_data: dict):
+        return self._update(interview_id, update_data)
+
+    async def update_interview_by_job_id(self, job_id: str, interview_id: int, update_data: dict):
+        return self._update(interview_id, update_data, job_id)
+
+    async def delete_interview(self, interview_id: int) -> bool:
+        with self._lock:
+            self._turns.pop(interview_id, None)
+            self._dials.pop(interview_id, None)
+            self._evaluations.pop(interview_id, None)
+            return self._interviews.pop(interview_id, None) is not None
+
+    async def upsert_call_trace(self, trace: dict):
+        self._traces[trace["call_uuid"]] = trace
+
+    async def get_call_trace(self, call_uuid: str):
+        return self._traces.get(call_uuid)
+
+    async def append_transcript_turns(self, rows: list):
+        with self._lock:
+            for interview_id, call_uuid, seq, role, text, t_ms, tokens in rows:
+                turns = self._turns.setdefault(interview_id, [])
+                if any(turn["call_uuid"] == call_uuid and turn["seq"] == seq for turn in turns):
+                    continue
+                turns.append({
+                    "call_uuid": call_uuid, "seq": seq, "role": role, "text": text,
+                    "t_ms": t_ms, "tokens": tokens,
+                    "created_at": datetime.now(timezone.utc).replace(tzinfo=None)
+                })
+
+    async def get_transcript_turns(self, interview_id: int, read_only: bool = True):
+        return [dict(turn) for turn in self._turns.get(interview_id, [])]
+
+    async def upsert_evaluation(self, evaluation: dict):
+        self._evaluations[evaluation["interview_id"]] = {
+            **copy.deepcopy(evaluation), "evaluated_at": datetime.now(timezone.utc).replace(tzinfo=None)
+        }
+
+    async def get_job_ranking(self, job_id: str, limit: int, criterion: Optional[str] = None):
+        rows = []
+        for evaluation in self._evaluations.values():
+            if evaluation["job_id"] != job_id:
+                continue
+            score = None
+            if criterion is not None:
+                score = evaluation["scores"].get(criterion)
+                if score is None:
+                    continue
+            rows.append({
+                "interview_id": evaluation["interview_id"],
+                "phone_number": evaluation["phone_number"],
+                "final_score": evaluation["final_score"],
+                "score": score,
+                "evaluated_at": evaluation["evaluated_at"]
+            })
+        key = "final_score" if criterion is None else "score"
+        rows.sort(key=lambda row: (row[key], row["interview_id"]), reverse=True)
+        return rows[:limit]
+
+    async def upsert_node(self, node: dict):
+        self._nodes[node["node_id"]] = {**node, "updated_at": time.monotonic()}
+
+    async def get_fresh_nodes(self, max_age_seconds: float):
+        now = time.monotonic()
+        return [
+            {key: value for key, value in node.items() if key != "updated_at"}
+            for node in self._nodes.values() if now - node["updated_at"] <= max_age_seconds
+        ]
+
+    async def delete_node(self, node_id: str):
+        self._nodes.pop(node_id, None)
+
+    async def add_node_call(self, node_id: str):
+        if node_id in self._nodes:
+            self._nodes[node_id]["active_calls"] += 1
+
+    async def claim_call_route(self, call_uuid: str, node_id: str) -> str:
+        return self._routes.setdefault(call_uuid, (node_id, datetime.now(timezone.utc).replace(tzinfo=None)))[0]
+
+    async def get_call_route(self, call_uuid: str):
+        route = self._routes.get(call_uuid)
+        return route[0] if route else None
+
+    async def set_call_route(self, call_uuid: str, node_id: str):
+        if call_uuid in self._routes:
+            self._routes[call_uuid] = (node_id, self._routes[call_uuid][1])
+
+    async def delete_call_routes_before(self, cutoff) -> int:
+        expired = [call_uuid for call_uuid, (_, created_at) in self._routes.items() if created_at < cutoff]
+        for call_uuid in expired:
+            del self._routes[call_uuid]
+        return len(expired)
+
+    async def upsert_dial_campaign(self, campaign: dict):
+        self._campaigns[campaign["job_id"]] = dict(campaign)
+
+    async def get_dial_campaigns(self):
+        return [dict(campaign) for campaign in self._campaigns.values()]
+
+    async def delete_dial_campaign(self, job_id: str) -> bool:
+        return self._campaigns.pop(job_id, None) is not None
+
+    def _dial_due(self, dial: dict) -> bool:
+        return dial["status"] == "retry" and dial["next_attempt_at"] <= time.monotonic()
+
+    async def get_dialable_interviews(self, job_id: str, limit: int):
+        rows = []
+        for row in self._interviews.values():
+            if row["job_id"] != job_id or row["is_completed"]:
+                continue
+            dial = self._dials.get(row["interview_id"])
+            if dial is None or self._dial_due(dial):
+                rows.append({"interview_id": row["interview_id"], "phone_number": row["phone_number"]})
+                if len(rows) == limit:
+                    break
+        return rows
+
+    async def claim_dial_attempt(self, interview_id: int, job_id: str):
+        with self._lock:
+            dial = self._dials.get(interview_id)
+            if dial is None:
+                dial = self._dials[interview_id] = {"job_id": job_id, "attempts": 0}
+            elif not self._dial_due(dial):
+                return None
+            dial.update(attempts=dial["attempts"] + 1, status="dialing", request_uuid=None, updated_at=time.monotonic())
+            return dial["attempts"]
+
+    async def set_dial_request(self, interview_id: int, request_uuid: str):
+        if interview_id in self._dials:
+            self._dials[interview_id]["request_uuid"] = request_uuid
+
+    async def get_dial_by_request(self, request_uuid: str):
+        for interview_id, dial in self._dials.items():
+            if dial.get("request_uuid") == request_uuid:
+                return {"interview_id": interview_id, "job_id": dial["job_id"], "attempts": dial["attempts"], "status": dial["status"]}
+        return None
+
+    async def get_dial_states(self, interview_ids: list) -> dict:
+        states = {}
+        for interview_id in interview_ids:
+            dial = self._dials.get(interview_id)
+            if dial is not None:
+                states[interview_id] = {"interview_id": interview_id, "status": dial["status"], "request_uuid": dial.get("request_uuid")}
+        return states
+
+    async def mark_dial_connected(self, request_uuid: str) -> bool:
+        with self._lock:
+            for dial in self._dials.values():
+                if dial.get("request_uuid") == request_uuid and dial["status"] == "dialing":
+                    dial.update(status="connected", updated_at=time.monotonic())
+                    return True
+            return False
+
+    async def finish_dial_attempt(
+        self, interview_id: int, status: str, retry_after_seconds: Optional[float] = None, request_uuid: Optional[str] = None
+    ) -> bool:
+        with self._lock:
+            dial = self._dials.get(interview_id)
+            if dial is None:
+                return False
+            if request_uuid is not None and (dial.get("request_uuid") != request_uuid or dial["status"] not in ("dialing", "connected")):
+                return False
+            next_attempt_at = None if retry_after_seconds is None else time.monotonic() + retry_after_seconds
+            dial.update(status=status, next_attempt_at=next_attempt_at, updated_at=time.monotonic())
+            return True
+
+    async def release_stale_dial_attempts(self, max_age_seconds: float, max_attempts: int) -> int:
+        now = time.monotonic()
+        released = 0
+        for dial in self._dials.values():
+            if dial["status"] in ("dialing", "connected") and now - dial["updated_at"] > max_age_seconds:
+                dial.update(status="exhausted" if dial["attempts"] >= max_attempts else "retry", next_attempt_at=now)
+                released += 1
+        return released
+
+    async def acquire_dialer_lease(self, holder: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._lease is None or self._lease[0] == holder or self._lease[1] < now:
+                self._lease = (holder, now + ttl_seconds)
+            return self._lease[0] == holder
+
+    async def release_dialer_lease(self, holder: str):
+        with self._lock:
+            if self._lease and self._lease[0] == holder:
+                self._lease = None
+
+    async def get_dial_progress(self, job_id: str) -> dict:
+        progress = {}
+        for dial in self._dials.values():
+            if dial["job_id"] == job_id:
+                progress[dial["status"]] = progress.get(dial["status"], 0) + 1
+        progress["not_dialed"] = sum(
+            1 for row in self._interviews.values()
+            if row["job_id"] == job_id and not row["is_completed"] and row["interview_id"] not in self._dials
+        )
+        return progress
+
+    async def archive_completed_interviews(self, cutoff, batch_size: int) -> int:
+        return 0
+
+    async def get_oldest_archivable(self, cutoff):
+        return None
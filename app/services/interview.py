@@ -1,11 +1,31 @@
-from typing import List, Optional
+import asyncio
+import time
+from typing import Dict, List, Optional
 from app.core.logger import logger
 from app.schemas.interview import InterviewCreate, InterviewUpdate, Interview, InterviewResponse, InterviewResponseData
-from app.services.mysql import mysql_service
+from app.services.mysql import mysql_service, VersionConflictError
+
+class _Waiters:
+    """Long-poll requests waiting on one interview, all woken by the same event"""
+    __slots__ = ("loop", "event", "count")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.count = 0
 
 class InterviewService:
     def __init__(self):
-        pass
+        # Long-poll waiters per interview_id, woken by updates made through this worker
+        self._waiters: Dict[int, _Waiters] = {}
+        # Updates made by other workers are picked up by re-checking the version this often
+        self.wait_poll_interval = 2.0
+
+    def _notify(self, interview_id: int):
+        # The end-of-call update runs on an ElevenLabs thread's loop, so wake waiters on their own loop
+        waiters = self._waiters.pop(interview_id, None)
+        if waiters:
+            waiters.loop.call_soon_threadsafe(waiters.event.set)
 
     async def create_interview(self, request: InterviewCreate) -> InterviewResponse:
         try:
@@ -39,9 +59,9 @@ class InterviewService:
                 message=f"Interview creation failed: {str(e)}"
             )
 
-    async def get_interview(self, interview_id: int) -> Optional[Interview]:
+    async def get_interview(self, interview_id: int, read_only: bool = True) -> Optional[Interview]:
         try:
-            interview = await mysql_service.get_interview(interview_id)
+            interview = await mysql_service.get_interview(interview_id, read_only=read_only)
             if not interview:
                 return None
             return Interview.model_validate(interview)
@@ -51,16 +71,15 @@ class InterviewService:
 
     async def update_interview(self, interview_id: int, update_data: InterviewUpdate) -> Optional[Interview]:
         try:
-            # First get the existing interview
-            existing = await self.get_interview(interview_id)
-            if not existing:
-                return None
-
             # Update only the fields that are provided
             update_dict = update_data.model_dump(exclude_unset=True)
             updated_interview = await mysql_service.update_interview(interview_id, update_dict)
+            if updated_interview:
+                self._notify(interview_id)
             
             return Interview.model_validate(updated_interview) if updated_interview else None
+        except VersionConflictError:
+            raise
         except Exception as e:
             logger.error(f"Error updating interview: {str(e)}")
             raise
@@ -93,9 +112,54 @@ class InterviewService:
             # Update only the fields that are provided
             update_dict = update_data.model_dump(exclude_unset=True)
             updated_interview = await mysql_service.update_interview_by_job_id(job_id, interview_id, update_dict)
+            if updated_interview:
+                self._notify(interview_id)
             return Interview.model_validate(updated_interview) if updated_interview else None
+        except VersionConflictError:
+            raise
         except Exception as e:
             logger.error(f"Error updating interview by job ID: {str(e)}")
             raise
 
+    async def get_interview_state(self, interview_id: int) -> Optional[Dict]:
+        try:
+            return await mysql_service.get_interview_state(interview_id)
+        except Exception as e:
+            logger.error(f"Error getting interview state: {str(e)}")
+            raise
+
+    async def get_interview_versions_by_phone(self, phone_number: str) -> List[Dict]:
+        try:
+            return await mysql_service.get_interview_versions_by_phone(phone_number)
+        except Exception as e:
+            logger.error(f"Error getting interview versions by phone: {str(e)}")
+            raise
+
+    async def wait_for_change(self, interview_id: int, known_version: Optional[int], timeout: float) -> Optional[Dict]:
+        """Wait until the interview is completed or moves past known_version, or until timeout.
+
+        Returns the latest state, or None if the interview does not exist.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state = await self.get_interview_state(interview_id)
+            if not state or state['is_completed'] or (known_version is not None and state['version'] != known_version):
+                return state
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return state
+            waiters = self._waiters.get(interview_id)
+            if waiters is None:
+                waiters = self._waiters[interview_id] = _Waiters(asyncio.get_running_loop())
+            waiters.count += 1
+            try:
+                await asyncio.wait_for(waiters.event.wait(), min(remaining, self.wait_poll_interval))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # The last waiter to leave removes the entry, unless _notify already has
+                waiters.count -= 1
+                if not waiters.count and self._waiters.get(interview_id) is waiters:
+                    del self._waiters[interview_id]
+
 interview_service = InterviewService()
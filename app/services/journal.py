@@ -0,0 +1,90 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.mysql import mysql_service
+from app.services.transcript import Transcript, Turn
+
+class TranscriptJournal:
+    """Write-behind buffer persisting a call's transcript turns.
+
+    append() runs on the ElevenLabs threads and only queues a row. A task on the event
+    loop writes queued rows in one batch every TRANSCRIPT_FLUSH_TURNS turns or
+    TRANSCRIPT_FLUSH_MS, whichever comes first, and close() writes whatever is left.
+    A failed batch is put back and retried on the next flush.
+    """
+    def __init__(self, interview_id: int, call_uuid: str):
+        self.interview_id = interview_id
+        self.call_uuid = call_uuid
+        self._origin = time.monotonic()
+        self._pending = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._flushing = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    def append(self, seq: int, turn: Turn):
+        """Queue a turn for the next flush; safe from any thread"""
+        self._pending.append((
+            self.interview_id, self.call_uuid, seq, turn.role, turn.text,
+            int((turn.at - self._origin) * 1000), turn.tokens
+        ))
+        if len(self._pending) >= settings.TRANSCRIPT_FLUSH_TURNS and self._loop:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.TRANSCRIPT_FLUSH_MS / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._flushing:
+            rows = []
+            while self._pending:
+                rows.append(self._pending.popleft())
+            if not rows:
+                return
+            try:
+                await mysql_service.append_transcript_turns(rows)
+            except Exception as e:
+                logger.error(f"Error writing transcript journal ({len(rows)} turns): {str(e)}")
+                self._pending.extendleft(reversed(rows))
+
+    async def close(self):
+        """Stop the flush task and write the remaining turns; called once at call end"""
+        self._closed = True
+        if self._task:
+            self._wake.set()
+            await self._task
+        await self.flush()
+
+class JournalService:
+    def __init__(self):
+        pass
+
+    async def get_turns(self, interview_id: int) -> List[Dict]:
+        try:
+            return await mysql_service.get_transcript_turns(interview_id)
+        except Exception as e:
+            logger.error(f"Error getting transcript: {str(e)}")
+            raise
+
+    async def get_transcript(self, interview_id: int) -> Transcript:
+        """The stored transcript of every call for an interview, in order"""
+        return Transcript.from_rows(await self.get_turns(interview_id))
+
+journal_service = JournalService()
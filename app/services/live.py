@@ -0,0 +1,131 @@
+import asyncio
+import json
+import time
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.metrics import live_events_dropped_total, live_subscribers
+from app.services.transcript import Transcript, Turn
+
+class LiveSubscriber:
+    __slots__ = ("queue", "next_index", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        # Index of the first turn not yet delivered, so the backlog and live events never overlap
+        self.next_index = 0
+        self.dropped = 0
+
+class _LiveCall:
+    __slots__ = ("loop", "transcript", "origin", "subscribers")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, transcript: Transcript):
+        self.loop = loop
+        self.transcript = transcript
+        self.origin = time.monotonic()
+        self.subscribers: Set[LiveSubscriber] = set()
+
+class LiveHub:
+    """Fans out transcript turns of active calls to live watchers.
+
+    Publishing is called from the ElevenLabs threads and only schedules the fan-out
+    on the event loop, and only when someone is watching. Each turn is serialized
+    once and the same frame is queued for every subscriber. A subscriber whose
+    bounded queue is full misses events, and is disconnected once it has missed
+    LIVE_MAX_DROPPED_EVENTS in a row.
+    """
+    def __init__(self):
+        self._calls: Dict[str, _LiveCall] = {}
+
+    def open(self, call_uuid: str, transcript: Transcript):
+        """Make a call watchable; must be called on the event loop serving it"""
+        self._calls[call_uuid] = _LiveCall(asyncio.get_running_loop(), transcript)
+
+    def close(self, call_uuid: str):
+        """End the stream for every watcher of a call"""
+        call = self._calls.pop(call_uuid, None)
+        if call is None:
+            return
+        for subscriber in list(call.subscribers):
+            self._disconnect(call, subscriber, "event: end\ndata: {}\n\n")
+
+    def publish(self, call_uuid: str, index: int, turn: Turn):
+        """Announce the turn at index of the call's transcript; safe from any thread"""
+        call = self._calls.get(call_uuid)
+        if call is None or not call.subscribers:
+            return
+        call.loop.call_soon_threadsafe(self._fanout, call, index, turn)
+
+    def _frame(self, call: _LiveCall, turn: Turn) -> str:
+        data = json.dumps({
+            "role": turn.role,
+            "text": turn.text,
+            "t_ms": round((turn.at - call.origin) * 1000, 1),
+            "tokens": turn.tokens
+        })
+        return f"event: turn\ndata: {data}\n\n"
+
+    def _fanout(self, call: _LiveCall, index: int, turn: Turn):
+        frame = None
+        for subscriber in list(call.subscribers):
+            if index < subscriber.next_index:
+                continue
+            if frame is None:
+                frame = self._frame(call, turn)
+            subscriber.next_index = index + 1
+            try:
+                subscriber.queue.put_nowait(frame)
+                subscriber.dropped = 0
+            except asyncio.QueueFull:
+                live_events_dropped_total.inc()
+                subscriber.dropped += 1
+                if subscriber.dropped >= settings.LIVE_MAX_DROPPED_EVENTS:
+                    self._disconnect(call, subscriber, "event: error\ndata: {\"detail\": \"Subscriber too slow\"}\n\n")
+
+    def _disconnect(self, call: _LiveCall, subscriber: LiveSubscriber, frame: str):
+        call.subscribers.discard(subscriber)
+        # Make room for the final frame and the end-of-stream marker
+        while subscriber.queue.qsize() > max(0, subscriber.queue.maxsize - 2):
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(frame)
+        subscriber.queue.put_nowait(None)
+
+    def subscribe(self, call_uuid: str) -> Optional[LiveSubscriber]:
+        """Watch a call active on this worker, starting with its most recent turns"""
+        call = self._calls.get(call_uuid)
+        if call is None:
+            return None
+        subscriber = LiveSubscriber(settings.LIVE_QUEUE_SIZE)
+        # Registered before the snapshot: a turn added after it is published to this
+        # subscriber, and a fan-out still pending for a turn in it is skipped by next_index.
+        # Both run on the call's loop, so no fan-out can interleave with the snapshot.
+        call.subscribers.add(subscriber)
+        turns = list(call.transcript.turns)
+        for turn in turns[-(settings.LIVE_QUEUE_SIZE - 2):]:
+            subscriber.queue.put_nowait(self._frame(call, turn))
+        subscriber.next_index = len(turns)
+        return subscriber
+
+    def unsubscribe(self, call_uuid: str, subscriber: LiveSubscriber):
+        call = self._calls.get(call_uuid)
+        if call is not None:
+            call.subscribers.discard(subscriber)
+
+    async def stream(self, call_uuid: str, subscriber: LiveSubscriber) -> AsyncIterator[str]:
+        """Server-sent event frames for a subscriber, with keepalive comments while idle"""
+        live_subscribers.inc()
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscriber.queue.get(), settings.LIVE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            live_subscribers.dec()
+            self.unsubscribe(call_uuid, subscriber)
+
+live_hub = LiveHub()
@@ -1,6 +1,29 @@
+import asyncio
+import time
 import pymysql
 from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import mysql_query_seconds, timed
 import json
+from datetime import datetime
+from typing import Optional
+
+# Columns shared by the hot Interview table and InterviewArchive
+INTERVIEW_COLUMNS = (
+    "interview_id", "job_id", "phone_number", "questions",
+    "evaluation_criteria", "interview_language", "evaluation_language",
+    "call_recording_url", "is_completed", "created_at", "version"
+)
+
+class VersionConflictError(Exception):
+    """Raised when a conditional update finds the row at a different version than expected"""
+    def __init__(self, interview_id: int, expected_version: int, current_version: int):
+        self.interview_id = interview_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"Interview {interview_id} is at version {current_version}, expected {expected_version}"
+        )
 
 class MySQLService:
     def __init__(self):
@@ -16,12 +39,82 @@ class MySQLService:
             "read_timeout": 10,
             "write_timeout": 10
         }
+        # Optional read replica; reads fall back to the primary when it is absent, down or lagging
+        self.replica_config = None
+        if settings.DB_REPLICA_HOST:
+            self.replica_config = {
+                **self.config,
+                "host": settings.DB_REPLICA_HOST,
+                "port": settings.DB_REPLICA_PORT or settings.DB_PORT,
+                "connect_timeout": 2
+            }
+        self.replica_max_lag = settings.DB_REPLICA_MAX_LAG_SECONDS
+        self.replica_check_interval = settings.DB_REPLICA_LAG_CHECK_SECONDS
+        self._replica_healthy = False
+        self.task: Optional[asyncio.Task] = None
 
-    def _get_connection(self):
+    def _get_connection(self, read_only: bool = False):
+        """Open a connection on the primary, or on the replica for read_only queries when it is healthy"""
+        if read_only and self.replica_config and self._replica_healthy:
+            try:
+                return pymysql.connect(**self.replica_config)
+            except pymysql.MySQLError as e:
+                logger.warning(f"Replica unavailable, falling back to primary: {e}")
+                # Stays off until the next lag check finds it healthy again
+                self._replica_healthy = False
         return pymysql.connect(**self.config)
+
+    def start(self):
+        """Check replication lag in the background; reads only consult the last result"""
+        if self.replica_config and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self._monitor_replica())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _monitor_replica(self):
+        while True:
+            try:
+                # The probe connects synchronously and may wait out the connect timeout
+                lag = await asyncio.to_thread(self._replica_lag)
+                healthy = lag is not None and lag <= self.replica_max_lag
+                if not healthy:
+                    logger.warning(f"Replica lag {lag}s exceeds {self.replica_max_lag}s, reading from primary")
+                self._replica_healthy = healthy
+            except Exception as e:
+                self._replica_healthy = False
+                logger.error(f"Error checking replica lag: {str(e)}")
+            await asyncio.sleep(self.replica_check_interval)
+
+    def _replica_lag(self):
+        try:
+            connection = pymysql.connect(**self.replica_config)
+        except pymysql.MySQLError:
+            return None
+        try:
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except pymysql.MySQLError:
+                    # MySQL < 8.0.22
+                    cursor.execute("SHOW SLAVE STATUS")
+                status = cursor.fetchone()
+                if not status:
+                    return None
+                lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+                return lag
+        except pymysql.MySQLError:
+            return None
+        finally:
+            connection.close()
     
     def initialize(self):
-        """Create the Interview table if it doesn't exist"""
+        """Create the interview, call trace, transcript, evaluation, node registry and dialer tables if they don't exist"""
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
@@ -36,19 +129,212 @@ class MySQLService:
                         evaluation_language VARCHAR(50),
                         call_recording_url VARCHAR(255) NULL,
                         is_completed BOOLEAN DEFAULT FALSE,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        version INT NOT NULL DEFAULT 1,
+                        INDEX idx_completed_created (is_completed, created_at),
+                        INDEX idx_phone_version (phone_number, is_completed, version)
+                    )
+                """)
+                # Cold storage for completed interviews moved out by the archive job
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS InterviewArchive (
+                        interview_id INT PRIMARY KEY,
+                        job_id VARCHAR(255),
+                        phone_number VARCHAR(20),
+                        questions JSON,
+                        evaluation_criteria JSON,
+                        interview_language VARCHAR(50),
+                        evaluation_language VARCHAR(50),
+                        call_recording_url VARCHAR(255) NULL,
+                        is_completed BOOLEAN DEFAULT FALSE,
+                        created_at TIMESTAMP NULL,
+                        version INT NOT NULL DEFAULT 1,
+                        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        INDEX idx_phone_job (phone_number, job_id, version)
                     )
                 """)
+                # One timeline per call, written once when the call ends
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS CallTrace (
+                        call_uuid VARCHAR(64) PRIMARY KEY,
+                        interview_id INT NULL,
+                        started_at TIMESTAMP NULL,
+                        dropped INT DEFAULT 0,
+                        events JSON,
+                        INDEX idx_interview (interview_id)
+                    )
+                """)
+                # Append-only transcript journal, written in batches while the call runs
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS TranscriptTurn (
+                        turn_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                        interview_id INT NOT NULL,
+                        call_uuid VARCHAR(64) NOT NULL,
+                        seq INT NOT NULL,
+                        role VARCHAR(16) NOT NULL,
+                        text TEXT,
+                        t_ms INT,
+                        tokens INT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        UNIQUE KEY uq_call_seq (call_uuid, seq),
+                        INDEX idx_interview_turn (interview_id, turn_id)
+                    )
+                """)
+                # Latest evaluation of each interview; (job_id, final_score) serves the job ranking
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Evaluation (
+                        interview_id INT PRIMARY KEY,
+                        job_id VARCHAR(255) NOT NULL,
+                        phone_number VARCHAR(20),
+                        final_score SMALLINT NOT NULL,
+                        criteria JSON,
+                        evaluated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                        INDEX idx_job_score (job_id, final_score, interview_id)
+                    )
+                """)
+                # One row per criterion of each evaluation, for rankings by a single criterion
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS EvaluationScore (
+                        interview_id INT NOT NULL,
+                        criterion VARCHAR(255) NOT NULL,
+                        job_id VARCHAR(255) NOT NULL,
+                        score SMALLINT NOT NULL,
+                        PRIMARY KEY (interview_id, criterion),
+                        INDEX idx_job_criterion_score (job_id, criterion, score, interview_id)
+                    )
+                """)
+                # Node registry: each worker's load, refreshed by its heartbeat
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Node (
+                        node_id VARCHAR(128) PRIMARY KEY,
+                        host VARCHAR(255) NOT NULL,
+                        active_calls INT NOT NULL DEFAULT 0,
+                        capacity INT NOT NULL,
+                        loop_lag_ms FLOAT NOT NULL DEFAULT 0,
+                        updated_at TIMESTAMP(3) DEFAULT CURRENT_TIMESTAMP(3)
+                    )
+                """)
+                # Node that carries each call's media stream
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS CallRoute (
+                        call_uuid VARCHAR(64) PRIMARY KEY,
+                        node_id VARCHAR(128) NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        INDEX idx_created (created_at)
+                    )
+                """)
+                # Outbound dialing campaigns, one per job
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS DialCampaign (
+                        job_id VARCHAR(255) PRIMARY KEY,
+                        calls_per_second FLOAT NOT NULL,
+                        max_concurrent INT NOT NULL,
+                        window_start CHAR(5) NULL,
+                        window_end CHAR(5) NULL,
+                        timezone VARCHAR(64) NULL,
+                        active BOOLEAN DEFAULT TRUE,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                    )
+                """)
+                # Dialing state of each interview the dialer has called
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS DialAttempt (
+                        interview_id INT PRIMARY KEY,
+                        job_id VARCHAR(255) NOT NULL,
+                        attempts INT NOT NULL DEFAULT 0,
+                        status VARCHAR(16) NOT NULL,
+                        request_uuid VARCHAR(64) NULL,
+                        next_attempt_at TIMESTAMP NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                        INDEX idx_job_status (job_id, status, next_attempt_at),
+                        INDEX idx_request (request_uuid)
+                    )
+                """)
+                # Lease electing the one worker that runs the dialer
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS DialerLease (
+                        name VARCHAR(64) PRIMARY KEY,
+                        holder VARCHAR(128) NOT NULL,
+                        expires_at TIMESTAMP(3) NOT NULL
+                    )
+                """)
+                # Tables created before optimistic concurrency have no version column
+                for table in ("Interview", "InterviewArchive"):
+                    self._ensure_column(cursor, table, "version", "INT NOT NULL DEFAULT 1")
+                # Tables created before these indexes existed only get them here
+                self._ensure_index(cursor, "Interview", "idx_completed_created", "is_completed, created_at")
+                self._ensure_index(cursor, "Interview", "idx_phone_version", "phone_number, is_completed, version")
+                self._ensure_index(cursor, "Interview", "idx_job_pending", "job_id, is_completed, interview_id")
+                self._ensure_index(cursor, "DialAttempt", "idx_request", "request_uuid")
+                self._ensure_index(cursor, "InterviewArchive", "idx_phone_job", "phone_number, job_id, version")
             connection.commit()
         finally:
             connection.close()
     
-    async def get_interview(self, interview_id: int):
-        connection = self._get_connection()
+    def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        cursor.execute(
+            "SELECT 1 FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+            (table, column)
+        )
+        if not cursor.fetchone():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _ensure_index(self, cursor, table: str, index: str, columns: str):
+        cursor.execute(
+            "SELECT 1 FROM information_schema.STATISTICS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s",
+            (table, index)
+        )
+        if not cursor.fetchone():
+            cursor.execute(f"CREATE INDEX {index} ON {table} ({columns})")
+
+    @timed(mysql_query_seconds.labels("get_interview_state"))
+    async def get_interview_state(self, interview_id: int):
+        """Return only version and is_completed for an interview, without touching the JSON columns"""
+        connection = self._get_connection(read_only=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT version, is_completed FROM Interview WHERE interview_id = %s", (interview_id,))
+                result = cursor.fetchone()
+                if not result:
+                    cursor.execute("SELECT version, is_completed FROM InterviewArchive WHERE interview_id = %s", (interview_id,))
+                    result = cursor.fetchone()
+                return result
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("get_interview_versions_by_phone"))
+    async def get_interview_versions_by_phone(self, phone_number: str):
+        """Return (interview_id, version) pairs for a phone number, archived ones included.
+
+        Served from idx_phone_version and the archive's idx_phone_job.
+        """
+        connection = self._get_connection(read_only=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT interview_id, version FROM Interview WHERE phone_number = %s "
+                    "UNION ALL SELECT interview_id, version FROM InterviewArchive WHERE phone_number = %s "
+                    "ORDER BY interview_id",
+                    (phone_number, phone_number)
+                )
+                return cursor.fetchall()
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("get_interview"))
+    async def get_interview(self, interview_id: int, read_only: bool = True):
+        connection = self._get_connection(read_only=read_only)
         try:
             with connection.cursor() as cursor:
                 cursor.execute("SELECT * FROM Interview WHERE interview_id = %s", (interview_id,))
                 result = cursor.fetchone()
+                if not result:
+                    # Fall through to the archive for completed interviews moved out of the hot table
+                    columns = ", ".join(INTERVIEW_COLUMNS)
+                    cursor.execute(f"SELECT {columns} FROM InterviewArchive WHERE interview_id = %s", (interview_id,))
+                    result = cursor.fetchone()
                 if result:
                     # Parse JSON strings back into Python lists
                     result['questions'] = json.loads(result['questions'])
@@ -57,16 +343,19 @@ class MySQLService:
         finally:
             connection.close()
     
+    @timed(mysql_query_seconds.labels("insert_interview"))
     async def insert_interview(self, interview):
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
-                # Check for existing interview with same phone number and job ID
+                # Check for existing interview with same phone number and job ID, archived ones included
                 check_sql = """
-                    SELECT interview_id FROM Interview 
-                    WHERE phone_number = %s AND job_id = %s
+                    SELECT interview_id FROM Interview WHERE phone_number = %s AND job_id = %s
+                    UNION ALL
+                    SELECT interview_id FROM InterviewArchive WHERE phone_number = %s AND job_id = %s
+                    LIMIT 1
                 """
-                cursor.execute(check_sql, (interview.phone_number, interview.job_id))
+                cursor.execute(check_sql, (interview.phone_number, interview.job_id) * 2)
                 if cursor.fetchone():
                     raise ValueError(f"Interview already exists for phone number {interview.phone_number} and job ID {interview.job_id}")
 
@@ -99,7 +388,9 @@ class MySQLService:
         finally:
             connection.close()
     
+    @timed(mysql_query_seconds.labels("get_interview_by_phone"))
     async def get_interview_by_phone(self, phone_number: str):
+        # Stays on the primary: call setup must see interviews created or completed moments ago
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
@@ -114,53 +405,112 @@ class MySQLService:
         finally:
             connection.close()
 
-    async def update_interview(self, interview_id: int, update_data: dict):
+    def _conditional_update(self, where: dict, update_data: dict):
+        """Apply update_data to the row matching where and return the new row.
+
+        The UPDATE always bumps version. When update_data carries a version it is used as the
+        expected version and the UPDATE only matches a row still at that version. The UPDATE
+        and the read of the new row share one connection and one transaction.
+
+        A row the archive job has moved is updated in InterviewArchive; if the update marks it
+        not completed it is moved back into Interview, where calls look up pending interviews.
+        """
+        update_data = dict(update_data)
+        expected_version = update_data.pop('version', None)
+
+        # Convert questions and evaluation_criteria to JSON strings if present
+        if 'questions' in update_data:
+            update_data['questions'] = json.dumps(update_data['questions'])
+        if 'evaluation_criteria' in update_data:
+            update_data['evaluation_criteria'] = json.dumps(update_data['evaluation_criteria'])
+
+        # Build the UPDATE query dynamically based on provided fields
+        set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()] + ["version = version + 1"])
+        key_clause = " AND ".join([f"{k} = %s" for k in where.keys()])
+        where_clause = key_clause
+        values = list(update_data.values()) + list(where.values())
+        if expected_version is not None:
+            where_clause += " AND version = %s"
+            values.append(expected_version)
+
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
-                # Convert questions and evaluation_criteria to JSON strings if present
-                if 'questions' in update_data:
-                    update_data['questions'] = json.dumps(update_data['questions'])
-                if 'evaluation_criteria' in update_data:
-                    update_data['evaluation_criteria'] = json.dumps(update_data['evaluation_criteria'])
+                cursor.execute(f"UPDATE Interview SET {set_clause} WHERE {where_clause}", values)
+                updated = cursor.rowcount > 0
 
-                # Build the UPDATE query dynamically based on provided fields
-                set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()])
-                values = list(update_data.values())
-                
-                sql = f"UPDATE Interview SET {set_clause} WHERE interview_id = %s"
-                values.append(interview_id)  # Add interview_id to values list
-                cursor.execute(sql, values)
-                connection.commit()
-                
-                if cursor.rowcount > 0:
-                    # Get the updated record
-                    cursor.execute("SELECT * FROM Interview WHERE interview_id = %s", (interview_id,))
+                # Read back on the same connection; FOR UPDATE keeps the row locked until commit
+                cursor.execute(f"SELECT * FROM Interview WHERE {key_clause} FOR UPDATE", list(where.values()))
+                result = cursor.fetchone()
+                if not result:
+                    columns = ", ".join(INTERVIEW_COLUMNS)
+                    cursor.execute(f"UPDATE InterviewArchive SET {set_clause} WHERE {where_clause}", values)
+                    updated = cursor.rowcount > 0
+                    cursor.execute(
+                        f"SELECT {columns} FROM InterviewArchive WHERE {key_clause} FOR UPDATE", list(where.values())
+                    )
                     result = cursor.fetchone()
-                    if result:
-                        # Parse JSON strings back into Python objects
-                        result['questions'] = json.loads(result['questions'])
-                        result['evaluation_criteria'] = json.loads(result['evaluation_criteria'])
-                    return result
+                    if result and updated and not result['is_completed']:
+                        cursor.execute(
+                            f"INSERT INTO Interview ({columns}) "
+                            f"SELECT {columns} FROM InterviewArchive WHERE interview_id = %s",
+                            (result['interview_id'],)
+                        )
+                        cursor.execute("DELETE FROM InterviewArchive WHERE interview_id = %s", (result['interview_id'],))
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
         finally:
             connection.close()
 
+        if not result:
+            return None
+        if not updated:
+            raise VersionConflictError(where['interview_id'], expected_version, result['version'])
+
+        # Parse JSON strings back into Python objects
+        result['questions'] = json.loads(result['questions'])
+        result['evaluation_criteria'] = json.loads(result['evaluation_criteria'])
+        return result
+
+    @timed(mysql_query_seconds.labels("update_interview"))
+    async def update_interview(self, interview_id: int, update_data: dict):
+        return self._conditional_update({"interview_id": interview_id}, update_data)
+
+    @timed(mysql_query_seconds.labels("delete_interview"))
     async def delete_interview(self, interview_id: int) -> bool:
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
                 cursor.execute("DELETE FROM Interview WHERE interview_id = %s", (interview_id,))
                 success = cursor.rowcount > 0
+                if not success:
+                    cursor.execute("DELETE FROM InterviewArchive WHERE interview_id = %s", (interview_id,))
+                    success = cursor.rowcount > 0
+                if success:
+                    cursor.execute("DELETE FROM TranscriptTurn WHERE interview_id = %s", (interview_id,))
+                    cursor.execute("DELETE FROM DialAttempt WHERE interview_id = %s", (interview_id,))
+                    cursor.execute("DELETE FROM Evaluation WHERE interview_id = %s", (interview_id,))
+                    cursor.execute("DELETE FROM EvaluationScore WHERE interview_id = %s", (interview_id,))
             connection.commit()
             return success
         finally:
             connection.close()
 
+    @timed(mysql_query_seconds.labels("get_interviews_by_phone"))
     async def get_interviews_by_phone(self, phone_number: str):
-        connection = self._get_connection()
+        # Includes archived interviews, which the ATS keeps polling for after completion
+        columns = ", ".join(INTERVIEW_COLUMNS)
+        connection = self._get_connection(read_only=True)
         try:
             with connection.cursor() as cursor:
-                cursor.execute("SELECT * FROM Interview WHERE phone_number = %s", (phone_number,))
+                cursor.execute(
+                    f"SELECT {columns} FROM Interview WHERE phone_number = %s "
+                    f"UNION ALL SELECT {columns} FROM InterviewArchive WHERE phone_number = %s "
+                    "ORDER BY interview_id",
+                    (phone_number, phone_number)
+                )
                 results = cursor.fetchall()
                 for result in results:
                     result['questions'] = json.loads(result['questions'])
@@ -169,37 +519,511 @@ class MySQLService:
         finally:
             connection.close()
     
+    @timed(mysql_query_seconds.labels("update_interview_by_job_id"))
     async def update_interview_by_job_id(self, job_id: str, interview_id: int, update_data: dict):
+        return self._conditional_update({"interview_id": interview_id, "job_id": job_id}, update_data)
+
+    def _upsert_call_trace(self, trace: dict):
         connection = self._get_connection()
         try:
             with connection.cursor() as cursor:
-                # Convert questions and evaluation_criteria to JSON strings if present
-                if 'questions' in update_data:
-                    update_data['questions'] = json.dumps(update_data['questions'])
-                if 'evaluation_criteria' in update_data:
-                    update_data['evaluation_criteria'] = json.dumps(update_data['evaluation_criteria'])
+                cursor.execute(
+                    """
+                    INSERT INTO CallTrace (call_uuid, interview_id, started_at, dropped, events)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        interview_id = VALUES(interview_id), started_at = VALUES(started_at),
+                        dropped = VALUES(dropped), events = VALUES(events)
+                    """,
+                    (
+                        trace['call_uuid'],
+                        trace['interview_id'],
+                        datetime.fromisoformat(trace['started_at']).replace(tzinfo=None),
+                        trace['dropped'],
+                        json.dumps(trace['events'])
+                    )
+                )
+            connection.commit()
+        finally:
+            connection.close()
 
-                # Build the UPDATE query dynamically based on provided fields
-                set_clause = ", ".join([f"{k} = %s" for k in update_data.keys()])
-                values = list(update_data.values())
-                
-                sql = f"UPDATE Interview SET {set_clause} WHERE interview_id = %s AND job_id = %s"
-                values.append(interview_id)  # Add interview_id to values list
-                values.append(job_id)  # Add job_id to values list
-                cursor.execute(sql, values)
-                connection.commit()
-                
-                if cursor.rowcount > 0:
-                    # Get the updated record
-                    cursor.execute("SELECT * FROM Interview WHERE interview_id = %s AND job_id = %s", (interview_id, job_id))
-                    result = cursor.fetchone()
-                    if result:
-                        # Parse JSON strings back into Python objects
-                        result['questions'] = json.loads(result['questions'])
-                        result['evaluation_criteria'] = json.loads(result['evaluation_criteria'])
-                    return result
-                connection.commit()
+    @timed(mysql_query_seconds.labels("upsert_call_trace"))
+    async def upsert_call_trace(self, trace: dict):
+        """Store a call timeline off the event loop so call teardown doesn't stall other calls"""
+        await asyncio.to_thread(self._upsert_call_trace, trace)
+
+    @timed(mysql_query_seconds.labels("get_call_trace"))
+    async def get_call_trace(self, call_uuid: str):
+        connection = self._get_connection(read_only=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM CallTrace WHERE call_uuid = %s", (call_uuid,))
+                result = cursor.fetchone()
+                if result:
+                    result['events'] = json.loads(result['events'])
+                return result
         finally:
             connection.close()
 
-mysql_service = MySQLService()
\ No newline at end of file
+    def _append_transcript_turns(self, rows: list):
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                # IGNORE makes a retried batch harmless: (call_uuid, seq) is unique
+                cursor.executemany(
+                    """
+                    INSERT IGNORE INTO TranscriptTurn (interview_id, call_uuid, seq, role, text, t_ms, tokens)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """,
+                    rows
+                )
+            connection.commit()
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("append_transcript_turns"))
+    async def append_transcript_turns(self, rows: list):
+        """Insert a batch of (interview_id, call_uuid, seq, role, text, t_ms, tokens) rows off the event loop"""
+        await asyncio.to_thread(self._append_transcript_turns, rows)
+
+    @timed(mysql_query_seconds.labels("get_transcript_turns"))
+    async def get_transcript_turns(self, interview_id: int, read_only: bool = True):
+        connection = self._get_connection(read_only=read_only)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT call_uuid, seq, role, text, t_ms, tokens, created_at FROM TranscriptTurn "
+                    "WHERE interview_id = %s ORDER BY turn_id",
+                    (interview_id,)
+                )
+                return cursor.fetchall()
+        finally:
+            connection.close()
+
+    def _upsert_evaluation(self, evaluation: dict):
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO Evaluation (interview_id, job_id, phone_number, final_score, criteria)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        job_id = VALUES(job_id), phone_number = VALUES(phone_number),
+                        final_score = VALUES(final_score), criteria = VALUES(criteria)
+                    """,
+                    (
+                        evaluation['interview_id'],
+                        evaluation['job_id'],
+                        evaluation['phone_number'],
+                        evaluation['final_score'],
+                        json.dumps(evaluation['criteria'])
+                    )
+                )
+                # A re-evaluation replaces the criterion scores of the previous one
+                cursor.execute("DELETE FROM EvaluationScore WHERE interview_id = %s", (evaluation['interview_id'],))
+                if evaluation['scores']:
+                    cursor.executemany(
+                        "INSERT INTO EvaluationScore (interview_id, criterion, job_id, score) VALUES (%s, %s, %s, %s)",
+                        [
+                            (evaluation['interview_id'], criterion, evaluation['job_id'], score)
+                            for criterion, score in evaluation['scores'].items()
+                        ]
+                    )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("upsert_evaluation"))
+    async def upsert_evaluation(self, evaluation: dict):
+        """Store an interview's evaluation and its per-criterion scores in one transaction"""
+        await asyncio.to_thread(self._upsert_evaluation, evaluation)
+
+    def _job_ranking(self, job_id: str, limit: int, criterion: Optional[str]):
+        if criterion is None:
+            query = (
+                "SELECT interview_id, phone_number, final_score, NULL AS score, evaluated_at FROM Evaluation "
+                "WHERE job_id = %s ORDER BY final_score DESC, interview_id DESC LIMIT %s"
+            )
+            params = (job_id, limit)
+        else:
+            query = (
+                "SELECT s.interview_id, e.phone_number, e.final_score, s.score, e.evaluated_at "
+                "FROM EvaluationScore s JOIN Evaluation e ON e.interview_id = s.interview_id "
+                "WHERE s.job_id = %s AND s.criterion = %s ORDER BY s.score DESC, s.interview_id DESC LIMIT %s"
+            )
+            params = (job_id, criterion, limit)
+        connection = self._get_connection(read_only=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("get_job_ranking"))
+    async def get_job_ranking(self, job_id: str, limit: int, criterion: Optional[str] = None):
+        """Top evaluations of a job by final score, or by one criterion's score.
+
+        Both queries walk their (job_id, ..., score, interview_id) index backwards and stop
+        after limit rows, so the cost doesn't grow with the number of interviews in the job.
+        """
+        return await asyncio.to_thread(self._job_ranking, job_id, limit, criterion)
+
+    def _execute(self, query: str, params: tuple = ()) -> int:
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                affected = cursor.rowcount
+            connection.commit()
+            return affected
+        finally:
+            connection.close()
+
+    def _fetch_all(self, query: str, params: tuple = ()):
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("upsert_node"))
+    async def upsert_node(self, node: dict):
+        """Publish a node's load; updated_at is set by the database so nodes share one clock"""
+        await asyncio.to_thread(
+            self._execute,
+            """
+            INSERT INTO Node (node_id, host, active_calls, capacity, loop_lag_ms, updated_at)
+            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP(3))
+            ON DUPLICATE KEY UPDATE
+                host = VALUES(host), active_calls = VALUES(active_calls), capacity = VALUES(capacity),
+                loop_lag_ms = VALUES(loop_lag_ms), updated_at = VALUES(updated_at)
+            """,
+            (node['node_id'], node['host'], node['active_calls'], node['capacity'], node['loop_lag_ms'])
+        )
+
+    @timed(mysql_query_seconds.labels("get_fresh_nodes"))
+    async def get_fresh_nodes(self, max_age_seconds: float):
+        """Nodes whose last heartbeat is at most max_age_seconds old"""
+        return await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT node_id, host, active_calls, capacity, loop_lag_ms FROM Node "
+            "WHERE updated_at >= CURRENT_TIMESTAMP(3) - INTERVAL %s MICROSECOND",
+            (int(max_age_seconds * 1_000_000),)
+        )
+
+    @timed(mysql_query_seconds.labels("delete_node"))
+    async def delete_node(self, node_id: str):
+        await asyncio.to_thread(self._execute, "DELETE FROM Node WHERE node_id = %s", (node_id,))
+
+    @timed(mysql_query_seconds.labels("add_node_call"))
+    async def add_node_call(self, node_id: str):
+        """Count a call placed on a node until its next heartbeat reports the real number"""
+        await asyncio.to_thread(
+            self._execute, "UPDATE Node SET active_calls = active_calls + 1 WHERE node_id = %s", (node_id,)
+        )
+
+    def _claim_call_route(self, call_uuid: str, node_id: str) -> str:
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT IGNORE INTO CallRoute (call_uuid, node_id) VALUES (%s, %s)",
+                    (call_uuid, node_id)
+                )
+                cursor.execute("SELECT node_id FROM CallRoute WHERE call_uuid = %s", (call_uuid,))
+                result = cursor.fetchone()
+            connection.commit()
+            return result['node_id']
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("claim_call_route"))
+    async def claim_call_route(self, call_uuid: str, node_id: str) -> str:
+        """Route a call to node_id unless it is already routed; returns the node that owns the call"""
+        return await asyncio.to_thread(self._claim_call_route, call_uuid, node_id)
+
+    @timed(mysql_query_seconds.labels("get_call_route"))
+    async def get_call_route(self, call_uuid: str):
+        rows = await asyncio.to_thread(
+            self._fetch_all, "SELECT node_id FROM CallRoute WHERE call_uuid = %s", (call_uuid,)
+        )
+        return rows[0]['node_id'] if rows else None
+
+    @timed(mysql_query_seconds.labels("set_call_route"))
+    async def set_call_route(self, call_uuid: str, node_id: str):
+        """Move a call to another node, e.g. when the node it was routed to has gone away"""
+        await asyncio.to_thread(
+            self._execute, "UPDATE CallRoute SET node_id = %s WHERE call_uuid = %s", (node_id, call_uuid)
+        )
+
+    @timed(mysql_query_seconds.labels("delete_call_routes_before"))
+    async def delete_call_routes_before(self, cutoff) -> int:
+        return await asyncio.to_thread(self._execute, "DELETE FROM CallRoute WHERE created_at < %s", (cutoff,))
+
+    @timed(mysql_query_seconds.labels("upsert_dial_campaign"))
+    async def upsert_dial_campaign(self, campaign: dict):
+        await asyncio.to_thread(
+            self._execute,
+            """
+            INSERT INTO DialCampaign (job_id, calls_per_second, max_concurrent, window_start, window_end, timezone, active)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                calls_per_second = VALUES(calls_per_second), max_concurrent = VALUES(max_concurrent),
+                window_start = VALUES(window_start), window_end = VALUES(window_end),
+                timezone = VALUES(timezone), active = VALUES(active)
+            """,
+            (
+                campaign['job_id'], campaign['calls_per_second'], campaign['max_concurrent'],
+                campaign['window_start'], campaign['window_end'], campaign['timezone'], campaign['active']
+            )
+        )
+
+    @timed(mysql_query_seconds.labels("get_dial_campaigns"))
+    async def get_dial_campaigns(self):
+        return await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT job_id, calls_per_second, max_concurrent, window_start, window_end, timezone, active FROM DialCampaign"
+        )
+
+    @timed(mysql_query_seconds.labels("delete_dial_campaign"))
+    async def delete_dial_campaign(self, job_id: str) -> bool:
+        return await asyncio.to_thread(self._execute, "DELETE FROM DialCampaign WHERE job_id = %s", (job_id,)) > 0
+
+    @timed(mysql_query_seconds.labels("get_dialable_interviews"))
+    async def get_dialable_interviews(self, job_id: str, limit: int):
+        """Pending interviews of a job that were never dialed or are due for a retry, oldest first"""
+        return await asyncio.to_thread(
+            self._fetch_all,
+            """
+            SELECT i.interview_id, i.phone_number FROM Interview i
+            LEFT JOIN DialAttempt d ON d.interview_id = i.interview_id
+            WHERE i.job_id = %s AND i.is_completed = 0
+                AND (d.interview_id IS NULL OR (d.status = 'retry' AND d.next_attempt_at <= CURRENT_TIMESTAMP))
+            ORDER BY i.interview_id LIMIT %s
+            """,
+            (job_id, limit)
+        )
+
+    def _claim_dial_attempt(self, interview_id: int, job_id: str):
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT IGNORE INTO DialAttempt (interview_id, job_id, attempts, status) VALUES (%s, %s, 1, 'dialing')",
+                    (interview_id, job_id)
+                )
+                if cursor.rowcount:
+                    attempt = 1
+                else:
+                    cursor.execute(
+                        "UPDATE DialAttempt SET attempts = attempts + 1, status = 'dialing', request_uuid = NULL "
+                        "WHERE interview_id = %s AND status = 'retry' AND next_attempt_at <= CURRENT_TIMESTAMP",
+                        (interview_id,)
+                    )
+                    attempt = None
+                    if cursor.rowcount:
+                        cursor.execute("SELECT attempts FROM DialAttempt WHERE interview_id = %s", (interview_id,))
+                        attempt = cursor.fetchone()['attempts']
+            connection.commit()
+            return attempt
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("claim_dial_attempt"))
+    async def claim_dial_attempt(self, interview_id: int, job_id: str):
+        """Mark an interview as being dialed; returns the attempt number, or None if it is not due"""
+        return await asyncio.to_thread(self._claim_dial_attempt, interview_id, job_id)
+
+    @timed(mysql_query_seconds.labels("set_dial_request"))
+    async def set_dial_request(self, interview_id: int, request_uuid: str):
+        await asyncio.to_thread(
+            self._execute, "UPDATE DialAttempt SET request_uuid = %s WHERE interview_id = %s", (request_uuid, interview_id)
+        )
+
+    @timed(mysql_query_seconds.labels("get_dial_by_request"))
+    async def get_dial_by_request(self, request_uuid: str):
+        """The dial attempt a Plivo request belongs to, from any worker"""
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            "SELECT interview_id, job_id, attempts, status FROM DialAttempt WHERE request_uuid = %s",
+            (request_uuid,)
+        )
+        return rows[0] if rows else None
+
+    @timed(mysql_query_seconds.labels("get_dial_states"))
+    async def get_dial_states(self, interview_ids: list) -> dict:
+        """Status and request_uuid of the given dial attempts, by interview_id"""
+        placeholders = ", ".join(["%s"] * len(interview_ids))
+        rows = await asyncio.to_thread(
+            self._fetch_all,
+            f"SELECT interview_id, status, request_uuid FROM DialAttempt WHERE interview_id IN ({placeholders})",
+            tuple(interview_ids)
+        )
+        return {row['interview_id']: row for row in rows}
+
+    @timed(mysql_query_seconds.labels("mark_dial_connected"))
+    async def mark_dial_connected(self, request_uuid: str) -> bool:
+        return await asyncio.to_thread(
+            self._execute,
+            "UPDATE DialAttempt SET status = 'connected' WHERE request_uuid = %s AND status = 'dialing'",
+            (request_uuid,)
+        ) > 0
+
+    @timed(mysql_query_seconds.labels("finish_dial_attempt"))
+    async def finish_dial_attempt(
+        self, interview_id: int, status: str, retry_after_seconds: Optional[float] = None, request_uuid: Optional[str] = None
+    ) -> bool:
+        """Record the outcome of a dial; retries become due retry_after_seconds from now.
+
+        With request_uuid, only that request's attempt is updated, and only while it is still
+        in progress, so a repeated callback is a no-op. Returns whether the attempt was updated.
+        """
+        seconds = None if retry_after_seconds is None else int(retry_after_seconds)
+        query = (
+            "UPDATE DialAttempt SET status = %s, "
+            "next_attempt_at = IF(%s IS NULL, NULL, CURRENT_TIMESTAMP + INTERVAL %s SECOND) "
+            "WHERE interview_id = %s"
+        )
+        params = (status, seconds, seconds, interview_id)
+        if request_uuid is not None:
+            query += " AND request_uuid = %s AND status IN ('dialing', 'connected')"
+            params += (request_uuid,)
+        return await asyncio.to_thread(self._execute, query, params) > 0
+
+    @timed(mysql_query_seconds.labels("release_stale_dial_attempts"))
+    async def release_stale_dial_attempts(self, max_age_seconds: float, max_attempts: int) -> int:
+        """Dials whose outcome never arrived, e.g. because the dialer restarted, become due again"""
+        return await asyncio.to_thread(
+            self._execute,
+            "UPDATE DialAttempt SET status = IF(attempts >= %s, 'exhausted', 'retry'), next_attempt_at = CURRENT_TIMESTAMP "
+            "WHERE status IN ('dialing', 'connected') AND updated_at < CURRENT_TIMESTAMP - INTERVAL %s SECOND",
+            (max_attempts, int(max_age_seconds))
+        )
+
+    def _acquire_lease(self, name: str, holder: str, ttl_seconds: float) -> bool:
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                # Assignments apply left to right: expires_at only moves when holder is ours after the first one
+                cursor.execute(
+                    "INSERT INTO DialerLease (name, holder, expires_at) "
+                    "VALUES (%s, %s, CURRENT_TIMESTAMP(3) + INTERVAL %s MICROSECOND) "
+                    "ON DUPLICATE KEY UPDATE "
+                    "holder = IF(holder = VALUES(holder) OR expires_at < CURRENT_TIMESTAMP(3), VALUES(holder), holder), "
+                    "expires_at = IF(holder = VALUES(holder), VALUES(expires_at), expires_at)",
+                    (name, holder, int(ttl_seconds * 1e6))
+                )
+                cursor.execute("SELECT holder FROM DialerLease WHERE name = %s", (name,))
+                acquired = cursor.fetchone()['holder'] == holder
+            connection.commit()
+            return acquired
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("acquire_dialer_lease"))
+    async def acquire_dialer_lease(self, holder: str, ttl_seconds: float) -> bool:
+        """Take or renew the dialer lease for ttl_seconds; False while another live holder has it"""
+        return await asyncio.to_thread(self._acquire_lease, "dialer", holder, ttl_seconds)
+
+    @timed(mysql_query_seconds.labels("release_dialer_lease"))
+    async def release_dialer_lease(self, holder: str):
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM DialerLease WHERE name = 'dialer' AND holder = %s", (holder,)
+        )
+
+    def _dial_progress(self, job_id: str) -> dict:
+        connection = self._get_connection(read_only=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT status, COUNT(*) AS count FROM DialAttempt WHERE job_id = %s GROUP BY status",
+                    (job_id,)
+                )
+                progress = {row['status']: row['count'] for row in cursor.fetchall()}
+                cursor.execute(
+                    "SELECT COUNT(*) AS count FROM Interview i "
+                    "LEFT JOIN DialAttempt d ON d.interview_id = i.interview_id "
+                    "WHERE i.job_id = %s AND i.is_completed = 0 AND d.interview_id IS NULL",
+                    (job_id,)
+                )
+                progress['not_dialed'] = cursor.fetchone()['count']
+                return progress
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("get_dial_progress"))
+    async def get_dial_progress(self, job_id: str) -> dict:
+        """Count a job's interviews by dialing status, plus pending interviews never dialed"""
+        return await asyncio.to_thread(self._dial_progress, job_id)
+
+    def _archive_batch(self, cutoff, batch_size: int) -> int:
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT interview_id FROM Interview "
+                    "WHERE is_completed = 1 AND created_at < %s "
+                    "ORDER BY interview_id LIMIT %s FOR UPDATE",
+                    (cutoff, batch_size)
+                )
+                ids = [row['interview_id'] for row in cursor.fetchall()]
+                if not ids:
+                    connection.rollback()
+                    return 0
+
+                columns = ", ".join(INTERVIEW_COLUMNS)
+                placeholders = ", ".join(["%s"] * len(ids))
+                cursor.execute(
+                    f"INSERT IGNORE INTO InterviewArchive ({columns}) "
+                    f"SELECT {columns} FROM Interview WHERE interview_id IN ({placeholders})",
+                    ids
+                )
+                cursor.execute(f"DELETE FROM Interview WHERE interview_id IN ({placeholders})", ids)
+                moved = cursor.rowcount
+            connection.commit()
+            return moved
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("archive_completed_interviews"))
+    async def archive_completed_interviews(self, cutoff, batch_size: int) -> int:
+        """Move one batch of completed interviews created before cutoff into InterviewArchive.
+
+        The copy and delete run in a single transaction so a row is never visible in both
+        tables or in neither. Returns the number of rows moved.
+        """
+        return await asyncio.to_thread(self._archive_batch, cutoff, batch_size)
+
+    def _oldest_archivable(self, cutoff):
+        connection = self._get_connection()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT MIN(created_at) AS oldest FROM Interview WHERE is_completed = 1 AND created_at < %s",
+                    (cutoff,)
+                )
+                result = cursor.fetchone()
+                return result['oldest'] if result else None
+        finally:
+            connection.close()
+
+    @timed(mysql_query_seconds.labels("get_oldest_archivable"))
+    async def get_oldest_archivable(self, cutoff):
+        """Return created_at of the oldest completed interview still waiting to be archived"""
+        return await asyncio.to_thread(self._oldest_archivable, cutoff)
+
+if settings.PROVIDER_MODE == "fake":
+    from app.services.fakes import InMemoryMySQLService
+    mysql_service = InMemoryMySQLService()
+else:
+    mysql_service = MySQLService()
\ No newline at end of file
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.loop_monitor import loop_monitor
+from app.services.admission import admission_controller
+from app.services.mysql import mysql_service
+
+class NodeRegistry:
+    """Places call streams on the least-loaded healthy node of the pool.
+
+    Every node publishes its call count and loop lag to the Node table on each
+    heartbeat and keeps a snapshot of the fresh nodes, so placing a call reads no
+    node state from the database. A node is healthy when its heartbeat is recent,
+    it has free capacity and its loop lag is under NODE_MAX_LOOP_LAG_MS. The first
+    placement of a call is recorded in CallRoute, and later webhooks for the same
+    call go to the same node while it is alive.
+
+    Plivo reaches a node through its host alone, so every node needs a
+    NODE_PUBLIC_HOST of its own: run one worker per host, or give each worker a
+    host or port that routes only to it. register() refuses to start otherwise.
+    """
+    def __init__(self):
+        self.enabled = settings.NODE_REGISTRY_ENABLED
+        self.node_id = settings.NODE_ID or f"{socket.gethostname()}-{os.getpid()}"
+        self.host = settings.NODE_PUBLIC_HOST
+        self.nodes: Dict[str, Dict] = {}
+        self.task: Optional[asyncio.Task] = None
+        self._loop_lag_ms = 0.0
+
+    def _local_status(self) -> Dict:
+        status = admission_controller.get_status()
+        return {
+            "node_id": self.node_id,
+            "host": self.host,
+            "active_calls": status["active"] + status["reserved"],
+            # A draining node advertises no capacity so no new calls are placed on it
+            "capacity": 0 if status["draining"] else status["capacity"],
+            "loop_lag_ms": self._loop_lag_ms
+        }
+
+    async def heartbeat(self):
+        self._loop_lag_ms = round(loop_monitor.take_recent_lag() * 1000, 1)
+        await mysql_service.upsert_node(self._local_status())
+        nodes = await mysql_service.get_fresh_nodes(settings.NODE_STALE_SECONDS)
+        self.nodes = {node["node_id"]: node for node in nodes}
+
+    async def _host_taken(self) -> bool:
+        await mysql_service.upsert_node(self._local_status())
+        nodes = await mysql_service.get_fresh_nodes(settings.NODE_STALE_SECONDS)
+        return any(node["host"] == self.host and node["node_id"] != self.node_id for node in nodes)
+
+    async def register(self):
+        """Join the pool; raises if no NODE_PUBLIC_HOST is set or another live node uses it"""
+        if not self.host:
+            raise RuntimeError("NODE_REGISTRY_ENABLED requires NODE_PUBLIC_HOST, a host[:port] that reaches only this worker")
+        if await self._host_taken():
+            # It may be this host's previous process, which goes stale after NODE_STALE_SECONDS
+            await asyncio.sleep(settings.NODE_STALE_SECONDS)
+            if await self._host_taken():
+                await mysql_service.delete_node(self.node_id)
+                raise RuntimeError(
+                    f"Another live node uses NODE_PUBLIC_HOST {self.host}; streams placed on either would "
+                    "reach whichever worker the load balancer picks"
+                )
+        await self.heartbeat()
+
+    async def _run_forever(self):
+        beats = 0
+        while True:
+            try:
+                await self.heartbeat()
+                beats += 1
+                # Routes are only needed while a call can still reconnect
+                if beats % 100 == 0:
+                    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=settings.CALL_ROUTE_TTL_SECONDS)
+                    await mysql_service.delete_call_routes_before(cutoff)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error publishing node status: {str(e)}")
+            await asyncio.sleep(settings.NODE_HEARTBEAT_SECONDS)
+
+    def _healthy(self, node: Dict) -> bool:
+        return node["active_calls"] < node["capacity"] and node["loop_lag_ms"] <= settings.NODE_MAX_LOOP_LAG_MS
+
+    def _candidates(self) -> List[Dict]:
+        # This node's own entry is refreshed on the spot; the others are as of the last heartbeat
+        nodes = {**self.nodes, self.node_id: self._local_status()}
+        return [node for node in nodes.values() if self._healthy(node)]
+
+    def free_capacity(self) -> int:
+        """Calls the healthy nodes of the pool can still take, as of the last heartbeat"""
+        return sum(node["capacity"] - node["active_calls"] for node in self._candidates())
+
+    async def place(self, call_uuid: str) -> Optional[Dict]:
+        """Pick the node for a call's stream, or None when every node is full or unhealthy"""
+        candidates = self._candidates()
+        chosen = None
+        if candidates:
+            chosen = min(candidates, key=lambda node: (node["active_calls"] / node["capacity"], node["loop_lag_ms"]))
+            owner_id = await mysql_service.claim_call_route(call_uuid, chosen["node_id"])
+        else:
+            owner_id = await mysql_service.get_call_route(call_uuid)
+
+        # A call that was already placed stays on its node, even a full one, while that node is alive
+        if owner_id is not None and (chosen is None or owner_id != chosen["node_id"]):
+            owner = self._local_status() if owner_id == self.node_id else self.nodes.get(owner_id)
+            if owner is not None:
+                return owner
+            if chosen is not None:
+                await mysql_service.set_call_route(call_uuid, chosen["node_id"])
+        if chosen is None:
+            return None
+
+        if chosen["node_id"] != self.node_id:
+            # Count the call against the node now, so a burst doesn't pile onto it before its next heartbeat
+            chosen["active_calls"] += 1
+            await mysql_service.add_node_call(chosen["node_id"])
+        return chosen
+
+    def is_local(self, node: Dict) -> bool:
+        return node["node_id"] == self.node_id
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        try:
+            await mysql_service.delete_node(self.node_id)
+        except Exception as e:
+            logger.error(f"Error removing node from registry: {str(e)}")
+
+    def get_status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "node_id": self.node_id,
+            "local": self._local_status(),
+            "nodes": list(self.nodes.values())
+        }
+
+node_registry = NodeRegistry()
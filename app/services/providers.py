@@ -0,0 +1,116 @@
+"""Clients of external providers, built on first use.
+
+Importing the provider SDKs (LangChain/OpenAI, ElevenLabs, Deepgram) is most of the
+app's import time, so nothing here is imported or constructed until a client is first
+asked for. warm_up() builds the clients the call path needs during startup, so the
+first call doesn't pay for it. A provider whose key is missing is reported by warm_up()
+and only fails when it is actually used.
+"""
+import asyncio
+import importlib
+import threading
+import time
+from functools import wraps
+from typing import Dict
+
+from app.core.config import settings, ModelType
+from app.core.logger import logger
+
+class MissingProviderKeyError(Exception):
+    """A provider was used without its credentials configured"""
+
+def require_setting(name: str) -> str:
+    value = getattr(settings, name)
+    if not value:
+        raise MissingProviderKeyError(f"{name} is not set")
+    return value
+
+def _built_once(build):
+    """Cache a no-argument builder's result; concurrent first calls build it only once.
+
+    lru_cache doesn't hold other callers back while the first one builds, and startup
+    asks for the ElevenLabs client from two threads at once.
+    """
+    lock = threading.Lock()
+    built = []
+
+    @wraps(build)
+    def get():
+        if not built:
+            with lock:
+                if not built:
+                    built.append(build())
+        return built[0]
+    return get
+
+@_built_once
+def get_elevenlabs_client():
+    if settings.PROVIDER_MODE == "fake":
+        from app.services.fakes import FakeElevenLabs
+        return FakeElevenLabs()
+    from elevenlabs.client import ElevenLabs
+    return ElevenLabs(api_key=require_setting("elevenlabs_api_key"))
+
+@_built_once
+def get_conversation_class():
+    if settings.PROVIDER_MODE == "fake":
+        from app.services.fakes import FakeConversation
+        return FakeConversation
+    from elevenlabs.conversational_ai.conversation import Conversation
+    return Conversation
+
+@_built_once
+def get_chat_model():
+    if settings.PROVIDER_MODE == "fake":
+        from app.services.fakes import FakeChatModel
+        return FakeChatModel()
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=ModelType.GPT4O,
+        openai_api_key=require_setting("openai_api_key")
+    )
+
+@_built_once
+def get_deepgram_client():
+    from deepgram import DeepgramClient, DeepgramClientOptions
+    return DeepgramClient(require_setting("deepgram_api_key"), DeepgramClientOptions(
+        options={"keepalive": "true"}
+    ))
+
+# Modules the call path imports on first use
+_CALL_PATH_MODULES = ("plivo", "langchain_core.messages", "app.services.audio.plivo_audio")
+
+def _import_call_path():
+    for module in _CALL_PATH_MODULES:
+        importlib.import_module(module)
+
+_WARM_UP_STEPS = (
+    ("elevenlabs", lambda: (get_elevenlabs_client(), get_conversation_class())),
+    ("call_path", _import_call_path),
+    ("openai", get_chat_model),
+)
+
+# Seconds each warm-up step took, or None if it failed
+warm_up_seconds: Dict[str, float] = {}
+
+def _warm_up():
+    for name, build in _WARM_UP_STEPS:
+        started = time.perf_counter()
+        try:
+            build()
+            warm_up_seconds[name] = round(time.perf_counter() - started, 3)
+        except MissingProviderKeyError as e:
+            warm_up_seconds[name] = None
+            logger.error(f"Provider {name} is not configured: {e}")
+        except Exception as e:
+            warm_up_seconds[name] = None
+            logger.error(f"Error initializing provider {name}: {e}")
+
+async def warm_up():
+    """Import and build the call path's provider clients in a worker thread.
+
+    The steps run one after another in a single thread, while the event loop stays free
+    for other startup work. Other threads may ask for the same clients meanwhile, like
+    the overload prompt render does; each client is still built only once.
+    """
+    await asyncio.to_thread(_warm_up)
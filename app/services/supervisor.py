@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.metrics import calls_reclaimed_total
+
+class CallSupervisor:
+    """Reclaims calls whose media stream has gone quiet or that have run too long.
+
+    Plivo sends a media frame every 20 ms for as long as the call leg is up, silence
+    included, so a stream with no inbound frames for MAX_INBOUND_SILENCE_SECONDS has
+    lost its carrier leg even if the websocket still looks open. Such calls, and calls
+    past MAX_CALL_DURATION_SECONDS, are terminated, which sends them down the normal
+    cleanup path. Dead TCP connections are caught earlier by the server's websocket
+    pings (WS_PING_INTERVAL_SECONDS).
+    """
+    def __init__(self):
+        self.sessions: Set = set()
+        self.task: Optional[asyncio.Task] = None
+        self.reclaimed = 0
+
+    def register(self, session):
+        self.sessions.add(session)
+
+    def unregister(self, session):
+        self.sessions.discard(session)
+
+    def check(self):
+        now = time.monotonic()
+        for session in list(self.sessions):
+            if now - session.started_at > settings.MAX_CALL_DURATION_SECONDS:
+                reason = "max_call_duration"
+            elif now - session.last_inbound_at > settings.MAX_INBOUND_SILENCE_SECONDS:
+                reason = "inbound_silence"
+            else:
+                continue
+            self.unregister(session)
+            self.reclaimed += 1
+            calls_reclaimed_total.labels(reason).inc()
+            session.terminate(reason)
+
+    def terminate_all(self, reason: str):
+        for session in list(self.sessions):
+            self.unregister(session)
+            self.reclaimed += 1
+            calls_reclaimed_total.labels(reason).inc()
+            session.terminate(reason)
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(settings.SUPERVISOR_INTERVAL_SECONDS)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Error supervising calls: {str(e)}")
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def get_status(self) -> Dict:
+        return {"supervised": len(self.sessions), "reclaimed": self.reclaimed}
+
+call_supervisor = CallSupervisor()
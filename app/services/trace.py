@@ -0,0 +1,81 @@
+import itertools
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.mysql import mysql_service
+
+class CallTrace:
+    """Fixed-size ring buffer of timestamped events for a single call.
+
+    Slots are allocated once up front. Recording an event writes three slots and takes
+    its index from an itertools counter, which is atomic under the GIL, so the event
+    loop and the ElevenLabs threads can record concurrently without a lock. When the
+    buffer wraps, the oldest events are overwritten and counted as dropped.
+    """
+    __slots__ = ("call_uuid", "interview_id", "started_at", "_origin", "_capacity", "_seq", "_times", "_events", "_details")
+
+    def __init__(self, call_uuid: Optional[str], capacity: int = settings.CALL_TRACE_CAPACITY):
+        self.call_uuid = call_uuid
+        self.interview_id = None
+        self.started_at = datetime.now(timezone.utc)
+        self._origin = time.monotonic()
+        self._capacity = capacity
+        self._seq = itertools.count()
+        self._times = [0.0] * capacity
+        self._events = [None] * capacity
+        self._details = [None] * capacity
+
+    def record(self, event: str, detail=None):
+        slot = next(self._seq) % self._capacity
+        self._times[slot] = time.monotonic()
+        self._events[slot] = event
+        self._details[slot] = detail
+
+    def to_dict(self) -> Dict:
+        # Reading the counter advances it, so put it back where it was
+        total = next(self._seq)
+        self._seq = itertools.count(total)
+        count = min(total, self._capacity)
+        first = total - count
+        events = []
+        for seq in range(first, total):
+            slot = seq % self._capacity
+            entry = {
+                "t_ms": round((self._times[slot] - self._origin) * 1000, 1),
+                "event": self._events[slot]
+            }
+            if self._details[slot] is not None:
+                entry["detail"] = self._details[slot]
+            events.append(entry)
+        return {
+            "call_uuid": self.call_uuid,
+            "interview_id": self.interview_id,
+            "started_at": self.started_at.isoformat(),
+            "dropped": first,
+            "events": events
+        }
+
+class TraceService:
+    def __init__(self):
+        pass
+
+    async def save(self, trace: CallTrace):
+        """Persist a finished call timeline; called once per call"""
+        if not trace.call_uuid:
+            return
+        try:
+            await mysql_service.upsert_call_trace(trace.to_dict())
+        except Exception as e:
+            logger.error(f"Error saving call trace: {str(e)}")
+
+    async def get_trace(self, call_uuid: str) -> Optional[Dict]:
+        try:
+            return await mysql_service.get_call_trace(call_uuid)
+        except Exception as e:
+            logger.error(f"Error getting call trace: {str(e)}")
+            raise
+
+trace_service = TraceService()
@@ -0,0 +1,87 @@
+import time
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
+
+HUMAN = "human"
+AI = "ai"
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough for budgeting prompts"""
+    return (len(text) + 3) // 4
+
+class Turn:
+    __slots__ = ("role", "text", "at", "tokens")
+
+    def __init__(self, role: str, text: str, at: float, tokens: int):
+        self.role = role
+        self.text = text
+        self.at = at
+        self.tokens = tokens
+
+class Transcript:
+    """Per-call conversation record used on the call path instead of ChatMessageHistory.
+
+    Each turn is rendered once, when it is added, so appending is O(1). Reading the
+    formatted conversation extends the cached string with the lines added since the
+    last read, so a read after each turn never re-joins the earlier ones. LangChain
+    message objects are only built by to_messages(), at the LLM boundary.
+    """
+    __slots__ = ("turns", "tokens", "lines", "_rendered", "_rendered_lines")
+
+    def __init__(self):
+        self.turns: List[Turn] = []
+        self.tokens = 0
+        self.lines: List[str] = []
+        self._rendered = ""
+        self._rendered_lines = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def _add(self, role: str, text: str) -> int:
+        turn = Turn(role, text, time.monotonic(), estimate_tokens(text))
+        self.turns.append(turn)
+        self.tokens += turn.tokens
+        self.lines.append(f"{role}: {text}")
+        return len(self.turns) - 1
+
+    @property
+    def rendered(self) -> str:
+        """The conversation as "role: text" lines"""
+        if self._rendered_lines != len(self.lines):
+            new_lines = self.lines[self._rendered_lines:]
+            if self._rendered_lines:
+                new_lines.insert(0, self._rendered)
+            self._rendered = "\n".join(new_lines)
+            self._rendered_lines = len(self.lines)
+        return self._rendered
+
+    def add_user_message(self, text: str) -> int:
+        """Append a candidate turn; returns its index"""
+        return self._add(HUMAN, text)
+
+    def add_ai_message(self, text: str) -> int:
+        """Append an agent turn; returns its index"""
+        return self._add(AI, text)
+
+    def clear(self):
+        self.turns = []
+        self.tokens = 0
+        self.lines = []
+        self._rendered = ""
+        self._rendered_lines = 0
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> "Transcript":
+        """Rebuild a transcript from stored turn rows (role and text)"""
+        transcript = cls()
+        for row in rows:
+            transcript._add(row["role"], row["text"])
+        return transcript
+
+    def to_messages(self) -> List["BaseMessage"]:
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        return [HumanMessage(turn.text) if turn.role == HUMAN else AIMessage(turn.text) for turn in self.turns]
@@ -1,6 +1,13 @@
-from langchain_core.messages import SystemMessage
-from langchain_community.chat_message_histories import ChatMessageHistory
+from typing import TYPE_CHECKING
 
-def format_conversation_history(messages: ChatMessageHistory) -> str:
-    return "\n".join([f"{msg.type}: {msg.content}" for msg in messages.messages if not isinstance(msg, SystemMessage)])
+from app.services.transcript import Transcript
+
+if TYPE_CHECKING:
+    from langchain_community.chat_message_histories import ChatMessageHistory
 
+def format_conversation_history(messages: "Transcript | ChatMessageHistory") -> str:
+    if isinstance(messages, Transcript):
+        return messages.rendered
+    from langchain_core.messages import SystemMessage
+
+    return "\n".join([f"{msg.type}: {msg.content}" for msg in messages.messages if not isinstance(msg, SystemMessage)])
@@ -0,0 +1,283 @@
+"""Microbenchmarks for the media, transcript and persistence hot paths.
+
+    python benchmarks/run.py                   # run and compare with the stored baseline
+    python benchmarks/run.py --save-baseline   # store the current numbers as the baseline
+    python benchmarks/run.py --mysql           # include MySQLService CRUD and job ranking against DB_* from .env
+
+Runs offline: provider singletons are built in PROVIDER_MODE=fake, and the MySQL
+benchmarks only run when asked for. Each benchmark reports the best per-op latency
+over several rounds together with ops/s. Any benchmark slower than its baseline by
+more than --threshold fails the run with exit code 1.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("PROVIDER_MODE", "fake")
+os.environ.setdefault("ARCHIVE_ENABLED", "false")
+if not os.path.exists(os.path.join(ROOT, ".env")):
+    # Settings requires the database settings even though offline benchmarks never use them
+    for key in ("DB_NAME", "DB_HOST", "DB_PASSWORD", "DB_USER"):
+        os.environ.setdefault(key, "fake")
+    os.environ.setdefault("DB_PORT", "3306")
+
+FRAME = b"\xff" * 160
+
+class _NullWebSocket:
+    """Accepts sends without doing I/O, so only our own per-frame work is measured"""
+    def __init__(self):
+        from starlette.websockets import WebSocketState
+        self.application_state = WebSocketState.CONNECTED
+        self.client_state = WebSocketState.CONNECTED
+
+    async def send_text(self, data: str):
+        pass
+
+def bench(func: Callable, number: int, rounds: int) -> float:
+    """Best per-op seconds over rounds of number calls"""
+    func()
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+def bench_async(loop: asyncio.AbstractEventLoop, factory: Callable, number: int, rounds: int) -> float:
+    async def run_batch():
+        for _ in range(number):
+            await factory()
+
+    loop.run_until_complete(factory())
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        loop.run_until_complete(run_batch())
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+def media_benchmarks(loop, rounds: int) -> Dict[str, float]:
+    from app.services.audio.plivo_audio import PlivoAudioInterface
+
+    interface = PlivoAudioInterface(_NullWebSocket())
+    interface.streamId = "bench"
+    interface.start(lambda audio: None)
+    message = {"event": "media", "media": {"payload": base64.b64encode(FRAME).decode()}}
+    return {
+        "handle_plivo_message": bench_async(loop, lambda: interface.handle_plivo_message(message), 20000, rounds),
+        "send_audio_to_plivo": bench_async(loop, lambda: interface.send_audio_to_plivo(FRAME), 20000, rounds),
+    }
+
+def transcript_benchmarks(rounds: int) -> Dict[str, float]:
+    from app.services.transcript import Transcript
+    from app.utils.utils import format_conversation_history
+
+    def call_of(turns: int):
+        # The call-end check renders the transcript after every agent turn
+        transcript = Transcript()
+        for i in range(turns):
+            transcript.add_user_message(f"Candidate answer number {i} with a reasonable amount of detail.")
+            transcript.add_ai_message(f"Thanks. Here is interview question number {i + 1}?")
+            format_conversation_history(transcript)
+
+    results = {}
+    for turns in (10, 50, 200):
+        # Per-op time is a whole call of that many turns, each added and then rendered
+        results[f"format_conversation_history[{turns}]"] = bench(lambda: call_of(turns), max(10, 2000 // turns), rounds)
+
+    transcript = Transcript()
+
+    def add_turn():
+        transcript.add_user_message("Candidate answer with a reasonable amount of detail.")
+        if len(transcript) >= 400:
+            transcript.clear()
+    results["Transcript.add_user_message"] = bench(add_turn, 2000, rounds)
+    return results
+
+def schema_benchmarks(rounds: int) -> Dict[str, float]:
+    from datetime import datetime
+    from app.schemas.interview import Interview
+
+    row = {
+        "interview_id": 1,
+        "job_id": "job-1",
+        "phone_number": "+15550000000",
+        "questions": [f"Question {i}?" for i in range(10)],
+        "evaluation_criteria": ["communication", "experience", "motivation"],
+        "interview_language": "en",
+        "evaluation_language": "en",
+        "call_recording_url": None,
+        "is_completed": 0,
+        "created_at": datetime(2025, 1, 1),
+        "version": 1,
+    }
+    return {"Interview.model_validate": bench(lambda: Interview.model_validate(row), 20000, rounds)}
+
+def xml_benchmarks(loop, rounds: int) -> Dict[str, float]:
+    import logging
+    from starlette.requests import Request
+    from app.routers.call import inbound_call
+
+    # Keep the per-call log line from measuring terminal speed
+    logging.getLogger("interview-phone-agent").setLevel(logging.WARNING)
+
+    def make_request():
+        return Request({
+            "type": "http",
+            "method": "GET",
+            "path": "/plivo/inbound_call",
+            "query_string": b"CallUUID=bench-call&From=15550000000",
+            "headers": [(b"host", b"bench.example.com")],
+            "server": ("bench.example.com", 443),
+            "scheme": "https",
+        })
+
+    return {"inbound_call": bench_async(loop, lambda: inbound_call(make_request()), 5000, rounds)}
+
+def mysql_benchmarks(loop, rounds: int) -> Dict[str, float]:
+    from app.schemas.interview import Interview
+    from app.services.mysql import MySQLService
+
+    service = MySQLService()
+    service.initialize()
+    interview = Interview(
+        interview_id=1,
+        job_id="benchmark",
+        phone_number="+10000000000",
+        questions=["Question?"] * 5,
+        evaluation_criteria=["communication"],
+        interview_language="en",
+        evaluation_language="en"
+    )
+
+    async def crud():
+        interview_id = await service.insert_interview(interview)
+        await service.get_interview(interview_id)
+        await service.update_interview(interview_id, {"is_completed": True})
+        await service.delete_interview(interview_id)
+
+    # Everything written here is deleted again, even when a benchmark fails
+    try:
+        seed_ranking(service)
+        return {
+            "mysql_crud_cycle": bench_async(loop, crud, 50, rounds),
+            "mysql_job_ranking[top10]": bench_async(
+                loop, lambda: service.get_job_ranking(RANKING_JOB_ID, 10), 200, rounds
+            ),
+            "mysql_job_ranking[top10,criterion]": bench_async(
+                loop, lambda: service.get_job_ranking(RANKING_JOB_ID, 10, "communication"), 200, rounds
+            ),
+        }
+    finally:
+        clean_up(service, interview.job_id)
+
+RANKING_JOB_ID = "benchmark-ranking"
+RANKING_ROWS = 20000
+RANKING_FIRST_ID = 900000000  # clear of real interview ids
+
+def seed_ranking(service):
+    """Give the ranking benchmark a job with RANKING_ROWS evaluations"""
+    import random
+
+    connection = service._get_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM Evaluation WHERE job_id = %s", (RANKING_JOB_ID,))
+            if cursor.fetchone()["count"] >= RANKING_ROWS:
+                return
+            rng = random.Random(0)
+            ids = range(RANKING_FIRST_ID, RANKING_FIRST_ID + RANKING_ROWS)
+            cursor.executemany(
+                "INSERT IGNORE INTO Evaluation (interview_id, job_id, phone_number, final_score, criteria) "
+                "VALUES (%s, %s, %s, %s, '[]')",
+                [(interview_id, RANKING_JOB_ID, f"+1{interview_id}", rng.randint(0, 100)) for interview_id in ids]
+            )
+            cursor.executemany(
+                "INSERT IGNORE INTO EvaluationScore (interview_id, criterion, job_id, score) VALUES (%s, %s, %s, %s)",
+                [
+                    (interview_id, criterion, RANKING_JOB_ID, rng.randint(0, 100))
+                    for interview_id in ids for criterion in ("communication", "experience", "motivation")
+                ]
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+def clean_up(service, crud_job_id: str):
+    """Delete the seeded evaluations and any interviews a failed CRUD cycle left behind"""
+    connection = service._get_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM EvaluationScore WHERE job_id = %s", (RANKING_JOB_ID,))
+            cursor.execute("DELETE FROM Evaluation WHERE job_id = %s", (RANKING_JOB_ID,))
+            cursor.execute(
+                "DELETE FROM TranscriptTurn WHERE interview_id IN (SELECT interview_id FROM Interview WHERE job_id = %s)",
+                (crud_job_id,)
+            )
+            cursor.execute("DELETE FROM Interview WHERE job_id = %s", (crud_job_id,))
+        connection.commit()
+    finally:
+        connection.close()
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    regressions = []
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        if base and seconds > base * (1 + threshold):
+            regressions.append(f"{name}: {seconds * 1e6:.2f}us vs baseline {base * 1e6:.2f}us")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--mysql", action="store_true", help="include MySQLService CRUD against DB_* settings")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    results: Dict[str, float] = {}
+    results.update(media_benchmarks(loop, args.rounds))
+    results.update(transcript_benchmarks(args.rounds))
+    results.update(schema_benchmarks(args.rounds))
+    results.update(xml_benchmarks(loop, args.rounds))
+    if args.mysql:
+        results.update(mysql_benchmarks(loop, args.rounds))
+    loop.close()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<40} {'per-op':>12} {'ops/s':>12} {'vs baseline':>12}")
+    for name, seconds in results.items():
+        base = baseline.get(name)
+        change = f"{(seconds / base - 1) * 100:+.1f}%" if base else "-"
+        print(f"{name:<40} {seconds * 1e6:>10.2f}us {1 / seconds:>12.0f} {change:>12}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""Cold-start benchmark: import time and time-to-ready of one API worker.
+
+    python benchmarks/startup.py                   # run and compare with the stored baseline
+    python benchmarks/startup.py --save-baseline   # store the current numbers as the baseline
+    python benchmarks/startup.py --live            # use PROVIDER_MODE and credentials from .env
+
+Every run starts fresh interpreters, so nothing is cached between measurements:
+one that only imports manage.py, and one that serves the app with uvicorn and is
+polled until /ready answers 200. By default the worker runs in PROVIDER_MODE=fake,
+which needs no network or database; --live measures the real SDK imports, database
+initialization and overload prompt rendering. The median of --runs cold starts is
+reported and compared with benchmarks/baseline.json like the microbenchmarks.
+"""
+import argparse
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import manage; print(time.perf_counter() - started)"
+
+def _environment(live: bool) -> Dict[str, str]:
+    env = dict(os.environ)
+    # Lets the benchmark read /admin/providers from the worker it starts
+    env.setdefault("ADMIN_TOKEN", secrets.token_urlsafe())
+    if not live:
+        env.update(PROVIDER_MODE="fake", ARCHIVE_ENABLED="false", NODE_REGISTRY_ENABLED="false", DIALER_ENABLED="false")
+        if not os.path.exists(os.path.join(ROOT, ".env")):
+            # The database is never contacted in fake mode, but its settings are still required
+            for key in ("DB_NAME", "DB_HOST", "DB_PASSWORD", "DB_USER"):
+                env.setdefault(key, "fake")
+            env.setdefault("DB_PORT", "3306")
+    return env
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import(env: Dict[str, str]) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+def measure_ready(env: Dict[str, str], timeout: float) -> Dict[str, float]:
+    """Seconds from spawning a worker until /ready answers 200, plus its provider warm-up times"""
+    port = _free_port()
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "manage:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    try:
+        while True:
+            if worker.poll() is not None:
+                raise RuntimeError(f"Worker exited during startup: {worker.stderr.read().decode()[-2000:]}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"Worker not ready after {timeout}s")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as response:
+                    if response.status == 200:
+                        ready = time.perf_counter() - started
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/admin/providers", headers={"Authorization": f"Bearer {env['ADMIN_TOKEN']}"}
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            warm_up = json.load(response)
+        return {"ready": ready, **{f"warm_up[{name}]": seconds for name, seconds in warm_up.items() if seconds is not None}}
+    finally:
+        worker.terminate()
+        try:
+            worker.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Worker cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="use PROVIDER_MODE and credentials from .env")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for a worker to become ready")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown before failing")
+    args = parser.parse_args(argv)
+
+    env = _environment(args.live)
+    samples: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        samples.setdefault("import_manage", []).append(measure_import(env))
+        for name, seconds in measure_ready(env, args.timeout).items():
+            samples.setdefault(name, []).append(seconds)
+
+    mode = "live" if args.live else "fake"
+    results = {f"startup.{mode}.{name}": statistics.median(values) for name, values in samples.items()}
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<40} {'median':>10} {'min':>10} {'max':>10} {'vs baseline':>12}")
+    for (name, seconds), values in zip(results.items(), samples.values()):
+        base = baseline.get(name)
+        change = f"{(seconds / base - 1) * 100:+.1f}%" if base else "-"
+        print(f"{name:<40} {seconds * 1e3:>8.0f}ms {min(values) * 1e3:>8.0f}ms {max(values) * 1e3:>8.0f}ms {change:>12}")
+
+    if args.save_baseline:
+        # Only the headline numbers are compared; warm-up steps are for diagnosis
+        baseline.update({name: seconds for name, seconds in results.items() if "warm_up" not in name})
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+
+    regressions = [
+        f"{name}: {seconds * 1e3:.0f}ms vs baseline {baseline[name] * 1e3:.0f}ms"
+        for name, seconds in results.items()
+        if baseline.get(name) and seconds > baseline[name] * (1 + args.threshold)
+    ]
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
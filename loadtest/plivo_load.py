@@ -0,0 +1,266 @@
+"""Synthetic Plivo load test for the /plivo/stream endpoint.
+
+Starts the API in a subprocess with PROVIDER_MODE=fake, then opens N concurrent
+websocket clients that behave like Plivo. Each client answers the call through
+/plivo/inbound_call, sends start/media/stop events, replays mu-law audio at
+real-time 20 ms pacing and times the playAudio frames it gets back.
+
+    python loadtest/plivo_load.py --calls 10 20 40 --duration 30
+
+Each step reports turn-latency and playAudio jitter percentiles, server CPU per
+call and event-loop lag. Event-loop lag is approximated by the round trip of the
+health check endpoint. The largest step within the latency and jitter budgets is
+reported as the maximum sustainable number of calls.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import websockets
+
+FRAME_BYTES = 160
+FRAME_SECONDS = 0.02
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def load_audio(path: Optional[str]) -> bytes:
+    """Raw 8 kHz mu-law audio; one second of silence if no file is given"""
+    if not path:
+        return b"\xff" * (FRAME_BYTES * 50)
+    with open(path, "rb") as f:
+        audio = f.read()
+    if path.endswith(".wav"):
+        audio = audio[44:]  # skip the canonical WAV header
+    return audio
+
+async def http_get(host: str, port: int, path: str) -> float:
+    """Issue a GET request and return its round-trip time in seconds"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return time.perf_counter() - started
+
+class CallResult:
+    def __init__(self):
+        self.turn_latencies: List[float] = []
+        self.jitter: List[float] = []
+        self.first_audio: Optional[float] = None
+        self.frames_received = 0
+        self.error: Optional[str] = None
+
+async def run_call(args, audio: bytes, index: int) -> CallResult:
+    result = CallResult()
+    call_uuid = str(uuid.uuid4())
+    from_number = f"1555{index:07d}"
+    turn_frames = args.turn_frames
+    try:
+        await http_get(args.host, args.port, f"/plivo/inbound_call?CallUUID={call_uuid}&From={from_number}")
+        url = f"ws://{args.host}:{args.port}/plivo/stream?from_number={from_number}&call_uuid={call_uuid}"
+        started = time.perf_counter()
+        async with websockets.connect(url, max_size=None) as ws:
+            turn_sent_at: Dict[str, Optional[float]] = {"at": None}
+
+            async def receive():
+                last_frame = None
+                async for message in ws:
+                    data = json.loads(message)
+                    if data.get("event") != "playAudio":
+                        continue
+                    now = time.perf_counter()
+                    result.frames_received += 1
+                    if result.first_audio is None:
+                        result.first_audio = now - started
+                    if turn_sent_at["at"] is not None:
+                        result.turn_latencies.append(now - turn_sent_at["at"])
+                        turn_sent_at["at"] = None
+                        last_frame = None
+                    # Gaps longer than a pause between replies are not jitter
+                    if last_frame is not None and now - last_frame < 0.5:
+                        result.jitter.append(abs((now - last_frame) - FRAME_SECONDS))
+                    last_frame = now
+
+            receiver = asyncio.create_task(receive())
+            stream_id = str(uuid.uuid4())
+            await ws.send(json.dumps({
+                "event": "start",
+                "start": {"streamId": stream_id, "callId": call_uuid}
+            }))
+
+            # Replay the audio at real-time pacing, looping it for the whole call
+            frame_count = int(args.duration / FRAME_SECONDS)
+            next_frame = time.perf_counter()
+            offset = 0
+            for chunk in range(1, frame_count + 1):
+                frame = audio[offset:offset + FRAME_BYTES]
+                if len(frame) < FRAME_BYTES:
+                    offset = 0
+                    frame = audio[:FRAME_BYTES]
+                offset += FRAME_BYTES
+                await ws.send(json.dumps({
+                    "event": "media",
+                    "streamId": stream_id,
+                    "media": {
+                        "track": "inbound",
+                        "chunk": chunk,
+                        "timestamp": str(int(chunk * FRAME_SECONDS * 1000)),
+                        "payload": base64.b64encode(frame).decode()
+                    }
+                }))
+                # The fake agent treats every turn_frames inbound frames as one answer
+                if chunk % turn_frames == 0:
+                    turn_sent_at["at"] = time.perf_counter()
+                next_frame += FRAME_SECONDS
+                await asyncio.sleep(max(0.0, next_frame - time.perf_counter()))
+
+            await ws.send(json.dumps({"event": "stop", "streamId": stream_id}))
+            receiver.cancel()
+    except websockets.exceptions.ConnectionClosed:
+        # The agent hangs up after its goodbye
+        pass
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+async def probe_loop_lag(args, stop: asyncio.Event, samples: List[float]):
+    while not stop.is_set():
+        try:
+            samples.append(await http_get(args.host, args.port, "/"))
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+
+def read_cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU time of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+async def run_step(args, audio: bytes, calls: int, server_pid: Optional[int]) -> Dict:
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_loop_lag(args, stop, lag_samples))
+    cpu_before = read_cpu_seconds(server_pid) if server_pid else None
+
+    results = await asyncio.gather(*[run_call(args, audio, i) for i in range(calls)])
+
+    stop.set()
+    await prober
+    cpu_after = read_cpu_seconds(server_pid) if server_pid else None
+
+    turns = [latency for r in results for latency in r.turn_latencies]
+    jitter = [j for r in results for j in r.jitter]
+    first_audio = [r.first_audio for r in results if r.first_audio is not None]
+    errors = [r.error for r in results if r.error]
+    cpu_per_call = None
+    if cpu_before is not None and cpu_after is not None:
+        cpu_per_call = (cpu_after - cpu_before) / calls
+
+    # The fake agent waits FAKE_LATENCY_MS before replying, so only time above that is overhead
+    turn_p95 = percentile(turns, 95)
+    jitter_p95 = percentile(jitter, 95)
+    sustainable = (
+        not errors
+        and turn_p95 is not None
+        and turn_p95 - args.fake_latency_ms / 1000 <= args.max_turn_overhead_ms / 1000
+        and (jitter_p95 or 0) <= args.max_jitter_ms / 1000
+    )
+    return {
+        "calls": calls,
+        "errors": len(errors),
+        "turns": len(turns),
+        "turn_p50_ms": _ms(percentile(turns, 50)),
+        "turn_p95_ms": _ms(turn_p95),
+        "turn_p99_ms": _ms(percentile(turns, 99)),
+        "first_audio_p95_ms": _ms(percentile(first_audio, 95)),
+        "jitter_p95_ms": _ms(jitter_p95),
+        "jitter_max_ms": _ms(max(jitter) if jitter else None),
+        "loop_lag_p50_ms": _ms(percentile(lag_samples, 50)),
+        "loop_lag_p99_ms": _ms(percentile(lag_samples, 99)),
+        "cpu_seconds_per_call": round(cpu_per_call, 3) if cpu_per_call is not None else None,
+        "sustainable": sustainable
+    }
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return round(value * 1000, 1) if value is not None else None
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "PROVIDER_MODE": "fake",
+        "FAKE_LATENCY_MS": str(args.fake_latency_ms),
+        "FAKE_TURN_FRAMES": str(args.turn_frames),
+        "ARCHIVE_ENABLED": "false",
+    })
+    # Settings requires the database settings even though the fakes never use them
+    for key in ("DB_NAME", "DB_HOST", "DB_PASSWORD", "DB_USER"):
+        env.setdefault(key, "fake")
+    env.setdefault("DB_PORT", "3306")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "manage:app", "--host", args.host, "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=ROOT,
+        env=env
+    )
+
+async def wait_for_server(args, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await http_get(args.host, args.port, "/")
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+async def main(args):
+    audio = load_audio(args.audio)
+    server = None if args.external else start_server(args)
+    try:
+        await wait_for_server(args)
+        reports = []
+        for calls in args.calls:
+            report = await run_step(args, audio, calls, server.pid if server else args.server_pid)
+            reports.append(report)
+            print(json.dumps(report))
+        sustainable = [r["calls"] for r in reports if r["sustainable"]]
+        print(json.dumps({"max_sustainable_calls": max(sustainable) if sustainable else 0}))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic Plivo media-stream load test")
+    parser.add_argument("--calls", type=int, nargs="+", default=[1, 5, 10, 20], help="concurrent calls per step")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of audio each call streams")
+    parser.add_argument("--audio", help="raw 8 kHz mu-law (or mu-law .wav) file to replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--external", action="store_true", help="test an already running server")
+    parser.add_argument("--server-pid", type=int, help="pid of the external server, for CPU accounting")
+    parser.add_argument("--turn-frames", type=int, default=150, help="inbound frames per candidate answer")
+    parser.add_argument("--fake-latency-ms", type=int, default=300, help="simulated provider latency")
+    parser.add_argument("--max-turn-overhead-ms", type=float, default=250.0)
+    parser.add_argument("--max-jitter-ms", type=float, default=20.0)
+    asyncio.run(main(parser.parse_args()))
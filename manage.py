@@ -1,19 +1,58 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 
 from app.routers.interview import router as interview_router
 from app.routers.call import router as call_router
+from app.routers.admin import router as admin_router
+from app.routers.metrics import router as metrics_router
+from app.routers.monitoring import router as monitoring_router
+from app.core.config import settings
+from app.core.loop_monitor import loop_monitor
 from app.services.mysql import mysql_service
+from app.services.archive import archive_service
+from app.services.admission import admission_controller
+from app.services.nodes import node_registry
+from app.services.supervisor import call_supervisor
+from app.services.drain import drain_service
+from app.services.dialer import outbound_dialer
+from app.services.callRecord import call_record_service
+from app.services import providers
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize services
-    mysql_service.initialize()
+    # Startup: create tables while provider SDKs load and the overload prompt renders
+    loop_monitor.start()
+    await asyncio.gather(
+        asyncio.to_thread(mysql_service.initialize),
+        providers.warm_up(),
+        admission_controller.warm_up()
+    )
+    mysql_service.start()
+    call_supervisor.start()
+    if node_registry.enabled:
+        await node_registry.register()
+        node_registry.start()
+    if settings.ARCHIVE_ENABLED:
+        archive_service.start()
+    if outbound_dialer.enabled:
+        outbound_dialer.start()
+    drain_service.install_signal_handler()
     yield
-    # Shutdown: Clean up resources if needed
-    pass
+    # Shutdown: let calls in progress finish and flush post-call work, then stop background services
+    await drain_service.shutdown()
+    if outbound_dialer.enabled:
+        await outbound_dialer.stop()
+    await archive_service.stop()
+    if node_registry.enabled:
+        await node_registry.stop()
+    await call_supervisor.stop()
+    await mysql_service.stop()
+    await loop_monitor.stop()
+    await call_record_service.close()
 
 # Create FastAPI app
 app = FastAPI(
@@ -35,10 +74,31 @@ app.add_middleware(
 
 app.include_router(interview_router)
 app.include_router(call_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
+app.include_router(monitoring_router)
 
 @app.get("/")
 async def health_check():
     return {"status": "success", "description": "API for managing automated phone interviews"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness for the load balancer; 503 while the worker drains"""
+    if drain_service.draining:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "draining", **drain_service.get_status()}
+        )
+    return {"status": "ready"}
+
 if __name__ == "__main__":
-    uvicorn.run("manage:app", host="0.0.0.0", port=5000, reload=True)
+    uvicorn.run(
+        "manage:app",
+        host="0.0.0.0",
+        port=5000,
+        reload=True,
+        # Protocol-level pings detect dead Plivo connections; Starlette can't send pings itself
+        ws_ping_interval=settings.WS_PING_INTERVAL_SECONDS,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT_SECONDS
+    )
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# Run against the in-process fakes; settings are read when app modules are first imported
+os.environ["PROVIDER_MODE"] = "fake"
+for name, value in {
+    "DB_HOST": "fake", "DB_USER": "fake", "DB_PASSWORD": "fake", "DB_NAME": "fake", "DB_PORT": "3306"
+}.items():
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
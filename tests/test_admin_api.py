@@ -0,0 +1,23 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from manage import app
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def test_admin_endpoints_refused_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", None)
+    assert client.get("/admin/drain").status_code == 403
+    assert client.post("/admin/drain", params={"exit": "true"}).status_code == 403
+
+def test_admin_endpoints_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/drain").status_code == 401
+    assert client.get("/admin/drain", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.put(
+        "/admin/dialer/campaigns/job-1", json={}, headers={"Authorization": "Bearer wrong"}
+    ).status_code == 401
+    assert client.get("/admin/drain", headers={"Authorization": "Bearer s3cret"}).status_code == 200
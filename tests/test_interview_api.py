@@ -0,0 +1,60 @@
+import itertools
+
+import pytest
+from fastapi.testclient import TestClient
+
+from manage import app
+
+_phone_numbers = itertools.count(15550000000)
+
+@pytest.fixture
+def client():
+    # No lifespan: the interview routes only need the in-memory MySQL fake
+    return TestClient(app)
+
+@pytest.fixture
+def interview(client):
+    response = client.post("/api/v1/interviews", json={
+        "job_id": "job-put",
+        "phone_number": f"+{next(_phone_numbers)}",
+        "questions": ["Why this job?"],
+        "evaluation_criteria": ["communication"],
+        "interview_language": "en",
+        "evaluation_language": "en"
+    })
+    assert response.status_code == 200
+    return client.get(f"/api/v1/interviews/{response.json()['data']['interview_id']}").json()
+
+def test_unversioned_put_updates_current_version(client, interview):
+    response = client.put(f"/api/v1/interviews/{interview['interview_id']}", json={"interview_language": "es"})
+    assert response.status_code == 200
+    assert response.json()["interview_language"] == "es"
+    assert response.json()["version"] == interview["version"] + 1
+
+def test_unversioned_put_by_job_id_updates_current_version(client, interview):
+    response = client.put(
+        f"/api/v1/jobs/{interview['job_id']}/interviews/{interview['interview_id']}",
+        json={"is_completed": True}
+    )
+    assert response.status_code == 200
+    assert response.json()["is_completed"] is True
+
+def test_put_with_stale_version_conflicts(client, interview):
+    url = f"/api/v1/interviews/{interview['interview_id']}"
+    assert client.put(url, json={"interview_language": "es"}).status_code == 200
+    response = client.put(url, json={"interview_language": "fr", "version": interview["version"]})
+    assert response.status_code == 409
+
+def test_put_with_stale_if_match_conflicts(client, interview):
+    url = f"/api/v1/interviews/{interview['interview_id']}"
+    etag = f'"i{interview["interview_id"]}-v{interview["version"]}"'
+    assert client.put(url, json={"interview_language": "es"}, headers={"If-Match": etag}).status_code == 200
+    assert client.put(url, json={"interview_language": "fr"}, headers={"If-Match": etag}).status_code == 409
+
+def test_put_with_foreign_if_match_fails_precondition(client, interview):
+    response = client.put(
+        f"/api/v1/interviews/{interview['interview_id']}",
+        json={"interview_language": "es"},
+        headers={"If-Match": '"something-else"'}
+    )
+    assert response.status_code == 412
@@ -0,0 +1,34 @@
+import json
+import logging
+import queue
+
+from app.core.logger import DroppingQueueHandler, JsonFormatter
+
+def _record_through_queue(log):
+    records = queue.Queue()
+    test_logger = logging.getLogger("test-logger")
+    test_logger.propagate = False
+    handler = DroppingQueueHandler(records)
+    test_logger.addHandler(handler)
+    try:
+        log(test_logger)
+    finally:
+        test_logger.removeHandler(handler)
+    return records.get_nowait()
+
+def test_exception_keeps_traceback_in_exc_field():
+    def log(test_logger):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            test_logger.exception("Failed to %s", "start")
+
+    entry = json.loads(JsonFormatter().format(_record_through_queue(log)))
+    assert entry["msg"] == "Failed to start"
+    assert "Traceback" in entry["exc"]
+    assert "ValueError: boom" in entry["exc"]
+
+def test_record_without_exception_has_no_exc_field():
+    entry = json.loads(JsonFormatter().format(_record_through_queue(lambda test_logger: test_logger.error("plain %d", 1))))
+    assert entry["msg"] == "plain 1"
+    assert "exc" not in entry